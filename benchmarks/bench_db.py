@@ -0,0 +1,59 @@
+# benchmarks/bench_db.py
+# bot/db.py helper latency against a synthetic population.
+#
+# A scratch SQLite file (benchmarks.common.scratch_db) gets the live schema
+# and a synthetic population of N users (default 100k) plus attack history
+# from benchmarks.populate, then each helper is timed through the real
+# bot.db functions — the same SQL the handlers run.
+# Reads pick random existing user ids; writes (update_user_xp,
+# log_pvp_attack, touch_last_active) commit like production.
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_db [users]
+
+import sys
+import random
+from typing import Dict
+
+from benchmarks.common import seed, median_ms, scratch_db, print_table
+from benchmarks.populate import populate
+
+DEFAULT_USERS = 100_000
+
+
+def collect(quick: bool = False, users: int = 0) -> Dict[str, float]:
+    n_users = users or (10_000 if quick else DEFAULT_USERS)
+    reps = 200 if quick else 1000
+    with scratch_db() as (db, _path):
+        populate(db.conn, n_users)
+        seed()
+        rid = lambda: random.randint(1, n_users)
+
+        results = {
+            "db.get_user": median_ms(lambda: db.get_user(rid()), reps),
+            "db.get_pvp_stats": median_ms(lambda: db.get_pvp_stats(rid()), reps),
+            "db.is_pvp_shielded": median_ms(lambda: db.is_pvp_shielded(rid()), reps),
+            "db.get_users_who_attacked_you": median_ms(lambda: db.get_users_who_attacked_you(rid()), reps // 10),
+            "db.has_unseen_pvp_attacks": median_ms(lambda: db.has_unseen_pvp_attacks(rid()), reps // 10),
+            "db.get_user_by_username": median_ms(lambda: db.get_user_by_username(f"grok_{rid()}"), reps // 10),
+            "db.search_users_by_name": median_ms(lambda: db.search_users_by_name("rok_12"), 20),
+            "db.get_top_users": median_ms(lambda: db.get_top_users(10), 20),
+            "db.get_top_pvp": median_ms(lambda: db.get_top_pvp(10), 20),
+            "db.get_recent_active_users": median_ms(lambda: db.get_recent_active_users(200), 20),
+            "db.count_online_users": median_ms(db.count_online_users, 20),
+            "db.get_user_ids_after": median_ms(lambda: db.get_user_ids_after(rid(), 100), reps),
+            "db.get_all_users": median_ms(db.get_all_users, 3 if quick else 5),
+            "db.update_user_xp": median_ms(lambda: db.update_user_xp(rid(), {"xp_total": 1234}), reps // 5),
+            "db.touch_last_active": median_ms(lambda: db.touch_last_active(rid()), reps // 5),
+            "db.log_pvp_attack": median_ms(lambda: db.log_pvp_attack(rid(), rid(), 50, "win"), reps // 5),
+        }
+    return results
+
+
+def main(users: int = DEFAULT_USERS):
+    results = collect(users=users)
+    print_table(f"db helpers — {users} users", results)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_USERS)
@@ -0,0 +1,110 @@
+# benchmarks/bench_engine.py
+# Fight resolution throughput.
+#
+# - run_pve_fight / run_pvp_fight: one full auto-resolved fight per call
+# - PvPFightSession.resolve_attacker_action: one attacker action (attacker
+#   move + defender AI reply), measured over whole sessions so the turn mix
+#   matches a real fight; also reported per complete session
+#
+# Fresh Player / Mob / session objects are built per fight (the engine
+# mutates them) outside the timed region. Each metric is the median of
+# BATCHES seeded batches, so one noisy batch doesn't read as a regression.
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_engine [iterations]
+
+import sys
+import time
+import random
+import statistics
+from typing import Dict
+
+from benchmarks.common import seed, print_table
+from services.fightsystem import run_pve_fight, run_pvp_fight
+from services.fight_session_pvp import PvPFightSession, ACTION_ATTACK, ACTION_BLOCK, ACTION_CHARGE
+from utils.models import Player, Mob
+
+PVP_ACTIONS = [ACTION_ATTACK, ACTION_ATTACK, ACTION_ATTACK, ACTION_BLOCK, ACTION_CHARGE]
+MAX_ACTIONS = 200
+BATCHES = 5
+
+
+def _player(uid: int, level: int) -> Player:
+    p = Player(uid, f"grok{uid}")
+    p.level = level
+    p.max_hp = p.calculate_max_hp()
+    p.current_hp = p.max_hp
+    return p
+
+
+def _mob(level: int) -> Mob:
+    return Mob("Bench Mob", level=level, hp=60 + level * 12, attack=6 + level, defense=3 + level // 2,
+               crit_chance=0.03, dodge_chance=0.02, xp_reward=20 + level * 5)
+
+
+def _stats(level: int) -> Dict[str, float]:
+    return {"hp": 120 + level * 8, "attack": 10 + level * 2, "defense": 4 + level, "crit_chance": 0.05}
+
+
+def _per_fight(make, fight, iterations: int) -> float:
+    total = 0.0
+    for i in range(iterations):
+        args = make(i)
+        t0 = time.perf_counter()
+        fight(*args)
+        total += time.perf_counter() - t0
+    return total * 1000.0 / iterations
+
+
+def _pvp_sessions(iterations: int):
+    actions = 0
+    total = 0.0
+    for i in range(iterations):
+        level = 1 + i % 40
+        sess = PvPFightSession(10_000 + i, 20_000 + i, _stats(level), _stats(level + 1))
+        t0 = time.perf_counter()
+        n = 0
+        while not sess.ended and n < MAX_ACTIONS:
+            sess.resolve_attacker_action(random.choice(PVP_ACTIONS))
+            n += 1
+        total += time.perf_counter() - t0
+        actions += n
+    return total * 1000.0 / max(actions, 1), total * 1000.0 / iterations
+
+
+def _batched(fn, iterations: int):
+    """Median of fn(size) over BATCHES equally sized, identically seeded batches."""
+    size = max(iterations // BATCHES, 1)
+    runs = []
+    for _ in range(BATCHES):
+        seed()
+        runs.append(fn(size))
+    if isinstance(runs[0], tuple):
+        return tuple(statistics.median(r[k] for r in runs) for k in range(len(runs[0])))
+    return statistics.median(runs)
+
+
+def collect(quick: bool = False, iterations: int = 0) -> Dict[str, float]:
+    n = iterations or (1000 if quick else 5000)
+    pve = _batched(lambda k: _per_fight(
+        lambda i: (_player(i, 1 + i % 40), _mob(1 + i % 40)), run_pve_fight, k), n)
+    pvp = _batched(lambda k: _per_fight(
+        lambda i: (_player(i, 1 + i % 40), _player(i + 1, 1 + (i + 3) % 40)), run_pvp_fight, k), n)
+    per_action, per_session = _batched(_pvp_sessions, max(n // 4, BATCHES))
+    return {
+        "engine.run_pve_fight": pve,
+        "engine.run_pvp_fight": pvp,
+        "engine.pvp_session.resolve_attacker_action": per_action,
+        "engine.pvp_session.full_fight": per_session,
+    }
+
+
+def main(iterations: int = 5000):
+    results = collect(iterations=iterations)
+    print_table(f"fight engine — {iterations} fights", results)
+    for name, ms in results.items():
+        print(f"  {name:<46}{1000.0 / max(ms, 1e-9):>12.0f} /s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,79 @@
+# benchmarks/bench_render_assets.py
+# Per-card render time with a cold vs warm font/asset cache.
+#
+# "cold" clears bot.render_assets before every render (the old behaviour:
+# every font / portrait re-read from disk); "warm" renders against the
+# shared process cache. Uses the render_* functions directly so the
+# content-addressed output cache (bot/render_cache.py) is bypassed.
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_render_assets [iterations]
+
+import sys
+import time
+import statistics
+
+from bot import render_assets
+from bot.images import render_leaderboard
+from bot.profile_image import render_profile_image
+from bot.profile_card import render_profile_card
+
+
+USERS = [
+    {"user_id": 1000 + i, "display_name": f"Grok {i}", "level": 40 - i, "xp_total": 9000 - i * 300}
+    for i in range(12)
+]
+
+PROFILE = {
+    "user_id": 42, "display_name": "Bench Grok", "level": 12, "xp_total": 1800,
+    "wins": 9, "fights": 20, "rituals": 4, "form": 2, "rank": 3, "xp_to_next": 2400,
+}
+
+CARD = {
+    "user_id": 42, "display_name": "Bench Grok", "evolution": "Hopper", "level": 12,
+    "xp_current": 120, "xp_to_next_level": 400, "wins": 9, "mobs_defeated": 20,
+}
+
+RENDERERS = [
+    ("leaderboard", lambda: render_leaderboard(USERS)),
+    ("profile_image", lambda: render_profile_image(PROFILE)),
+    ("profile_card", lambda: render_profile_card(CARD)),
+]
+
+
+def _time(fn, iterations, cold):
+    samples = []
+    for _ in range(iterations):
+        if cold:
+            render_assets.clear_caches()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def collect(quick=False, iterations=0):
+    """Warm-cache median ms per card (the steady state in production)."""
+    n = iterations or (3 if quick else 10)
+    results = {}
+    for name, fn in RENDERERS:
+        fn()
+        results[f"render.{name}"] = statistics.median(_time(fn, n, cold=False))
+    return results
+
+
+def main(iterations=10):
+    print(f"render benchmark — {iterations} iterations per renderer")
+    print(f"{'renderer':<16}{'cold ms':>10}{'warm ms':>10}{'speedup':>10}")
+    for name, fn in RENDERERS:
+        fn()  # import / first-touch warm-up outside the measurement
+        cold = statistics.median(_time(fn, iterations, cold=True))
+        render_assets.clear_caches()
+        fn()
+        warm = statistics.median(_time(fn, iterations, cold=False))
+        print(f"{name:<16}{cold:>10.1f}{warm:>10.1f}{cold / max(warm, 1e-9):>9.2f}x")
+    print("cache:", render_assets.cache_info())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
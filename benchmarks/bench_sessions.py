@@ -0,0 +1,80 @@
+# benchmarks/bench_sessions.py
+# Session-manager save / load cost as the number of live sessions grows.
+#
+# PvPManager and BattleSessionManager keep every session in one dict and
+# rewrite the whole JSON file on each save_session(), so per-save cost is
+# expected to scale with the number of concurrent sessions. Each size gets
+# its own temp storage file pre-filled with that many sessions; then
+# save_session / load_session_by_sid are timed for a random session.
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_sessions [max_sessions]
+
+import os
+import sys
+import random
+import tempfile
+from typing import Dict
+
+from benchmarks.common import seed, median_ms, print_table
+from services.fight_session_pvp import PvPManager, PvPFightSession
+from services.fight_session_battle import BattleSessionManager, BattleSession
+
+SIZES = (10, 100, 1000)
+
+STATS = {"hp": 200, "attack": 30, "defense": 12, "crit_chance": 0.06}
+MOB = {"name": "Bench Mob", "hp": 150, "attack": 20, "defense": 6}
+
+
+def _pvp(i: int) -> PvPFightSession:
+    sess = PvPFightSession(1_000_000 + i, 2_000_000 + i, STATS, STATS)
+    for _ in range(4):   # a few turns so the event log has realistic size
+        sess.resolve_attacker_action("attack")
+    return sess
+
+
+def _battle(i: int) -> BattleSession:
+    sess = BattleSession(1_000_000 + i, dict(STATS), dict(MOB), {"name": MOB["name"], "tier": 1})
+    for _ in range(4):
+        sess.resolve_player_action("attack")
+    return sess
+
+
+def _bench(kind: str, manager_cls, make, size: int, reps: int) -> Dict[str, float]:
+    fd, path = tempfile.mkstemp(prefix=f"megagrok-bench-{kind}-", suffix=".json")
+    os.close(fd)
+    try:
+        mgr = manager_cls(storage_file=path)
+        sessions = [make(i) for i in range(size)]
+        for s in sessions:
+            mgr._sessions[str(getattr(s, "attacker_id", getattr(s, "user_id", None)))] = s.to_dict()
+            mgr._sessions[f"sid:{s.session_id}"] = s.to_dict()
+        mgr.save()
+        return {
+            f"sessions.{kind}.save_session@{size}": median_ms(lambda: mgr.save_session(random.choice(sessions)), reps),
+            f"sessions.{kind}.load_session_by_sid@{size}": median_ms(
+                lambda: mgr.load_session_by_sid(random.choice(sessions).session_id), reps),
+            f"sessions.{kind}.cold_start@{size}": median_ms(lambda: manager_cls(storage_file=path), max(reps // 5, 3)),
+        }
+    finally:
+        os.remove(path)
+
+
+def collect(quick: bool = False, sizes=SIZES) -> Dict[str, float]:
+    reps = 20 if quick else 100
+    results: Dict[str, float] = {}
+    for size in sizes:
+        seed()
+        results.update(_bench("pvp", PvPManager, _pvp, size, reps))
+        seed()
+        results.update(_bench("battle", BattleSessionManager, _battle, size, reps))
+    return results
+
+
+def main(max_sessions: int = SIZES[-1]):
+    sizes = [s for s in SIZES if s <= max_sessions] or [max_sessions]
+    print_table(f"session managers — sizes {sizes}", collect(sizes=sizes))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1])
@@ -0,0 +1,51 @@
+# benchmarks/bench_text_outline.py
+# Outline text: legacy (2w+1)² offset draws vs Pillow native stroke.
+#
+# Also reports the mean per-pixel difference between the two so visual
+# equivalence can be eyeballed (square vs round dilation at the corners).
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_text_outline [iterations]
+
+import sys
+import time
+
+from PIL import Image, ImageChops, ImageStat, ImageDraw
+
+from bot.images import load_font, draw_text_outline, draw_text_outline_legacy
+
+LABELS = [("MEGAGROK", 120, 3), ("Grok Display Name", 64, 3), ("LV 42 • 12345 XP", 48, 3), ("7.", 64, 3)]
+
+
+def _render(draw_fn):
+    img = Image.new("RGB", (1080, 600), (22, 22, 22))
+    dr = ImageDraw.Draw(img)
+    y = 20
+    for text, size, w in LABELS:
+        draw_fn(dr, (60, y), text, load_font(size), fill="#FFB545", outline="black", width=w)
+        y += size + 30
+    return img
+
+
+def _bench(draw_fn, iterations):
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        _render(draw_fn)
+    return (time.perf_counter() - t0) * 1000.0 / iterations
+
+
+def main(iterations=50):
+    legacy = _bench(draw_text_outline_legacy, iterations)
+    stroke = _bench(draw_text_outline, iterations)
+    diff = ImageChops.difference(_render(draw_text_outline_legacy), _render(draw_text_outline))
+    mean_diff = sum(ImageStat.Stat(diff).mean) / 3
+
+    print(f"outline text — {len(LABELS)} labels, {iterations} iterations")
+    print(f"legacy offsets : {legacy:8.2f} ms / frame")
+    print(f"native stroke  : {stroke:8.2f} ms / frame")
+    print(f"speed-up       : {legacy / max(stroke, 1e-9):8.1f}x")
+    print(f"mean pixel diff: {mean_diff:8.3f} / 255")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,95 @@
+# benchmarks/common.py
+# Shared helpers for the benchmark suite: fixed seeding, per-call timing and
+# a scratch SQLite database that carries the live bot/db.py schema.
+#
+# Every bench_* module exposes collect(quick=False) -> {metric: ms}; all
+# metrics are "milliseconds per operation" so lower is always better and
+# benchmarks/run_suite.py can compare them against a baseline uniformly.
+
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+SEED = 1337
+
+
+def seed(value: int = SEED):
+    random.seed(value)
+
+
+def time_calls(fn: Callable[[], object], iterations: int, warmup: int = 1) -> List[float]:
+    """Per-call wall time in ms for `iterations` calls (after `warmup` untimed calls)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def median_ms(fn: Callable[[], object], iterations: int, warmup: int = 1) -> float:
+    return statistics.median(time_calls(fn, iterations, warmup))
+
+
+def p95(samples: List[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else 0.0
+
+
+# -------------------------------------------------
+# Scratch database
+# -------------------------------------------------
+def copy_schema(src: sqlite3.Connection, dst: sqlite3.Connection):
+    """Replay every CREATE TABLE / INDEX from src (already migrated by bot.db) into dst."""
+    rows = src.execute(
+        "SELECT sql FROM sqlite_master "
+        "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY type = 'index'"
+    ).fetchall()
+    for (sql,) in rows:
+        dst.execute(sql)
+    dst.commit()
+
+
+@contextmanager
+def scratch_db():
+    """
+    Point bot.db at a throw-away SQLite file for the duration of the block.
+
+    bot.db binds `conn` / `cursor` at import (against DB_PATH) and every
+    helper reads those module globals, so swapping them redirects all
+    helpers without touching the production file.
+    """
+    import bot.db as db
+
+    fd, path = tempfile.mkstemp(prefix="megagrok-bench-", suffix=".db")
+    os.close(fd)
+    old_conn, old_cursor = db.conn, db.cursor
+    plain = sqlite3.connect(path)
+    copy_schema(old_conn, plain)
+    plain.close()
+    conn = db._ThreadConnection(path)
+    db.conn, db.cursor = conn, db._TimedCursor(conn)
+    try:
+        yield db, path
+    finally:
+        db.conn, db.cursor = old_conn, old_cursor
+        conn.close()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+
+
+def print_table(title: str, results: Dict[str, float]):
+    print(title)
+    for name, ms in results.items():
+        print(f"  {name:<46}{ms:>12.4f} ms")
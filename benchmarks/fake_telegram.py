@@ -0,0 +1,317 @@
+# benchmarks/fake_telegram.py
+# Local stand-in for api.telegram.org, for offline load tests.
+#
+# Point the bot at it with TELEGRAM_API_BASE=http://127.0.0.1:<port>
+# (main.py turns that into apihelper.API_URL). It serves:
+#
+# - getUpdates: long-polls a scripted update stream (push_message /
+#   push_callback), honouring offset / limit / timeout like Telegram
+# - sendMessage / sendPhoto / sendAnimation / sendDocument and the
+#   editMessage* family: answered with well-formed Message objects so
+#   telebot's de_json and the handlers' follow-up edits work
+# - answerCallbackQuery, deleteMessage, getMe, getChat, … : benign results
+#
+# Every bot→API call is counted per method (calls, bytes, server ms) and
+# the first visible reply to each chat is reported through on_reply so a
+# driver (benchmarks/load_telegram.py) can measure update→reply latency.
+# The last inline keyboard shown in each chat is kept so simulated users
+# can "tap" real buttons.
+
+import sys
+import json
+import time
+import email
+import email.policy
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlparse
+
+BOT_USER = {"id": 900000001, "is_bot": True, "first_name": "MegaGrok", "username": "megagrok_loadtest_bot"}
+
+_SEND_METHODS = {"sendmessage", "sendphoto", "sendanimation", "senddocument", "sendsticker", "sendvideo"}
+_EDIT_METHODS = {"editmessagetext", "editmessagecaption", "editmessagemedia", "editmessagereplymarkup"}
+
+ReplyHook = Callable[[int, str, float], None]   # (chat_id, method, server time)
+
+
+class FakeTelegram:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_poll_seconds: float = 2.0):
+        self.host = host
+        self.port = port
+        self.max_poll_seconds = max_poll_seconds
+        self.on_reply: Optional[ReplyHook] = None
+
+        self._cond = threading.Condition()
+        self._updates: deque = deque()          # (update_id, pushed_at, update)
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._next_callback_id = 1
+        self._callbacks: Dict[str, int] = {}    # callback_query_id -> chat_id
+        self._keyboards: Dict[int, Dict[str, Any]] = {}   # chat_id -> last message with inline keyboard
+        self._stats: Dict[str, List[float]] = {}  # method -> [calls, bytes, total_ms]
+        self.delivery_ms: List[float] = []      # push → first handed out by getUpdates
+        self._delivered_upto = 0
+        self.polled = threading.Event()         # set on the first getUpdates
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._closed = False
+
+    # ---------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeTelegram":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake._serve(self)
+
+            def do_POST(self):
+                fake._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                # the bot dropping a keep-alive / long-poll socket isn't an error
+                if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+                    super().handle_error(request, client_address)
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="fake-telegram", daemon=True).start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # ---------------------------------------------
+    # Scripted update stream
+    # ---------------------------------------------
+    @staticmethod
+    def user(uid: int, name: Optional[str] = None) -> Dict[str, Any]:
+        name = name or f"LoadGrok{uid}"
+        return {"id": uid, "is_bot": False, "first_name": name, "username": name.lower()}
+
+    def _push(self, update: Dict[str, Any]) -> int:
+        with self._cond:
+            uid = self._next_update_id
+            self._next_update_id += 1
+            update["update_id"] = uid
+            self._updates.append((uid, time.perf_counter(), update))
+            self._cond.notify_all()
+        return uid
+
+    def push_message(self, user: Dict[str, Any], text: str) -> int:
+        with self._cond:
+            mid = self._next_message_id
+            self._next_message_id += 1
+        msg = {
+            "message_id": mid, "date": int(time.time()), "from": user,
+            "chat": {"id": user["id"], "type": "private", "first_name": user["first_name"],
+                     "username": user.get("username")},
+            "text": text,
+        }
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return self._push({"message": msg})
+
+    def push_callback(self, user: Dict[str, Any], message: Dict[str, Any], data: str) -> int:
+        with self._cond:
+            cid = str(self._next_callback_id)
+            self._next_callback_id += 1
+            self._callbacks[cid] = user["id"]
+        return self._push({"callback_query": {
+            "id": cid, "from": user, "message": message,
+            "chat_instance": str(user["id"]), "data": data,
+        }})
+
+    def keyboard(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        """Last bot message with an inline keyboard in this chat (or None)."""
+        with self._cond:
+            return self._keyboards.get(int(chat_id))
+
+    @staticmethod
+    def buttons(message: Dict[str, Any]) -> List[str]:
+        rows = ((message or {}).get("reply_markup") or {}).get("inline_keyboard") or []
+        return [b["callback_data"] for row in rows for b in row if b.get("callback_data")]
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._updates)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._cond:
+            return {m: {"calls": int(c), "bytes": int(b), "avg_ms": round(t / c, 3) if c else 0.0}
+                    for m, (c, b, t) in sorted(self._stats.items())}
+
+    # ---------------------------------------------
+    # HTTP plumbing
+    # ---------------------------------------------
+    def _serve(self, req: BaseHTTPRequestHandler):
+        t0 = time.perf_counter()
+        parsed = urlparse(req.path)
+        parts = parsed.path.strip("/").split("/")
+        method = parts[-1] if len(parts) >= 2 and parts[0].startswith("bot") else ""
+
+        length = int(req.headers.get("Content-Length") or 0)
+        body = req.rfile.read(length) if length else b""
+        params = dict(parse_qsl(parsed.query))
+        try:
+            params.update(self._parse_body(req.headers.get("Content-Type", ""), body))
+            result = self._handle(method, params)
+            payload = {"ok": True, "result": result}
+            code = 200
+        except KeyError as e:
+            payload = {"ok": False, "error_code": 400, "description": f"Bad Request: {e}"}
+            code = 400
+
+        data = json.dumps(payload).encode("utf-8")
+        req.send_response(code)
+        req.send_header("Content-Type", "application/json")
+        req.send_header("Content-Length", str(len(data)))
+        req.end_headers()
+        req.wfile.write(data)
+
+        if method.lower() != "getupdates":
+            with self._cond:
+                s = self._stats.setdefault(method, [0, 0, 0.0])
+                s[0] += 1
+                s[1] += length
+                s[2] += (time.perf_counter() - t0) * 1000.0
+
+    @staticmethod
+    def _parse_body(ctype: str, body: bytes) -> Dict[str, Any]:
+        if not body:
+            return {}
+        if ctype.startswith("application/x-www-form-urlencoded"):
+            return dict(parse_qsl(body.decode("utf-8")))
+        if ctype.startswith("application/json"):
+            return json.loads(body)
+        if ctype.startswith("multipart/form-data"):
+            msg = email.message_from_bytes(
+                b"Content-Type: " + ctype.encode() + b"\r\n\r\n" + body, policy=email.policy.HTTP)
+            out = {}
+            for part in msg.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename():
+                    out[name] = part.get_payload(decode=True) or b""
+                else:
+                    out[name] = part.get_content()
+            return out
+        return {}
+
+    # ---------------------------------------------
+    # Bot API methods
+    # ---------------------------------------------
+    def _handle(self, method: str, p: Dict[str, Any]) -> Any:
+        m = method.lower()
+        if m == "getupdates":
+            return self._get_updates(p)
+        if m == "getme":
+            return BOT_USER
+        if m in _SEND_METHODS:
+            return self._message(m, p, new=True)
+        if m in _EDIT_METHODS:
+            return self._message(m, p, new=False)
+        if m == "answercallbackquery":
+            with self._cond:
+                chat_id = self._callbacks.pop(str(p.get("callback_query_id")), None)
+            if chat_id is not None:
+                self._replied(chat_id, method)
+            return True
+        if m == "getchat":
+            chat_id = int(p["chat_id"])
+            return {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup", "title": "Load Test"}
+        if m == "getchatmember":
+            return {"status": "member", "user": self.user(int(p.get("user_id", 0)))}
+        if m == "getwebhookinfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": self.pending()}
+        return True
+
+    def _get_updates(self, p: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(p.get("offset") or 0)
+        limit = int(p.get("limit") or 100)
+        wait = min(float(p.get("timeout") or 0), self.max_poll_seconds)
+        self.polled.set()
+        deadline = time.perf_counter() + wait
+        with self._cond:
+            while self._updates and self._updates[0][0] < offset:
+                self._updates.popleft()   # confirmed by the new offset
+            while not self._updates and not self._closed:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            batch = list(self._updates)[:limit]
+            now = time.perf_counter()
+            for uid, pushed_at, _ in batch:
+                if uid > self._delivered_upto:
+                    self.delivery_ms.append((now - pushed_at) * 1000.0)
+                    self._delivered_upto = uid
+            return [u for _, _, u in batch]
+
+    def _message(self, m: str, p: Dict[str, Any], new: bool) -> Any:
+        if "chat_id" not in p:
+            return True   # inline message edit
+        chat_id = int(p["chat_id"])
+        markup = p.get("reply_markup")
+        if isinstance(markup, str):
+            markup = json.loads(markup) if markup else None
+
+        with self._cond:
+            if new:
+                mid = self._next_message_id
+                self._next_message_id += 1
+            else:
+                mid = int(p.get("message_id") or 0)
+        msg: Dict[str, Any] = {
+            "message_id": mid, "date": int(time.time()), "from": BOT_USER,
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+        }
+        if m in ("sendmessage", "editmessagetext"):
+            msg["text"] = str(p.get("text", ""))
+        else:
+            msg["caption"] = str(p.get("caption", ""))
+        if m == "sendphoto":
+            size = len(p["photo"]) if isinstance(p.get("photo"), bytes) else 0
+            msg["photo"] = [{"file_id": f"fake-photo-{mid}", "file_unique_id": f"p{mid}",
+                             "width": 1080, "height": 1080, "file_size": size}]
+        elif m == "sendanimation":
+            msg["animation"] = {"file_id": f"fake-anim-{mid}", "file_unique_id": f"a{mid}",
+                                "width": 480, "height": 480, "duration": 3}
+        elif m == "senddocument":
+            msg["document"] = {"file_id": f"fake-doc-{mid}", "file_unique_id": f"d{mid}"}
+        if markup:
+            msg["reply_markup"] = markup
+
+        with self._cond:
+            if markup and markup.get("inline_keyboard"):
+                self._keyboards[chat_id] = msg
+            elif not new and self._keyboards.get(chat_id, {}).get("message_id") == mid:
+                self._keyboards.pop(chat_id, None)   # keyboard removed by this edit
+        self._replied(chat_id, m)
+        return msg
+
+    def _replied(self, chat_id: int, method: str):
+        hook = self.on_reply
+        if hook is not None:
+            try:
+                hook(chat_id, method, time.perf_counter())
+            except Exception as e:
+                print("⚠ [FAKE-TG] on_reply hook failed:", e)
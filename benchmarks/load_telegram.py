@@ -0,0 +1,291 @@
+# benchmarks/load_telegram.py
+# Offline load test: thousands of simulated players against a real bot
+# process talking to benchmarks/fake_telegram.py instead of Telegram.
+#
+#   python -m benchmarks.load_telegram --players 2000 --duration 60
+#   python -m benchmarks.load_telegram --db /tmp/pop-100k.db --out load.json
+#   python -m benchmarks.load_telegram --no-spawn --port 8081   # bot started by hand
+#
+# By default main.py is spawned with TELEGRAM_API_BASE pointing at the fake
+# server, a scratch MEGAGROK_DB_PATH (or --db, e.g. a synthetic population
+# fixture) and scratch render / media paths, so nothing touches production
+# state (session JSON files still go to the bot's usual data/ dir).
+# Players ramp in over --ramp seconds and loop through scripted sessions:
+#   /awaken  → tap a nav button
+#   /battle  → pick a tier, then tap fight buttons
+#   /pvp     → tap menu buttons
+# Buttons come from the inline keyboard the bot actually sent, so the
+# callbacks exercise the real routes.
+#
+# Latency is update→first visible reply (send / edit / answerCallbackQuery
+# for that chat) per command / callback route, reported as percentiles
+# together with getUpdates delivery lag and per-method API call counts.
+
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import SEED, p95
+from benchmarks.fake_telegram import FakeTelegram
+
+LOADTEST_TOKEN = "123456789:LOADTEST-fake-token"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (weight, command, max button taps after it)
+SCENARIOS = [
+    (2, "/awaken", 1),
+    (5, "/battle", 8),
+    (3, "/pvp", 3),
+]
+AVOID_BUTTONS = ("surrender", "forfeit", "stop")
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"count": len(ordered), "p50": round(pick(0.50), 2), "p90": round(pick(0.90), 2),
+            "p95": round(p95(ordered), 2), "p99": round(pick(0.99), 2), "max": round(ordered[-1], 2)}
+
+
+class Player:
+    def __init__(self, uid: int):
+        self.uid = uid
+        self.user = FakeTelegram.user(uid)
+        self.label = ""
+        self.sent_at = 0.0
+        self.waiting = False
+        self.token = 0          # bumps on every action; stale heap entries are skipped
+        self.taps_left = 0
+
+
+class LoadDriver:
+    def __init__(self, fake: FakeTelegram, players: int, think: float, reply_timeout: float):
+        self.fake = fake
+        self.think = think
+        self.reply_timeout = reply_timeout
+        self.players: Dict[int, Player] = {}
+        self._base_uid = 5_000_000
+        self._count = players
+
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []    # (due, seq, uid, token)
+        self._seq = 0
+        self._stop = False
+
+        self.latency: Dict[str, List[float]] = {}
+        self.timeouts: Dict[str, int] = {}
+        self.updates_sent = 0
+        self.replies = 0
+        fake.on_reply = self._on_reply
+
+    # ---------------------------------------------
+    # Scheduling
+    # ---------------------------------------------
+    def _schedule(self, p: Player, delay: float):
+        self._seq += 1
+        heapq.heappush(self._heap, (time.perf_counter() + delay, self._seq, p.uid, p.token))
+        self._cond.notify()
+
+    def _think(self) -> float:
+        return random.uniform(0.5, 1.5) * self.think
+
+    def _act(self, p: Player):
+        """Send the player's next update (caller holds the lock)."""
+        p.token += 1
+        kb = self.fake.keyboard(p.uid) if p.taps_left > 0 else None
+        buttons = [b for b in self.fake.buttons(kb) if not any(a in b for a in AVOID_BUTTONS)] if kb else []
+        if buttons:
+            data = random.choice(buttons)
+            p.taps_left -= 1
+            p.label = "cb:" + ":".join(data.split(":")[:2])
+            p.sent_at = time.perf_counter()
+            self.fake.push_callback(p.user, kb, data)
+        else:
+            weights = [w for w, _, _ in SCENARIOS]
+            _, command, taps = random.choices(SCENARIOS, weights=weights)[0]
+            p.taps_left = taps
+            p.label = command
+            p.sent_at = time.perf_counter()
+            self.fake.push_message(p.user, command)
+        p.waiting = True
+        self.updates_sent += 1
+        self._schedule(p, self.reply_timeout)
+
+    def _on_reply(self, chat_id: int, method: str, at: float):
+        with self._cond:
+            p = self.players.get(chat_id)
+            if p is None or not p.waiting:
+                return
+            p.waiting = False
+            self.replies += 1
+            self.latency.setdefault(p.label, []).append((at - p.sent_at) * 1000.0)
+            p.token += 1
+            self._schedule(p, self._think())
+
+    def run(self, duration: float, ramp: float):
+        """Ramp players in, drive them for `duration` seconds, then stop."""
+        started = time.perf_counter()
+        with self._cond:
+            for i in range(self._count):
+                p = Player(self._base_uid + i)
+                self.players[p.uid] = p
+                self._seq += 1
+                heapq.heappush(self._heap, (started + ramp * i / max(self._count, 1), self._seq, p.uid, p.token))
+
+        end = started + duration
+        with self._cond:
+            while not self._stop:
+                now = time.perf_counter()
+                if now >= end:
+                    break
+                if not self._heap:
+                    self._cond.wait(end - now)
+                    continue
+                due, _, uid, token = self._heap[0]
+                if due > now:
+                    self._cond.wait(min(due, end) - now)
+                    continue
+                heapq.heappop(self._heap)
+                p = self.players[uid]
+                if token != p.token:
+                    continue
+                if p.waiting:   # reply never came
+                    self.timeouts[p.label] = self.timeouts.get(p.label, 0) + 1
+                    p.waiting = False
+                    p.taps_left = 0
+                self._act(p)
+            self._stop = True
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._cond:
+            all_ms = [ms for v in self.latency.values() for ms in v]
+            return {
+                "players": self._count,
+                "elapsed_s": round(elapsed, 1),
+                "updates_sent": self.updates_sent,
+                "replies": self.replies,
+                "updates_per_s": round(self.updates_sent / max(elapsed, 1e-9), 1),
+                "timeouts": dict(self.timeouts),
+                "latency_ms": {"all": percentiles(all_ms),
+                               **{k: percentiles(v) for k, v in sorted(self.latency.items())}},
+                "delivery_ms": percentiles(self.fake.delivery_ms),
+                "api": self.fake.stats(),
+                "pending_updates": self.fake.pending(),
+            }
+
+
+# -------------------------------------------------
+# Bot process
+# -------------------------------------------------
+def spawn_bot(fake: FakeTelegram, workdir: str, db_path: Optional[str], log_path: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "TOKEN": LOADTEST_TOKEN,
+        "BOT_MODE": "polling",
+        "TELEGRAM_API_BASE": fake.url,
+        "MEGAGROK_DB_PATH": db_path or os.path.join(workdir, "megagrok.db"),
+        "MEDIA_REGISTRY_PATH": os.path.join(workdir, "media_registry.json"),
+        "RENDER_CACHE_DIR": os.path.join(workdir, "render"),
+        "BROADCAST_STATE_PATH": os.path.join(workdir, "broadcasts.json"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    log = open(log_path, "w")
+    return subprocess.Popen([sys.executable, "main.py"], cwd=REPO_ROOT, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_bot(proc: subprocess.Popen):
+    if proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _print_report(r: Dict[str, Any]):
+    print(f"\nload test — {r['players']} players, {r['elapsed_s']}s, "
+          f"{r['updates_sent']} updates ({r['updates_per_s']}/s), {r['replies']} replies")
+    print(f"{'label':<28}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for label, s in r["latency_ms"].items():
+        if s.get("count"):
+            print(f"{label:<28}{s['count']:>8}{s['p50']:>10.1f}{s['p90']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}")
+    d = r["delivery_ms"]
+    if d.get("count"):
+        print(f"{'getUpdates delivery':<28}{d['count']:>8}{d['p50']:>10.1f}{d['p90']:>10.1f}{d['p99']:>10.1f}{d['max']:>10.1f}")
+    if r["timeouts"]:
+        print("timeouts:", ", ".join(f"{k}={v}" for k, v in sorted(r["timeouts"].items())))
+    print("api calls:", ", ".join(f"{m}={s['calls']}" for m, s in r["api"].items()))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Offline load test against a fake Telegram Bot API")
+    ap.add_argument("--players", type=int, default=500)
+    ap.add_argument("--duration", type=float, default=60.0, help="seconds of load after start")
+    ap.add_argument("--ramp", type=float, default=10.0, help="seconds to bring all players in")
+    ap.add_argument("--think", type=float, default=2.0, help="mean seconds between a reply and the next action")
+    ap.add_argument("--reply-timeout", type=float, default=15.0)
+    ap.add_argument("--port", type=int, default=0, help="fake API port (0 = random)")
+    ap.add_argument("--db", help="SQLite file for the bot (e.g. a synthetic population); copied, not modified")
+    ap.add_argument("--no-spawn", action="store_true", help="don't start main.py; wait for an external bot")
+    ap.add_argument("--boot-timeout", type=float, default=90.0)
+    ap.add_argument("--out", help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    random.seed(SEED)
+    fake = FakeTelegram(port=args.port).start()
+    print(f"fake Telegram API on {fake.url}  (TELEGRAM_API_BASE={fake.url})")
+
+    workdir = tempfile.mkdtemp(prefix="megagrok-load-")
+    proc = None
+    try:
+        if not args.no_spawn:
+            db_path = None
+            if args.db:
+                db_path = os.path.join(workdir, "megagrok.db")
+                shutil.copyfile(args.db, db_path)
+            log_path = os.path.join(workdir, "bot.log")
+            proc = spawn_bot(fake, workdir, db_path, log_path)
+            print(f"bot spawned (pid {proc.pid}), log: {log_path}")
+
+        if not fake.polled.wait(args.boot_timeout):
+            print(f"❌ bot never called getUpdates within {args.boot_timeout:.0f}s")
+            return 2
+        print(f"bot is polling — driving {args.players} players for {args.duration:.0f}s")
+
+        driver = LoadDriver(fake, args.players, args.think, args.reply_timeout)
+        elapsed = driver.run(args.duration, args.ramp)
+        report = driver.report(elapsed)
+        _print_report(report)
+
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            print(f"report written to {args.out}")
+        return 0
+    finally:
+        if proc is not None:
+            stop_bot(proc)
+        fake.stop()
+        if proc is not None and proc.returncode not in (0, None, -15):
+            print(f"⚠ bot exited with {proc.returncode}; log kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# benchmarks/populate.py
+# Synthetic population fixtures for DB / load testing.
+#
+#   python -m benchmarks.populate /tmp/pop-100k.db --users 100000
+#   python -m benchmarks.populate /tmp/pop-1m.db --users 1000000 --attacks-per-user 2
+#
+# The schema is the real one: bot.db runs init_db() and its column
+# migrations against the fixture file (via MEGAGROK_DB_PATH), or — if bot.db
+# is already imported in this process — its migrated schema is copied
+# over. Rows are then bulk-inserted with executemany in chunks, all inside
+# one transaction, with journalling / fsync off for the load.
+#
+# Distributions (seeded, so a given --users / --seed is reproducible):
+# - level: long tail (most players low level, few veterans); xp_current /
+#   xp_to_next_level / xp_total follow the same 1.35 curve battle.py uses
+# - wins / mobs_defeated / rituals scale with level
+# - ~40% of players have PvP history; elo_pvp drifts from 1000 with their
+#   win/loss record, pvp_* counters are consistent with it
+# - last_active: a few online now, a day / month / year tail, some never
+# - pvp_shield_until: a few % shielded right now (3h window like pvp.py)
+# - pvp_attack_log: PvP players attack near-level targets, skewed to the
+#   last few days; wins steal xp like pvp.py, ~30% already revenged
+#
+# populate(conn, users) works on any connection with the schema, so
+# benchmarks (bench_db) reuse it on a scratch database.
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+from typing import Dict, Iterator, List, Tuple
+
+from benchmarks.common import SEED, copy_schema
+
+CHUNK = 50_000
+LEVEL_CURVE = 1.35
+MAX_LEVEL = 60
+PVP_SHARE = 0.40
+SHIELD_SECONDS = 3 * 3600   # bot/handlers/pvp.py PVP_SHIELD_SECONDS
+SHIELDED_SHARE = 0.03
+
+USER_COLUMNS = (
+    "user_id", "username", "display_name", "level", "xp_total", "xp_current",
+    "xp_to_next_level", "level_curve_factor", "wins", "mobs_defeated", "rituals",
+    "quests", "cooldowns", "evolution_multiplier",
+    "elo_pvp", "pvp_wins", "pvp_losses", "pvp_fights_started", "pvp_fights_defended",
+    "pvp_successful_defenses", "pvp_failed_defenses", "pvp_challenges_received",
+    "pvp_shield_until", "last_pvp_alert_ts", "last_active", "megacrew",
+)
+ATTACK_COLUMNS = ("attacker_id", "defender_id", "ts", "xp_stolen", "result", "revenged")
+
+
+def _level_table() -> List[Tuple[int, int]]:
+    """[(xp_to_next_level, xp_total at start of level)] indexed by level, battle.py's curve."""
+    table = [(0, 0), (100, 0)]
+    for _ in range(2, MAX_LEVEL + 1):
+        to_next, total = table[-1]
+        table.append((int(to_next * LEVEL_CURVE), total + to_next))
+    return table
+
+
+_LEVELS = _level_table()
+
+
+def _level() -> int:
+    return min(MAX_LEVEL, 1 + int(random.expovariate(1 / 4.0)))
+
+
+def _last_active(now: int) -> int:
+    r = random.random()
+    if r < 0.03:
+        return now - random.randint(0, 180)              # online now
+    if r < 0.20:
+        return now - random.randint(180, 86_400)         # today
+    if r < 0.55:
+        return now - random.randint(86_400, 30 * 86_400)
+    if r < 0.90:
+        return now - random.randint(30 * 86_400, 365 * 86_400)
+    return 0                                             # never touched since the column was added
+
+
+def _users(first_id: int, count: int, now: int, bands: Dict[int, List[int]],
+           fighters: List[int]) -> Iterator[tuple]:
+    """User rows; fills bands (level -> ids) and fighters (PvP ids) for _attacks."""
+    empty = json.dumps({})
+    for uid in range(first_id, first_id + count):
+        level = _level()
+        bands.setdefault(level, []).append(uid)
+        to_next, base_total = _LEVELS[level]
+        xp_current = random.randint(0, max(to_next - 1, 0))
+        mobs = int(level * random.uniform(2, 8))
+        wins = int(mobs * random.uniform(0.6, 0.95))
+
+        if random.random() < PVP_SHARE:
+            fighters.append(uid)
+            started = int(level * random.uniform(0.5, 4)) + 1
+            skill = random.gauss(0.5, 0.12)
+            pvp_wins = sum(1 for _ in range(started) if random.random() < skill)
+            pvp_losses = started - pvp_wins
+            defended = int(started * random.uniform(0.3, 1.5))
+            def_ok = int(defended * min(max(skill, 0.0), 1.0))
+            elo = int(1000 + (pvp_wins - pvp_losses) * 12 + random.gauss(0, 25))
+            alert = now - random.randint(0, 7 * 86_400)
+        else:
+            started = pvp_wins = pvp_losses = defended = def_ok = 0
+            elo, alert = 1000, 0
+
+        shield = now + random.randint(60, SHIELD_SECONDS) if random.random() < SHIELDED_SHARE else 0
+        name = f"grok_{uid}"
+        yield (
+            uid, name, f"Grok {uid}" if random.random() < 0.7 else "", level,
+            base_total + xp_current, xp_current, to_next, LEVEL_CURVE,
+            wins, mobs, int(level * random.uniform(0, 1.5)),
+            empty, empty, 1.0,
+            elo, pvp_wins, pvp_losses, started, defended,
+            def_ok, defended - def_ok, defended,
+            shield, alert, _last_active(now), 0,
+        )
+
+
+def _attacks(count: int, now: int, bands: Dict[int, List[int]], fighters: List[int],
+             level_of: Dict[int, int]) -> Iterator[tuple]:
+    # recommended targets are near the attacker's level (±2)
+    near = {lvl: [l for l in bands if abs(l - lvl) <= 2] for lvl in bands}
+    for _ in range(count):
+        attacker = random.choice(fighters)
+        target_level = random.choice(near[level_of[attacker]])
+        defender = random.choice(bands[target_level])
+        if defender == attacker:
+            continue
+        won = random.random() < 0.55
+        xp_stolen = max(int(random.randint(0, _LEVELS[target_level][0]) * 0.07), 20) if won else 0
+        age = int(random.expovariate(1 / (3 * 86_400)))
+        yield (attacker, defender, now - min(age, 60 * 86_400), xp_stolen,
+               "win" if won else "fail", 1 if random.random() < 0.30 else 0)
+
+
+def _insert(conn: sqlite3.Connection, table: str, columns, rows: Iterator[tuple], total: int, label: str) -> int:
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    done = 0
+    while done < total:
+        chunk = [row for _, row in zip(range(min(CHUNK, total - done)), rows)]
+        if not chunk:
+            break
+        conn.executemany(sql, chunk)
+        done += len(chunk)
+        if total >= 5 * CHUNK:
+            print(f"  {label}: {done:,}/{total:,}", file=sys.stderr)
+    return done
+
+
+def populate(conn: sqlite3.Connection, users: int, attacks_per_user: float = 0.5,
+             seed: int = SEED, first_id: int = 1) -> Dict[str, float]:
+    """Bulk-insert `users` users and their attack history in one transaction."""
+    random.seed(seed)
+    now = int(time.time())
+    attacks = int(users * attacks_per_user)
+    t0 = time.perf_counter()
+
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("BEGIN")
+    try:
+        bands: Dict[int, List[int]] = {}
+        fighters: List[int] = []
+        _insert(conn, "users", USER_COLUMNS, _users(first_id, users, now, bands, fighters), users, "users")
+        if not fighters:
+            attacks = 0
+        if attacks:
+            level_of = {uid: lvl for lvl, ids in bands.items() for uid in ids}
+            rows = _attacks(attacks, now, bands, fighters, level_of)
+            attacks = _insert(conn, "pvp_attack_log", ATTACK_COLUMNS, rows, attacks, "attacks")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("PRAGMA synchronous = FULL")
+        conn.execute("PRAGMA journal_mode = DELETE")
+
+    return {"users": users, "attacks": attacks, "seconds": round(time.perf_counter() - t0, 2)}
+
+
+def open_fixture(path: str) -> sqlite3.Connection:
+    """Fresh SQLite file at `path` carrying bot.db's migrated schema."""
+    if "bot.db" not in sys.modules:
+        # let bot.db build its schema (init_db + migrations) in the fixture itself
+        os.environ["MEGAGROK_DB_PATH"] = os.path.abspath(path)
+    import bot.db as db
+
+    if os.path.abspath(db.DB_PATH) == os.path.abspath(path):
+        db.close_db()
+        conn = sqlite3.connect(path, isolation_level=None)
+    else:
+        conn = sqlite3.connect(path, isolation_level=None)
+        copy_schema(db.conn, conn)
+    return conn
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Generate a synthetic MegaGrok population SQLite file")
+    ap.add_argument("path", help="output .db file")
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--attacks-per-user", type=float, default=0.5)
+    ap.add_argument("--seed", type=int, default=SEED)
+    ap.add_argument("--force", action="store_true", help="overwrite an existing file")
+    args = ap.parse_args(argv)
+
+    if os.path.exists(args.path):
+        if not args.force:
+            ap.error(f"{args.path} exists (use --force to overwrite)")
+        os.remove(args.path)
+    os.makedirs(os.path.dirname(os.path.abspath(args.path)), exist_ok=True)
+
+    conn = open_fixture(args.path)
+    info = populate(conn, args.users, args.attacks_per_user, args.seed)
+    conn.execute("ANALYZE")
+    conn.close()
+    size_mb = os.path.getsize(args.path) / (1024 * 1024)
+    print(f"✔ {args.path}: {info['users']:,} users, {info['attacks']:,} attacks "
+          f"in {info['seconds']:.1f}s ({size_mb:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# benchmarks/run_suite.py
+# Run the benchmark suite, emit JSON, optionally compare against a baseline.
+#
+#   python -m benchmarks.run_suite                          # JSON to stdout
+#   python -m benchmarks.run_suite --out base.json          # save a baseline
+#   python -m benchmarks.run_suite --baseline base.json     # compare, exit 1 on regression
+#   python -m benchmarks.run_suite --quick --only engine,db
+#
+# Every metric is ms per operation (lower is better). A metric regresses
+# when current / baseline > 1 + threshold (default 0.15). Progress and the
+# comparison table go to stderr so stdout stays clean JSON.
+
+import sys
+import json
+import time
+import argparse
+import platform
+from typing import Any, Dict
+
+SUITES = {
+    "engine": "benchmarks.bench_engine",
+    "db": "benchmarks.bench_db",
+    "sessions": "benchmarks.bench_sessions",
+    "render": "benchmarks.bench_render_assets",
+}
+
+
+def _log(*args):
+    print(*args, file=sys.stderr)
+
+
+def run(names, quick: bool) -> Dict[str, Any]:
+    import importlib
+    from benchmarks.common import SEED
+
+    results: Dict[str, float] = {}
+    timings: Dict[str, float] = {}
+    for name in names:
+        _log(f"▶ {name} …")
+        t0 = time.perf_counter()
+        module = importlib.import_module(SUITES[name])
+        results.update({k: round(v, 6) for k, v in module.collect(quick=quick).items()})
+        timings[name] = round(time.perf_counter() - t0, 2)
+        _log(f"✔ {name} done in {timings[name]:.1f}s")
+    return {
+        "meta": {
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "seed": SEED,
+            "quick": quick,
+            "suites": list(names),
+            "suite_seconds": timings,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    cur = current["results"]
+    suites = tuple(f"{n}." for n in current["meta"]["suites"])
+    base = {k: v for k, v in baseline.get("results", {}).items() if k.startswith(suites)}
+    rows = []
+    for name in sorted(set(cur) | set(base)):
+        c, b = cur.get(name), base.get(name)
+        if c is None or b is None:
+            status = "new" if b is None else "missing"
+            rows.append({"metric": name, "current": c, "baseline": b, "ratio": None, "status": status})
+            continue
+        ratio = c / b if b > 0 else 1.0
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({"metric": name, "current": c, "baseline": b, "ratio": round(ratio, 3), "status": status})
+    return {
+        "threshold": threshold,
+        "baseline_meta": baseline.get("meta", {}),
+        "regressions": [r["metric"] for r in rows if r["status"] == "regression"],
+        "rows": rows,
+    }
+
+
+def _print_comparison(cmp: Dict[str, Any]):
+    marks = {"regression": "❌", "improved": "✅", "ok": "  ", "new": "🆕", "missing": "∅ "}
+    _log(f"{'metric':<50}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for r in cmp["rows"]:
+        b = f"{r['baseline']:.4f}" if r["baseline"] is not None else "-"
+        c = f"{r['current']:.4f}" if r["current"] is not None else "-"
+        ratio = f"{r['ratio']:.2f}x" if r["ratio"] is not None else "-"
+        _log(f"{r['metric']:<50}{b:>12}{c:>12}{ratio:>8} {marks[r['status']]}")
+    n = len(cmp["regressions"])
+    _log(f"{n} regression(s) over +{cmp['threshold'] * 100:.0f}%" if n else "no regressions")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="MegaGrok benchmark suite")
+    ap.add_argument("--only", default="", help="comma-separated subset of: " + ",".join(SUITES))
+    ap.add_argument("--quick", action="store_true", help="smaller populations / fewer iterations")
+    ap.add_argument("--out", help="write results JSON here instead of stdout")
+    ap.add_argument("--baseline", help="results JSON from a previous run to compare against")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown ratio (default 0.15)")
+    args = ap.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(SUITES)
+    unknown = [n for n in names if n not in SUITES]
+    if unknown:
+        ap.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    report = run(names, args.quick)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(report, baseline, args.threshold)
+        _print_comparison(report["comparison"])
+        status = 1 if report["comparison"]["regressions"] else 0
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        _log(f"results written to {args.out}")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
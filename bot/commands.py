@@ -63,9 +63,12 @@ def register_handlers(bot: TeleBot):
     )
 
     try:
-        from bot.mobs import MOBS
+        from bot.mobs import get_random_mob
     except Exception:
-        MOBS = {}
+        get_random_mob = lambda tier=None: None
+
+    from bot import media_registry
+    from services.handler_registry import setup_once
 
     # ------------------------------------------------------
     # LOAD SUB-HANDLERS
@@ -74,28 +77,28 @@ def register_handlers(bot: TeleBot):
     # /growmygrok
     try:
         from bot.handlers.growmygrok import setup as grow_setup
-        grow_setup(bot)
+        setup_once(bot, grow_setup)
     except Exception as e:
         print("Failed loading growmygrok handler:", e)
 
     # /battle
     try:
         from bot.handlers.battle import setup as battle_setup
-        battle_setup(bot)
+        setup_once(bot, battle_setup)
     except Exception as e:
         print("Failed loading battle handler:", e)
 
     # /hop
     try:
         from bot.handlers.hop import setup as hop_setup
-        hop_setup(bot)
+        setup_once(bot, hop_setup)
     except Exception as e:
         print("Failed loading hop handler:", e)
 
     # /announce, /announce_html, /announce_preview
     try:
         from bot.handlers.announce import setup as announce_setup
-        announce_setup(bot)
+        setup_once(bot, announce_setup)
     except Exception as e:
         print("Failed loading announce handler:", e)
 
@@ -161,7 +164,7 @@ def register_handlers(bot: TeleBot):
                 return bot.reply_to(message, "⚔️ You already fought today.")
 
             # Pick mob
-            mob = random.choice(list(MOBS.values())) if isinstance(MOBS, dict) else random.choice(MOBS)
+            mob = get_random_mob() or {}
             mob_name = mob.get("name", "Mob")
             intro = mob.get("intro", "")
 
@@ -175,8 +178,7 @@ def register_handlers(bot: TeleBot):
             try:
                 portrait = mob.get("portrait")
                 if portrait and os.path.exists(portrait):
-                    with open(portrait, "rb") as f:
-                        bot.send_photo(message.chat.id, f)
+                    media_registry.send_photo(bot, message.chat.id, portrait)
             except:
                 pass
 
@@ -248,11 +250,11 @@ def register_handlers(bot: TeleBot):
     def _leaderboard(message):
         try:
             users = get_top_users(50)
-            from bot.images import generate_leaderboard_premium
-            img = generate_leaderboard_premium(users)
-
-            with open(img, "rb") as f:
-                bot.send_photo(message.chat.id, f)
+            from services import render_service
+            render_service.send_photo_when_ready(
+                bot, message.chat.id, "leaderboard", users,
+                error_text="❌ Leaderboard failed.",
+            )
 
         except Exception:
             bot.reply_to(
@@ -10,25 +10,213 @@
 # - VIP placeholder (swap for Redis later)
 #
 # IMPORTANT: DB_PATH should be a persistent path on the host/container:
-#            default: /var/data/megagrok.db
+#            default: /var/data/megagrok.db (override with MEGAGROK_DB_PATH,
+#            e.g. a synthetic fixture for load tests)
 
 import sqlite3
 import json
 import time
+import threading
 from typing import Dict, Any, List, Tuple, Optional
 import os
 
 # ---------------------------
 # Config
 # ---------------------------
-DB_PATH = "/var/data/megagrok.db"
+DB_PATH = os.getenv("MEGAGROK_DB_PATH", "/var/data/megagrok.db")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
+# ---------------------------
+# Query timing hook
+# ---------------------------
+# Observers are called as fn(sql, seconds, error) after every statement run
+# through the module cursor (services/metrics.py registers one).
+# Fetch observers get fn(sql, rows) after fetchone/fetchall/fetchmany
+# (services/sql_profiler.py uses it for rows-returned).
+_query_observers = []
+_fetch_observers = []
+
+
+def add_query_observer(fn):
+    if fn not in _query_observers:
+        _query_observers.append(fn)
+
+
+def add_fetch_observer(fn):
+    if fn not in _fetch_observers:
+        _fetch_observers.append(fn)
+
+
+class _ThreadConnection:
+    """
+    One sqlite3 connection per thread on the same database file.
+
+    Update workers run handlers concurrently. With a single shared
+    connection (and cursor) one thread's execute() replaces the rows another
+    is about to fetch, "Recursive use of cursors" is raised, and a commit()
+    from one handler commits another handler's half-finished write, since
+    a transaction belongs to the connection. Per-thread connections give
+    every thread its own cursor state and its own transaction; SQLite's
+    file locking (WAL + busy timeout) arbitrates between them.
+
+    Exposes the sqlite3.Connection methods the codebase uses (cursor,
+    execute, commit, rollback, close), routed to the calling thread's
+    connection.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+
+    def _get(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            self._local.conn = c
+            with self._lock:
+                # short-lived threads (boot pool, webhook requests) come and go:
+                # close connections whose thread has exited
+                for ident, (t, old) in list(self._all.items()):
+                    if not t.is_alive():
+                        del self._all[ident]
+                        try:
+                            old.close()
+                        except Exception:
+                            pass
+                self._all[id(c)] = (threading.current_thread(), c)
+        return c
+
+    def cursor(self) -> sqlite3.Cursor:
+        return self._get().cursor()
+
+    def execute(self, sql, params=()):
+        return self._get().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self._get().executemany(sql, seq)
+
+    def commit(self):
+        self._get().commit()
+
+    def rollback(self):
+        self._get().rollback()
+
+    def close(self):
+        """Close every thread's connection (shutdown)."""
+        with self._lock:
+            conns = [c for _, c in self._all.values()]
+            self._all = {}
+        for c in conns:
+            try:
+                c.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
+class _TimedCursor:
+    """
+    Proxy over the module cursor that times execute()/executemany().
+
+    Resolves to a cursor on the calling thread's connection, so
+    `cursor.execute(...)` followed by `cursor.fetchall()` always reads the
+    rows of the same thread's statement.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._local = threading.local()
+
+    @property
+    def _cur(self) -> sqlite3.Cursor:
+        cur = getattr(self._local, "cur", None)
+        if cur is None or cur.connection is not self._conn_for_thread():
+            cur = self._local.cur = self._conn.cursor()
+        return cur
+
+    def _conn_for_thread(self):
+        get = getattr(self._conn, "_get", None)
+        return get() if get is not None else self._conn
+
+    @property
+    def _last_sql(self) -> str:
+        return getattr(self._local, "sql", "")
+
+    def _run(self, method, sql, params):
+        self._local.sql = sql
+        if not _query_observers:
+            method(sql, params)
+            return self
+        t0 = time.perf_counter()
+        err = None
+        try:
+            method(sql, params)
+        except Exception as e:
+            err = e
+            raise
+        finally:
+            dt = time.perf_counter() - t0
+            for fn in _query_observers:
+                try:
+                    fn(sql, dt, err)
+                except Exception:
+                    pass
+        return self
+
+    def _fetched(self, rows: int):
+        for fn in _fetch_observers:
+            try:
+                fn(self._last_sql, rows)
+            except Exception:
+                pass
+
+    def execute(self, sql, params=()):
+        return self._run(self._cur.execute, sql, params)
+
+    def executemany(self, sql, seq):
+        return self._run(self._cur.executemany, sql, seq)
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        if _fetch_observers:
+            self._fetched(0 if row is None else 1)
+        return row
+
+    def fetchall(self):
+        rows = self._cur.fetchall()
+        if _fetch_observers:
+            self._fetched(len(rows))
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = self._cur.fetchmany(size) if size is not None else self._cur.fetchmany()
+        if _fetch_observers:
+            self._fetched(len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
 # ---------------------------
 # DB CONNECTION
 # ---------------------------
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-cursor = conn.cursor()
+conn = _ThreadConnection(DB_PATH)
+cursor = _TimedCursor(conn)
+try:
+    # readers don't block the writer across worker connections
+    conn.execute("PRAGMA journal_mode=WAL")
+except sqlite3.DatabaseError as e:
+    print("⚠ [DB] WAL mode unavailable:", e)
 
 # ---------------------------
 # CREATE TABLES IF THEY DO NOT EXIST
@@ -511,6 +699,24 @@ def get_all_users() -> List[Dict[str, Any]]:
     return out
 
 
+def count_users() -> int:
+    cursor.execute("SELECT COUNT(*) FROM users")
+    return int(cursor.fetchone()[0])
+
+
+def get_user_ids_after(after_id: int, limit: int = 100) -> List[int]:
+    """
+    Next `limit` user_ids greater than after_id, ascending.
+    Keyset pagination used by services/broadcast.py to walk all users
+    with a persisted cursor.
+    """
+    cursor.execute(
+        "SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?",
+        (after_id, limit)
+    )
+    return [int(r[0]) for r in cursor.fetchall()]
+
+
 # ---------------------------
 # VIP placeholder helper
 # ---------------------------
@@ -532,14 +738,14 @@ def is_vip(user_id: int) -> bool:
 def close_db():
     try:
         conn.commit()
-        conn.close()
+        conn.close()  # every thread's connection
     except Exception:
         pass
 
 def reopen_db():
     global conn, cursor
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    cursor = conn.cursor()
+    conn = _ThreadConnection(DB_PATH)
+    cursor = _TimedCursor(conn)
 # ---------------------------
 # PvP Revenge Cleanup Helpers
 # ---------------------------
@@ -9,7 +9,8 @@
 #
 # Import path stays:  import bot.evolutions as evolutions
 
-from typing import Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
 
 # ============================================================
 # EVOLUTION TIERS — FINAL 7-TIER SYSTEM
@@ -89,6 +90,36 @@ EVOLUTION_TIERS: Dict[int, Dict] = {
 }
 
 
+# ============================================================
+# PRECOMPUTED LOOKUP TABLES
+# ============================================================
+# Levels are dense small ints, so stage lookup is a flat tuple index.
+# Anything above MAX_LEVEL clamps to the top stage.
+
+MAX_LEVEL = 200
+
+
+def _build_tables():
+    records = {
+        stage: MappingProxyType(dict(data))
+        for stage, data in EVOLUTION_TIERS.items()
+    }
+
+    ladder = sorted(EVOLUTION_TIERS.items(), key=lambda kv: kv[1]["min_level"])
+    by_level = []
+    for level in range(MAX_LEVEL + 1):
+        best = ladder[0][0]
+        for stage, data in ladder:
+            if level >= data["min_level"]:
+                best = stage
+        by_level.append(best)
+
+    return MappingProxyType(records), tuple(by_level), ladder[-1][0]
+
+
+_STAGE_RECORDS, _STAGE_BY_LEVEL, _TOP_STAGE = _build_tables()
+
+
 # ============================================================
 # CORE LOOKUP FUNCTIONS
 # ============================================================
@@ -98,22 +129,28 @@ def get_stage_for_level(level: int) -> int:
     Return the highest evolution stage whose min_level <= level.
     Guaranteed to return a valid stage index (0–6).
     """
-    best = 0
-    for stage, data in EVOLUTION_TIERS.items():
-        if level >= data["min_level"] and data["min_level"] >= EVOLUTION_TIERS[best]["min_level"]:
-            best = stage
-    return best
+    try:
+        level = int(level)
+    except (TypeError, ValueError):
+        level = 0
+    if level > MAX_LEVEL:
+        return _TOP_STAGE
+    return _STAGE_BY_LEVEL[max(0, level)]
+
+
+def get_stage_record(stage: int) -> Mapping:
+    """Read-only stage record (shared, never copied)."""
+    return _STAGE_RECORDS.get(stage, _STAGE_RECORDS[0])
 
 
 def get_stage_data(stage: int) -> Dict:
     """Safe accessor — always returns a copy."""
-    return EVOLUTION_TIERS.get(stage, EVOLUTION_TIERS[0]).copy()
+    return dict(get_stage_record(stage))
 
 
-def get_evolution_for_level(level: int) -> Dict:
-    """Return full evolution data for the given level."""
-    stage = get_stage_for_level(level)
-    return get_stage_data(stage)
+def get_evolution_for_level(level: int) -> Mapping:
+    """Return full (read-only) evolution data for the given level."""
+    return _STAGE_RECORDS[get_stage_for_level(level)]
 
 
 # ============================================================
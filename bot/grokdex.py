@@ -1,7 +1,7 @@
 # bot/grokdex.py
 # Unified GrokDex powered by the 25-mob master database.
 
-from bot.mobs import MOBS, TIERS
+from bot.mobs import TIERS, get_mob, list_mobs_by_tier
 
 def get_grokdex_list():
     """
@@ -12,19 +12,8 @@ def get_grokdex_list():
         ...
     }
     """
-    grouped = {tier: [] for tier in TIERS.keys()}
-    for mob_key, mob in MOBS.items():
-        tier = mob.get("tier", 1)
-        grouped[tier].append(mob)
-    return grouped
+    return {tier: list_mobs_by_tier(tier) for tier in TIERS.keys()}
 
 def search_mob(name: str):
     """Case-insensitive lookup by mob name or key."""
-    if not name:
-        return None
-    name = name.strip().lower()
-
-    for key, mob in MOBS.items():
-        if key.lower() == name or mob["name"].lower() == name:
-            return mob
-    return None
+    return get_mob(name)
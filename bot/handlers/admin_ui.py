@@ -1,5 +1,6 @@
 from telebot import TeleBot, types
 from services.permissions import is_megacrew, is_admin
+from services import callback_router
 import bot.db as db
 import time
 import os
@@ -94,7 +95,7 @@ def setup(bot: TeleBot):
     # -------------------------------------------------
     # CALLBACK ROUTER
     # -------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("ui_"))
+    @callback_router.route(bot, "ui_")
     def ui_router(call):
         uid = call.from_user.id
         chat_id = call.message.chat.id
@@ -15,7 +15,8 @@ from bot.db import (
 from bot.handlers.xphub import render_hub
 from bot.handlers.leaderboard_ui import show_leaderboard_ui
 from bot.handlers.pvp import render_pvp_main
-from bot.profile_card import generate_profile_card
+from services import render_service
+from services import callback_router
 from bot.evolutions import get_evolution_for_level
 
 from bot.ui.world_status import get_world_status, get_since_you_were_gone
@@ -39,7 +40,7 @@ def setup(bot: TeleBot):
     # ----------------------------
     # Navigation callbacks
     # ----------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith(NAV_PREFIX))
+    @callback_router.route(bot, NAV_PREFIX)
     def nav_cb(call):
         action = call.data.split(":", 1)[1]
         chat_id = call.message.chat.id
@@ -257,12 +258,11 @@ def send_profile(bot, chat_id, uid):
         "evolution_multiplier": user.get("evolution_multiplier", 1.0),
     }
 
-    try:
-        path = generate_profile_card(data)
-        with open(path, "rb") as img:
-            bot.send_photo(chat_id, img)
-    except Exception:
-        bot.send_message(chat_id, "❌ Failed to generate profile card.")
+    # rendered in the worker pool; photo is sent from the completion callback
+    render_service.send_photo_when_ready(
+        bot, chat_id, "profile_card", data,
+        error_text="❌ Failed to generate profile card.",
+    )
 
 
 # -------------------------------------------------
@@ -30,6 +30,9 @@ from services.fight_session_battle import (
 
 import bot.db as db
 import bot.mobs as mobs
+from bot import media_registry
+from services import edit_coalescer
+from services import callback_router
 
 # ============================================================
 # Helpers
@@ -44,20 +47,21 @@ def _hp_bar(cur: int, maxhp: int, width: int = 22) -> str:
     return "▓" * full + "░" * (width - full)
 
 def _safe_edit(bot: TeleBot, chat_id: int, msg_id: Optional[int], text: str, kb: Optional[types.InlineKeyboardMarkup]):
-    """Safe wrapper around edit_message_text with fallback to send_message."""
-    try:
-        if msg_id:
-            bot.edit_message_text(text, chat_id, msg_id, reply_markup=kb, parse_mode="Markdown")
-        else:
-            bot.send_message(chat_id, text, reply_markup=kb, parse_mode="Markdown")
-    except Exception as e:
-        if "message is not modified" in str(e).lower():
-            return
+    """
+    Coalesced edit (deduped + rate-limited per message via
+    services.edit_coalescer) with fallback to send_message.
+    """
+    def _fallback(_err=None):
         try:
             bot.send_message(chat_id, text, reply_markup=kb, parse_mode="Markdown")
         except Exception:
             pass
 
+    if not msg_id:
+        return _fallback()
+    edit_coalescer.edit(bot, chat_id, msg_id, text, reply_markup=kb,
+                        parse_mode="Markdown", on_error=_fallback)
+
 def _progress_line(user: dict) -> str:
     """Level + XP progress bar (matches /growmygrok style)."""
     level = user.get("level", 1)
@@ -154,7 +158,7 @@ def setup(bot: TeleBot):
     # ========================================================
     # TIER SELECTION
     # ========================================================
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("battle:choose_tier"))
+    @callback_router.route(bot, "battle:choose_tier")
     def cb_choose_tier(call):
         try:
             _, _, tier_str = call.data.split(":")
@@ -198,7 +202,7 @@ def setup(bot: TeleBot):
     # ========================================================
     # ACTION HANDLER — attack/block/etc
     # ========================================================
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("battle:act"))
+    @callback_router.route(bot, "battle:act")
     def cb_action(call):
         _, _, action, sid = call.data.split(":")
 
@@ -392,22 +396,20 @@ def start_battle_from_ui(
     image_path = f"assets/mobs/tier_{tier}/{mob_name}.png"
 
     try:
-        with open(image_path, "rb") as img:
-            bot.edit_message_media(
-                media=types.InputMediaPhoto(
-                    img,
-                    caption=caption,
-                    parse_mode="Markdown"
-                    ),
-                chat_id=chat_id,
-                message_id=msg_id,                
-            )
-            # IMPORTANT: re-attach keyboard in a second call
-            bot.edit_message_reply_markup(
-                chat_id=chat_id,
-                message_id=msg_id,
-                reply_markup=kb
-            )
+        media_registry.edit_photo(
+            bot,
+            chat_id,
+            msg_id,
+            image_path,
+            caption=caption,
+            parse_mode="Markdown"
+        )
+        # IMPORTANT: re-attach keyboard in a second call
+        bot.edit_message_reply_markup(
+            chat_id=chat_id,
+            message_id=msg_id,
+            reply_markup=kb
+        )
             
     except Exception:
         # Fallback if image missing
@@ -520,6 +522,7 @@ def _finalize_single_message(bot: TeleBot, sess: BattleSession, chat_id: int):
         msg_id = sess._last_msg["msg"] if sess._last_msg else None
         chat = sess._last_msg["chat"] if sess._last_msg else chat_id
         if msg_id:
+            edit_coalescer.discard(chat, msg_id)
             bot.edit_message_text(final_text, chat, msg_id, parse_mode="Markdown")
         else:
             bot.send_message(chat, final_text, parse_mode="Markdown")
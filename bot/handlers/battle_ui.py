@@ -5,6 +5,7 @@
 # =========================================================
 
 from telebot import TeleBot, types
+from services import callback_router
 from bot.handlers.battle import start_battle_from_ui
 
 BATTLE_UI_PREFIX = "__battle_ui__"
@@ -43,7 +44,7 @@ def setup(bot: TeleBot):
     # -----------------------------------------------------
     # Open Battle UI
     # -----------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data == f"{BATTLE_UI_PREFIX}:home")
+    @callback_router.route(bot, f"{BATTLE_UI_PREFIX}:home", exact=True)
     def battle_home(call):
         text, kb = render_battle_home()
         bot.edit_message_text(
@@ -58,7 +59,7 @@ def setup(bot: TeleBot):
     # -----------------------------------------------------
     # Tier selected → start battle (random mob)
     # -----------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith(f"{BATTLE_UI_PREFIX}:tier:"))
+    @callback_router.route(bot, f"{BATTLE_UI_PREFIX}:tier:")
     def battle_start(call):
         try:
             tier = int(call.data.split(":")[-1])
@@ -3,6 +3,7 @@
 
 import time
 from telebot import TeleBot, types
+from services import callback_router
 
 import bot.db as db
 
@@ -129,7 +130,7 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # Send challenge
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("challenge:send:"))
+    @callback_router.route(bot, "challenge:send:")
     def send_challenge(call):
         tick()
 
@@ -168,7 +169,7 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # Accept / Decline
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("challenge:accept:"))
+    @callback_router.route(bot, "challenge:accept:")
     def accept_cb(call):
         tick()
         db.touch_last_active(call.from_user.id)
@@ -190,7 +191,7 @@ def setup(bot: TeleBot):
             parse_mode="HTML",
         )
 
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("challenge:decline:"))
+    @callback_router.route(bot, "challenge:decline:")
     def decline_cb(call):
         tick()
         db.touch_last_active(call.from_user.id)
@@ -201,7 +202,7 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # Actions
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data == "challenge:attack")
+    @callback_router.route(bot, "challenge:attack", exact=True)
     def attack_cb(call):
         tick()
         uid = call.from_user.id
@@ -220,7 +221,7 @@ def setup(bot: TeleBot):
 
         _send_next_turn(bot, session)
 
-    @bot.callback_query_handler(func=lambda c: c.data == "challenge:defend")
+    @callback_router.route(bot, "challenge:defend", exact=True)
     def defend_cb(call):
         tick()
         uid = call.from_user.id
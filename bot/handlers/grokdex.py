@@ -5,9 +5,11 @@ import os
 import urllib.parse
 from telebot import types
 from telebot import TeleBot
+from services import callback_router
 
-from bot.mobs import MOBS, TIERS
-from bot.grokdex import get_grokdex_list, search_mob
+from bot.mobs import MOBS, TIERS, get_mob_key, list_mobs_by_tier
+from bot.grokdex import search_mob
+from bot import media_registry
 
 TITLE = "📘 *MEGAGROK DEX — Choose a Creature Tier*"
 MOB_IMAGE_FOLDER = "assets/mobs"
@@ -53,17 +55,11 @@ def _kb_mobs_for_tier(tier):
     except:
         return types.InlineKeyboardMarkup()
 
-    dex = get_grokdex_list()
-    mobs = dex.get(tier, [])
+    mobs = list_mobs_by_tier(tier)
 
     btns = []
     for mob in mobs:
-        mob_key = None
-        for k, v in MOBS.items():
-            if v["name"].lower() == mob["name"].lower():
-                mob_key = k
-                break
-
+        mob_key = get_mob_key(mob["name"])
         if not mob_key:
             continue
 
@@ -109,7 +105,7 @@ def setup(bot: TeleBot):
     # CALLBACK ROUTING
     # ---------------------------------------------------------
 
-    @bot.callback_query_handler(func=lambda c: c.data and c.data.startswith("grokdex:"))
+    @callback_router.route(bot, "grokdex:")
     def grokdex_callback(call: types.CallbackQuery):
 
         data = call.data
@@ -129,7 +125,7 @@ def setup(bot: TeleBot):
             except:
                 pass
 
-            mobs = get_grokdex_list().get(tier, [])
+            mobs = list_mobs_by_tier(tier)
 
             text = f"🟩 *Tier {tier} — {TIERS.get(tier, '?')}*\n\n"
             for mob in mobs:
@@ -177,14 +173,14 @@ def setup(bot: TeleBot):
 
             # Send media fresh (much safer than editing)
             try:
-                with open(portrait, "rb") as f:
-                    bot.send_photo(
-                        chat_id,
-                        f,
-                        caption=caption,
-                        parse_mode="Markdown",
-                        reply_markup=_kb_back_from_mob(tier)
-                    )
+                media_registry.send_photo(
+                    bot,
+                    chat_id,
+                    portrait,
+                    caption=caption,
+                    parse_mode="Markdown",
+                    reply_markup=_kb_back_from_mob(tier)
+                )
                 bot.answer_callback_query(call.id)
                 return
             except:
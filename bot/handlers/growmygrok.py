@@ -5,6 +5,7 @@ import os
 import time
 import random
 from telebot import TeleBot, types
+from services import callback_router
 
 from bot.db import (
     get_user,
@@ -216,7 +217,7 @@ def setup(bot: TeleBot):
     def grow_cmd(message):
         show_grow_ui(bot, message.chat.id)
 
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("grow:"))
+    @callback_router.route(bot, "grow:")
     def grow_cb(call):
         uid = call.from_user.id
         chat_id = call.message.chat.id
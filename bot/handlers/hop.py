@@ -6,6 +6,7 @@
 import time
 import random
 from telebot import TeleBot, types
+from services import callback_router
 
 import bot.db as db
 
@@ -158,7 +159,7 @@ def setup(bot: TeleBot):
     # ----------------------------
     # HOP CALLBACKS (NAMESPACED)
     # ----------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith(HOP_PREFIX))
+    @callback_router.route(bot, HOP_PREFIX)
     def hop_cb(call):
         bot.answer_callback_query(call.id)
 
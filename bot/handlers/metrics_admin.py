@@ -0,0 +1,48 @@
+import html
+from telebot import TeleBot
+from services import metrics
+from services import sql_profiler
+from services.permissions import is_admin
+
+
+def _fmt_rows(rows) -> str:
+    if not rows:
+        return "  (no data yet)"
+    out = []
+    for label, count, avg_ms, p95_ms, errors in rows:
+        err = f" ❌{errors}" if errors else ""
+        out.append(f"  {label[:28]:<28} n={count:<6} avg={avg_ms:7.1f}ms p95≤{p95_ms:6.0f}ms{err}")
+    return "\n".join(out)
+
+
+def setup(bot: TeleBot):
+
+    @bot.message_handler(commands=["metrics"])
+    def show_metrics(message):
+        if not is_admin(message.from_user.id):
+            bot.reply_to(message, "⛔ Admin only.")
+            return
+
+        s = metrics.summary()
+        text = (
+            "📈 <b>Bot Metrics</b> (slowest first)\n\n"
+            "<b>Handlers</b>\n<pre>" + _fmt_rows(s["handlers"]) + "</pre>\n"
+            "<b>DB queries</b>\n<pre>" + _fmt_rows(s["db"]) + "</pre>\n"
+            "<b>Telegram API</b>\n<pre>" + _fmt_rows(s["api"]) + "</pre>"
+        )
+        bot.send_message(message.chat.id, text, parse_mode="HTML")
+
+    @bot.message_handler(commands=["sqlprofile"])
+    def show_sql_profile(message):
+        if not is_admin(message.from_user.id):
+            bot.reply_to(message, "⛔ Admin only.")
+            return
+
+        parts = message.text.split()
+        if len(parts) > 1 and parts[1] == "reset":
+            sql_profiler.reset()
+            bot.reply_to(message, "🧹 SQL profile reset.")
+            return
+
+        text = sql_profiler.report(top=12)
+        bot.send_message(message.chat.id, "<pre>" + html.escape(text[:3900]) + "</pre>", parse_mode="HTML")
@@ -1,16 +1,21 @@
-import time
 from telebot import TeleBot, types
 import bot.db as db
+from services import broadcast
 from services.permissions import is_admin, is_megacrew
-from services.audit_log import log_admin_action
+from services import callback_router
 
-RATE_DELAY = 0.05  # ~20 msgs/sec
 DRAFTS = {}
 PENDING_CONFIRM = {}
 
 
 def setup(bot: TeleBot):
 
+    # pick up broadcasts interrupted by a restart
+    try:
+        broadcast.resume_pending(bot)
+    except Exception as e:
+        print("⚠ [NOTIFYUSERS] resume failed:", e)
+
     # -------------------------------------------------
     # /notifyusers — preview
     # -------------------------------------------------
@@ -61,7 +66,7 @@ def setup(bot: TeleBot):
     # -------------------------------------------------
     # Callbacks
     # -------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("notifyusers_"))
+    @callback_router.route(bot, "notifyusers_")
     def handle_notifyusers(call):
         uid = call.from_user.id
 
@@ -69,6 +74,15 @@ def setup(bot: TeleBot):
             bot.answer_callback_query(call.id, "Access denied.")
             return
 
+        # ⏹ STOP a running broadcast (no draft needed)
+        if call.data.startswith("notifyusers_stop:"):
+            job_id = call.data.split(":", 1)[1]
+            if broadcast.cancel(job_id):
+                bot.answer_callback_query(call.id, "Stopping broadcast…")
+            else:
+                bot.answer_callback_query(call.id, "Broadcast already finished.")
+            return
+
         html = DRAFTS.get(uid)
         if not html:
             bot.answer_callback_query(call.id, "No draft found.")
@@ -97,8 +111,8 @@ def setup(bot: TeleBot):
 
         # 📊 REVIEW RECIPIENTS
         if call.data == "notifyusers_review":
-            users = db.get_all_users()
-            total = len(users)
+            total = db.count_users()
+            blocked = broadcast.blocked_count()
 
             kb = types.InlineKeyboardMarkup()
             kb.add(
@@ -117,6 +131,7 @@ def setup(bot: TeleBot):
             bot.edit_message_text(
                 "📊 <b>Recipient Summary</b>\n\n"
                 f"• Users in database: <b>{total}</b>\n"
+                f"• Skipped (blocked the bot): <b>{blocked}</b>\n"
                 "• Delivery method: <b>Direct Message</b>\n"
                 "• Triggers real Telegram notifications\n\n"
                 "🚨 <b>This action cannot be undone.</b>",
@@ -133,35 +148,14 @@ def setup(bot: TeleBot):
                 bot.answer_callback_query(call.id, "Confirmation required.")
                 return
 
-            sent = 0
-            failed = 0
-            users = db.get_all_users()
-
-            for u in users:
-                user_id = u.get("id")
-                if not user_id:
-                    continue
-
-                try:
-                    bot.send_message(user_id, html, parse_mode="HTML")
-                    sent += 1
-                    time.sleep(RATE_DELAY)
-                except Exception:
-                    failed += 1
-
-            log_admin_action(
+            # runs in the background; the status message becomes the live
+            # progress display (cursor is persisted, survives restarts)
+            broadcast.start(
+                bot,
                 uid,
-                "notify_users_html",
-                {"sent": sent, "failed": failed}
-            )
-
-            bot.edit_message_text(
-                f"✅ <b>User notification sent</b>\n\n"
-                f"Delivered: <b>{sent}</b>\n"
-                f"Failed: <b>{failed}</b>",
+                html,
                 call.message.chat.id,
-                call.message.message_id,
-                parse_mode="HTML"
+                call.message.message_id
             )
 
             DRAFTS.pop(uid, None)
@@ -1,20 +1,21 @@
 from telebot import TeleBot
 import bot.db as db
 import os
-import time
+from services import outbound
 from services.permissions import is_admin, is_megacrew
 from services.audit_log import log_admin_action
+from services import callback_router
 
 GROUP_ID = int(os.getenv("LEADERBOARD_CHANNEL_ID", "0"))
 
 # How many @mentions per message
 CHUNK_SIZE = 20
-DELAY = 1.0  # seconds between messages
+# pacing is done by services.outbound (group bucket: 20 msg/min)
 
 
 def setup(bot: TeleBot):
 
-    @bot.callback_query_handler(func=lambda c: c.data == "pinggroup_send")
+    @callback_router.route(bot, "pinggroup_send", exact=True)
     def send_ping(call):
         uid = call.from_user.id
 
@@ -38,10 +39,10 @@ def setup(bot: TeleBot):
 
         for chunk in chunks:
             text = "🚨 <b>IMPORTANT</b>\n\n" + " ".join(chunk)
-            bot.send_message(GROUP_ID, text, parse_mode="HTML")
+            outbound.send_message(bot, GROUP_ID, text, parse_mode="HTML",
+                                  priority=outbound.BROADCAST)
             sent_messages += 1
             mentioned_users += len(chunk)
-            time.sleep(DELAY)
 
         log_admin_action(
             uid,
@@ -52,4 +53,4 @@ def setup(bot: TeleBot):
             }
         )
 
-        bot.answer_callback_query(call.id, "✅ Group ping sent.")
+        bot.answer_callback_query(call.id, "✅ Group ping queued.")
@@ -9,6 +9,8 @@ from telebot import TeleBot, types
 from services import pvp_targets
 from services import pvp_stats
 from services import fight_session_pvp as fight_session
+from services import edit_coalescer
+from services import callback_router
 
 import bot.db as db
 from bot.handlers import pvp_ranking as ranking_module
@@ -18,7 +20,6 @@ from bot.handlers import pvp_ranking as ranking_module
 # -------------------------
 BROWSE_PAGE_SIZE = 5
 PVP_SHIELD_SECONDS = 3 * 3600
-UI_EDIT_THROTTLE_SECONDS = 1.0
 PVP_ELO_K = 32
 
 
@@ -324,7 +325,7 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # MENU: MAIN / HELP / STATS / BROWSE / RECOMMENDED / REVENGE
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("pvp:menu"))
+    @callback_router.route(bot, "pvp:menu")
     def cb_menu(call):
         parts = call.data.split(":")
         _, _, menu_type, *rest = parts
@@ -500,7 +501,7 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # HELP SUBMENU HANDLER
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("pvp:help"))
+    @callback_router.route(bot, "pvp:help")
     def cb_help(call):
         parts = call.data.split(":")
         _, _, topic, user_id = parts
@@ -545,7 +546,7 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # STATS SUBMENU HANDLER
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("pvp:stats"))
+    @callback_router.route(bot, "pvp:stats")
     def cb_stats(call):
         parts = call.data.split(":")
         _, _, sub, user_id = parts
@@ -622,7 +623,8 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # START DUEL
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("pvp:rec") or c.data.startswith("pvp:rev"))
+    @callback_router.route(bot, "pvp:rec")
+    @callback_router.route(bot, "pvp:rev")
     def cb_start(call):
         parts = call.data.split(":")
         typ = parts[1]
@@ -671,7 +673,7 @@ def setup(bot: TeleBot):
     # ---------------------------------------------------------------
     # ACTION HANDLER
     # ---------------------------------------------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("pvp:act"))
+    @callback_router.route(bot, "pvp:act")
     def cb_action(call):
         try:
             _, _, action, token = call.data.split(":")
@@ -707,6 +709,7 @@ def setup(bot: TeleBot):
 
             send_result_card(bot, sess, summ)
 
+            edit_coalescer.discard(chat_id, msg_id)
             try:
                 bot.delete_message(chat_id, msg_id)
             except:
@@ -729,6 +732,7 @@ def setup(bot: TeleBot):
 
             send_result_card(bot, sess, summ)
 
+            edit_coalescer.discard(chat_id, msg_id)
             try:
                 bot.delete_message(chat_id, msg_id)
             except:
@@ -737,29 +741,18 @@ def setup(bot: TeleBot):
             fight_session.manager.end_session_by_sid(sess.session_id)
             return bot.answer_callback_query(call.id)
 
-        # UI UPDATE
-        now = time.time()
-        if now - sess._last_ui_edit >= UI_EDIT_THROTTLE_SECONDS:
+        # UI UPDATE (coalesced: latest state wins, max 1 edit/s per message)
+        caption = build_caption(sess)
+        kb = action_keyboard(sess)
+
+        def _fallback(_err):
             try:
-                bot.edit_message_text(
-                    build_caption(sess),
-                    chat_id,
-                    msg_id,
-                    parse_mode="Markdown",
-                    reply_markup=action_keyboard(sess),
-                )
-                sess._last_ui_edit = now
-                fight_session.manager.save_session(sess)
+                bot.send_message(chat_id, caption, parse_mode="Markdown", reply_markup=kb)
             except:
-                try:
-                    bot.send_message(
-                        chat_id,
-                        build_caption(sess),
-                        parse_mode="Markdown",
-                        reply_markup=action_keyboard(sess),
-                    )
-                except:
-                    pass
+                pass
+
+        edit_coalescer.edit(bot, chat_id, msg_id, caption, reply_markup=kb,
+                            parse_mode="Markdown", on_error=_fallback)
 
         return bot.answer_callback_query(call.id)
 
@@ -2,6 +2,7 @@
 # MegaGrok PvP Tutorial — Paginated Version (SAFE + SELF-CONTAINED)
 
 from telebot import TeleBot, types
+from services import callback_router
 
 # ----------------------------------------
 # TUTORIAL STEPS (edit freely)
@@ -164,7 +165,7 @@ def setup(bot: TeleBot):
         show_tutorial_for_user(bot, message.chat.id, 0)
 
     # Pagination handler
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("pvp_tutorial:step"))
+    @callback_router.route(bot, "pvp_tutorial:step")
     def cb_step(call):
         _, _, step_str = call.data.split(":")
         step = int(step_str)
@@ -182,7 +183,7 @@ def setup(bot: TeleBot):
         bot.answer_callback_query(call.id)
 
     # Exit handler
-    @bot.callback_query_handler(func=lambda c: c.data == "pvp_tutorial:exit")
+    @callback_router.route(bot, "pvp_tutorial:exit", exact=True)
     def cb_exit(call):
         bot.edit_message_text(
             "📘 *Exited the PvP Tutorial.*",
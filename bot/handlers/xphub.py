@@ -11,7 +11,8 @@ from bot.handlers.evolution_ui import show_evolution_ui
 from bot.handlers.stats_ui import show_stats_ui
 from bot.handlers.leaderboard_ui import show_leaderboard_ui
 
-from bot.profile_card import generate_profile_card
+from services import render_service
+from services import callback_router
 
 
 XP_PREFIX = "__xphub__:"
@@ -35,7 +36,7 @@ def setup(bot: TeleBot):
     # ----------------------------
     # XP Hub callbacks
     # ----------------------------
-    @bot.callback_query_handler(func=lambda c: c.data.startswith(XP_PREFIX))
+    @callback_router.route(bot, XP_PREFIX)
     def hub_cb(call):
         # Required by Telegram
         #bot.answer_callback_query(call.id)
@@ -123,12 +124,11 @@ def _send_profile(bot: TeleBot, chat_id: int, uid: int):
         "evolution_multiplier": user.get("evolution_multiplier", 1.0),
     }
 
-    try:
-        path = generate_profile_card(data)
-        with open(path, "rb") as img:
-            bot.send_photo(chat_id, img)
-    except Exception as e:
-        bot.send_message(chat_id, "❌ Failed to generate profile card.")
+    # rendered in the worker pool; photo is sent from the completion callback
+    render_service.send_photo_when_ready(
+        bot, chat_id, "profile_card", data,
+        error_text="❌ Failed to generate profile card.",
+    )
 
 
 # ----------------------------
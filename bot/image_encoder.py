@@ -0,0 +1,175 @@
+# bot/image_encoder.py
+# Output encoder for all Pillow renderers (leaderboard, profile image, card).
+#
+# Picks format / quality / chroma subsampling against a byte budget:
+#   1. max quality, 4:4:4 chroma (crisp outlined text)
+#   2. over budget → 4:2:0 chroma
+#   3. still over → binary search quality down to RENDER_MIN_QUALITY
+# The first candidate that fits wins; if nothing fits, the smallest one.
+#
+# Config (env):
+#   RENDER_FORMAT        jpeg | webp | png      (default jpeg)
+#   RENDER_QUALITY       max quality            (default 90)
+#   RENDER_MIN_QUALITY   quality floor          (default 60)
+#   RENDER_BYTE_BUDGET   bytes, 0 = unlimited   (default 400000)
+#   RENDER_ENCODE_LOG    1 → print one line per encode
+#
+# take_stats() hands over (and resets) the per-kind count / bytes / encode ms
+# recorded in this process; render workers return it with each job so the
+# parent can export it (services/metrics.py).
+
+import io
+import os
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+RENDER_FORMAT = os.getenv("RENDER_FORMAT", "jpeg").lower()
+RENDER_QUALITY = int(os.getenv("RENDER_QUALITY", "90"))
+RENDER_MIN_QUALITY = int(os.getenv("RENDER_MIN_QUALITY", "60"))
+RENDER_BYTE_BUDGET = int(os.getenv("RENDER_BYTE_BUDGET", "400000"))
+RENDER_ENCODE_LOG = os.getenv("RENDER_ENCODE_LOG", "0") == "1"
+
+_FORMATS = {
+    "jpeg": ("JPEG", "jpg"),
+    "jpg": ("JPEG", "jpg"),
+    "webp": ("WEBP", "webp"),
+    "png": ("PNG", "png"),
+}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+# -------------------------------------------------
+# Config helpers
+# -------------------------------------------------
+def _resolve(fmt: Optional[str]) -> Tuple[str, str]:
+    return _FORMATS.get((fmt or RENDER_FORMAT).lower(), _FORMATS["jpeg"])
+
+
+def extension(fmt: Optional[str] = None) -> str:
+    return _resolve(fmt)[1]
+
+
+def config_tag(fmt: Optional[str] = None, budget: Optional[int] = None) -> str:
+    """Short string identifying the encoder settings (part of render cache keys)."""
+    pil_fmt, _ = _resolve(fmt)
+    b = RENDER_BYTE_BUDGET if budget is None else budget
+    return f"{pil_fmt.lower()}-q{RENDER_QUALITY}-{RENDER_MIN_QUALITY}-b{b}"
+
+
+# -------------------------------------------------
+# Encoding
+# -------------------------------------------------
+def _encode_once(img, pil_fmt: str, quality: int, subsampling: int) -> bytes:
+    buf = io.BytesIO()
+    if pil_fmt == "JPEG":
+        img.save(buf, "JPEG", quality=quality, subsampling=subsampling,
+                 optimize=True, progressive=True)
+    elif pil_fmt == "WEBP":
+        img.save(buf, "WEBP", quality=quality, method=4)
+    else:
+        img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def encode(img, fmt: Optional[str] = None, budget: Optional[int] = None,
+           kind: str = "image") -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Encode a PIL image. Returns (data, info) where info has
+    format / quality / subsampling / bytes / ms.
+    """
+    pil_fmt, _ = _resolve(fmt)
+    budget = RENDER_BYTE_BUDGET if budget is None else budget
+    if pil_fmt in ("JPEG", "WEBP") and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    t0 = time.perf_counter()
+    q_hi = max(1, min(100, RENDER_QUALITY))
+    q_lo = max(1, min(q_hi, RENDER_MIN_QUALITY))
+
+    if pil_fmt == "PNG":
+        data, quality, sub = _encode_once(img, pil_fmt, q_hi, 0), None, None
+    else:
+        # 0 = 4:4:4, 2 = 4:2:0 (Pillow subsampling codes; WebP ignores it)
+        subs = (0, 2) if pil_fmt == "JPEG" else (2,)
+        best = None
+        for sub in subs:
+            data = _encode_once(img, pil_fmt, q_hi, sub)
+            cand = (data, q_hi, sub)
+            if best is None or len(data) < len(best[0]):
+                best = cand
+            if not budget or len(data) <= budget:
+                best = cand
+                break
+        else:
+            # binary search the highest quality that fits (4:2:0 / webp)
+            sub = subs[-1]
+            lo, hi = q_lo, q_hi - 1
+            fit = None
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                data = _encode_once(img, pil_fmt, mid, sub)
+                if len(data) <= budget:
+                    fit = (data, mid, sub)
+                    lo = mid + 1
+                else:
+                    if len(data) < len(best[0]):
+                        best = (data, mid, sub)
+                    hi = mid - 1
+            if fit:
+                best = fit
+        data, quality, sub = best
+
+    ms = (time.perf_counter() - t0) * 1000.0
+    info = {
+        "kind": kind,
+        "format": pil_fmt,
+        "quality": quality,
+        "subsampling": {0: "4:4:4", 2: "4:2:0"}.get(sub),
+        "bytes": len(data),
+        "budget": budget,
+        "ms": round(ms, 2),
+    }
+    _record(info)
+    return data, info
+
+
+def _record(info: Dict[str, Any]):
+    with _stats_lock:
+        s = _stats.setdefault(info["kind"], {"count": 0, "bytes": 0, "ms": 0.0, "over_budget": 0})
+        s["count"] += 1
+        s["bytes"] += info["bytes"]
+        s["ms"] += info["ms"]
+        if info["budget"] and info["bytes"] > info["budget"]:
+            s["over_budget"] += 1
+    if RENDER_ENCODE_LOG:
+        print(f"[ENCODE] {info['kind']} {info['format']} q={info['quality']} "
+              f"sub={info['subsampling']} {info['bytes']}B {info['ms']}ms")
+
+
+def take_stats() -> Dict[str, Dict[str, float]]:
+    """Per-kind totals since the last call; resets them."""
+    with _stats_lock:
+        out = {k: dict(v) for k, v in _stats.items()}
+        _stats.clear()
+    return out
+
+
+# -------------------------------------------------
+# Outputs
+# -------------------------------------------------
+def save(img, path: str, fmt: Optional[str] = None, budget: Optional[int] = None,
+         kind: str = "image") -> Dict[str, Any]:
+    data, info = encode(img, fmt, budget, kind)
+    with open(path, "wb") as f:
+        f.write(data)
+    return info
+
+
+def buffer(data: bytes, name: str = "image", fmt: Optional[str] = None) -> io.BytesIO:
+    """Wrap already-encoded bytes as a named BytesIO (telebot uses .name for the upload)."""
+    buf = io.BytesIO(data)
+    buf.name = f"{name}.{extension(fmt)}"
+    return buf
@@ -6,18 +6,25 @@ import os
 import math
 from PIL import Image, ImageDraw, ImageFont
 
+from bot.render_assets import get_font_from, get_layer
+from bot.render_cache import render_image
+
 FONT_PATH = "assets/fonts/megagrok.ttf"
 DEFAULT_FONT = "DejaVuSans-Bold.ttf"
 
+# bump when the layout changes so cached renders are invalidated
+LEADERBOARD_RENDER_VERSION = "2"
+LEADERBOARD_ROWS = 12
+LEADERBOARD_FIELDS = ("user_id", "display_name", "username", "level", "xp_total")
+LEADERBOARD_SIZE = (1080, 1920)
+
 
 # --------------------------------------------------------
 # FONT LOADING
 # --------------------------------------------------------
 def load_font(size):
-    try:
-        return ImageFont.truetype(FONT_PATH, size)
-    except Exception:
-        return ImageFont.truetype(DEFAULT_FONT, size)
+    # cached per (path, size) — see bot/render_assets.py
+    return get_font_from((FONT_PATH, DEFAULT_FONT), size)
 
 
 # --------------------------------------------------------
@@ -32,6 +39,15 @@ def measure(draw, text, font):
 # OUTLINE TEXT DRAWING
 # --------------------------------------------------------
 def draw_text_outline(draw, xy, text, font, fill, outline="black", width=3):
+    # Native FreeType stroke: one rasterization instead of (2w+1)² offsets.
+    try:
+        draw.text(xy, text, font=font, fill=fill, stroke_width=width, stroke_fill=outline)
+    except Exception:
+        # bitmap fonts (load_default on old Pillow) have no stroke support
+        draw_text_outline_legacy(draw, xy, text, font, fill, outline, width)
+
+
+def draw_text_outline_legacy(draw, xy, text, font, fill, outline="black", width=3):
     x, y = xy
     for dx in range(-width, width + 1):
         for dy in range(-width, width + 1):
@@ -73,33 +89,35 @@ def draw_medal(draw, x, y, rank):
 # --------------------------------------------------------
 # LEADERBOARD GENERATOR (MAIN FUNCTION)
 # --------------------------------------------------------
-def generate_leaderboard_premium(users):
+def generate_leaderboard_premium(users, as_buffer=False):
     """
     EXPECTED user dict fields:
       display_name   (string or None)
       username       (@username, string or None)
       xp_total
       level
-    """
 
-    W, H = 1080, 1920
-    img = Image.new("RGB", (W, H), (22, 22, 22))
+    Returns a path in the render cache, unique per visible leaderboard
+    content (or a BytesIO with as_buffer=True); unchanged rankings are
+    served without re-rendering.
+    """
+    rows = [
+        {k: u[k] for k in LEADERBOARD_FIELDS if k in u}
+        for u in users[:LEADERBOARD_ROWS]
+    ]
+    return render_image(
+        "leaderboard", rows, LEADERBOARD_RENDER_VERSION,
+        lambda: render_leaderboard(rows), as_buffer,
+    )
+
+
+def render_leaderboard(users):
+    """Draw the leaderboard and return the PIL image (no caching, no I/O)."""
+    W, H = LEADERBOARD_SIZE
+    # background + title are static: pre-composited once, copied per render
+    img = get_layer(("leaderboard",), _leaderboard_base).copy()
     dr = ImageDraw.Draw(img)
 
-    # ---------- TITLE ----------
-    title = "MEGAGROK\nLEADERBOARD"
-    title_font = load_font(120)
-
-    for i, line in enumerate(title.split("\n")):
-        tw, th = measure(dr, line, title_font)
-        draw_text_outline(
-            dr,
-            ((W - tw) // 2, 80 + i * 120),
-            line,
-            title_font,
-            fill="#FFB545"
-        )
-
     # ---------- ROW SETTINGS ----------
     start_y = 350
     row_h = 150
@@ -107,7 +125,7 @@ def generate_leaderboard_premium(users):
     name_font = load_font(64)
     stats_font = load_font(48)
 
-    for idx, user in enumerate(users[:12]):
+    for idx, user in enumerate(users[:LEADERBOARD_ROWS]):
         y = start_y + idx * row_h
 
         rank = idx + 1
@@ -151,7 +169,28 @@ def generate_leaderboard_premium(users):
     ftw, fth = measure(dr, footer, ff)
     draw_text_outline(dr, ((W - ftw) // 2, H - 150), footer, ff, fill="#777777")
 
-    # Save final image
-    out = "/tmp/leaderboard.jpg"
-    img.save(out, quality=95)
-    return out
+    return img
+
+
+def _leaderboard_base():
+    """Static leaderboard layer: background + title (the footer is drawn
+    per render because the last rows can overlap it)."""
+    W, _ = LEADERBOARD_SIZE
+    img = Image.new("RGB", LEADERBOARD_SIZE, (22, 22, 22))
+    dr = ImageDraw.Draw(img)
+
+    # ---------- TITLE ----------
+    title = "MEGAGROK\nLEADERBOARD"
+    title_font = load_font(120)
+
+    for i, line in enumerate(title.split("\n")):
+        tw, th = measure(dr, line, title_font)
+        draw_text_outline(
+            dr,
+            ((W - tw) // 2, 80 + i * 120),
+            line,
+            title_font,
+            fill="#FFB545"
+        )
+
+    return img
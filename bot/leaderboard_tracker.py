@@ -5,6 +5,8 @@
 import os
 import json
 
+from services import outbound
+
 # Persistent snapshot file
 CACHE_PATH = "/var/data/leaderboard_cache.json"
 
@@ -63,11 +65,18 @@ def _detect(old_snap, new_snap):
 # ---------------------------------------------------------
 # MAIN PUBLIC FUNCTION — CALL THIS AFTER XP CHANGES
 # ---------------------------------------------------------
+def _announce_failed(e):
+    print("⚠ [LEADERBOARD] announcement not delivered:", e)
+
+
 def announce_leaderboard_if_changed(bot, top_n=20):
     """
     - Recomputes leaderboard
     - Detects changes
-    - Posts messages to public channel
+    - Queues messages to the public channel
+
+    Returns the list each announcement is appended to once Telegram has
+    accepted it (sends are queued, so it fills in after this returns).
     """
 
     if not LEADERBOARD_CHANNEL_ID:
@@ -117,12 +126,11 @@ def announce_leaderboard_if_changed(bot, top_n=20):
             else:
                 msg = f"🔻 *RANK DOWN!* {name} dropped from **#{old_rank}** → **#{new_rank}**."
 
-        # Send to public channel
-        try:
-            bot.send_message(int(LEADERBOARD_CHANNEL_ID), msg, parse_mode="Markdown")
-            announcements.append(msg)
-        except Exception:
-            pass
+        # Send to public channel (queued; paced by the channel bucket)
+        outbound.send_message(bot, int(LEADERBOARD_CHANNEL_ID), msg,
+                              parse_mode="Markdown", priority=outbound.BROADCAST,
+                              on_done=lambda _res, m=msg: announcements.append(m),
+                              on_error=_announce_failed)
 
     # Persist snapshot
     _save_cache(new_snap)
@@ -0,0 +1,167 @@
+# bot/media_registry.py
+# Persistent Telegram file_id registry for static media.
+#
+# The first send of a portrait / GIF uploads the bytes; Telegram answers
+# with a reusable file_id which we store keyed by (kind, path, mtime, size).
+# Every later send reuses the file_id — no re-upload. Editing the asset on
+# disk changes mtime/size, so the stale id is never looked up again, and it
+# is dropped from the registry once the new version's id is remembered.
+#
+# Storage: JSON at MEDIA_REGISTRY_PATH (persistent disk like the DB).
+
+import os
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from telebot import types
+
+MEDIA_REGISTRY_PATH = os.getenv("MEDIA_REGISTRY_PATH", "/var/data/media_registry.json")
+
+_lock = threading.Lock()
+_registry: Optional[Dict[str, str]] = None
+
+
+# -------------------------------------------------
+# Storage
+# -------------------------------------------------
+def _load() -> Dict[str, str]:
+    global _registry
+    if _registry is None:
+        try:
+            with open(MEDIA_REGISTRY_PATH, "r") as f:
+                _registry = json.load(f) or {}
+        except Exception:
+            _registry = {}
+    return _registry
+
+
+def _save():
+    try:
+        os.makedirs(os.path.dirname(MEDIA_REGISTRY_PATH), exist_ok=True)
+        tmp = MEDIA_REGISTRY_PATH + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(_registry or {}, f)
+        os.replace(tmp, MEDIA_REGISTRY_PATH)
+    except Exception as e:
+        print("⚠ [MEDIA] registry save failed:", e)
+
+
+def _key(kind: str, path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{kind}|{os.path.normpath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+def _asset(key: str) -> str:
+    """The "kind|path" part of a registry key (drops mtime and size)."""
+    return key.rsplit("|", 2)[0]
+
+
+def lookup(kind: str, path: str) -> Optional[str]:
+    key = _key(kind, path)
+    if not key:
+        return None
+    with _lock:
+        return _load().get(key)
+
+
+def remember(kind: str, path: str, file_id: Optional[str]):
+    key = _key(kind, path)
+    if not key or not file_id:
+        return
+    with _lock:
+        reg = _load()
+        if reg.get(key) == file_id:
+            return
+        # older versions of the same file can never match again
+        asset = _asset(key)
+        for old in [k for k in reg if k != key and _asset(k) == asset]:
+            del reg[old]
+        reg[key] = file_id
+        _save()
+
+
+def forget(kind: str, path: str):
+    key = _key(kind, path)
+    if not key:
+        return
+    with _lock:
+        if _load().pop(key, None) is not None:
+            _save()
+
+
+def _file_id_from(msg: Any, kind: str) -> Optional[str]:
+    try:
+        if kind == "photo" and getattr(msg, "photo", None):
+            return msg.photo[-1].file_id   # largest size
+        if kind == "animation":
+            anim = getattr(msg, "animation", None) or getattr(msg, "document", None)
+            if anim:
+                return anim.file_id
+    except Exception:
+        pass
+    return None
+
+
+def _is_file_id_error(e: Exception) -> bool:
+    s = str(e).lower()
+    return "file identifier" in s or "file_id" in s or "wrong type" in s
+
+
+# -------------------------------------------------
+# Send helpers (drop-in for bot.send_photo / send_animation with a path)
+# -------------------------------------------------
+def _send(kind: str, sender, chat_id, path: str, **kwargs):
+    file_id = lookup(kind, path)
+    if file_id:
+        try:
+            return sender(chat_id, file_id, **kwargs)
+        except Exception as e:
+            if not _is_file_id_error(e):
+                raise
+            # expired / foreign file_id → fall through to a fresh upload
+            print(f"⚠ [MEDIA] cached {kind} rejected for {path}: {e}")
+            forget(kind, path)
+
+    with open(path, "rb") as f:
+        msg = sender(chat_id, f, **kwargs)
+    remember(kind, path, _file_id_from(msg, kind))
+    return msg
+
+
+def send_photo(bot, chat_id, path: str, **kwargs):
+    return _send("photo", bot.send_photo, chat_id, path, **kwargs)
+
+
+def send_animation(bot, chat_id, path: str, **kwargs):
+    return _send("animation", bot.send_animation, chat_id, path, **kwargs)
+
+
+def edit_photo(bot, chat_id, message_id, path: str, caption: Optional[str] = None,
+               parse_mode: Optional[str] = None):
+    """edit_message_media with a photo from disk, reusing the cached file_id."""
+    file_id = lookup("photo", path)
+    if file_id:
+        try:
+            return bot.edit_message_media(
+                media=types.InputMediaPhoto(file_id, caption=caption, parse_mode=parse_mode),
+                chat_id=chat_id,
+                message_id=message_id,
+            )
+        except Exception as e:
+            if not _is_file_id_error(e):
+                raise
+            print(f"⚠ [MEDIA] cached photo rejected for {path}: {e}")
+            forget("photo", path)
+
+    with open(path, "rb") as f:
+        msg = bot.edit_message_media(
+            media=types.InputMediaPhoto(f, caption=caption, parse_mode=parse_mode),
+            chat_id=chat_id,
+            message_id=message_id,
+        )
+    remember("photo", path, _file_id_from(msg, "photo"))
+    return msg
@@ -4,7 +4,8 @@
 # Replace/extend assets paths as you render portraits & gifs.
 
 import random
-from typing import Dict, Any, List
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional
 
 # -------------------------
 # Auto stat generator
@@ -526,6 +527,30 @@ for key, mob in MOBS.items():
     if "combat_power" in mob:
         mob.update(auto_stats(int(mob["combat_power"])))
 
+# -------------------------
+# Lookup catalog (built once at import)
+# -------------------------
+def _build_catalog():
+    name_index = {}
+    keys_by_name = {}
+    buckets = {tier: [] for tier in TIERS}
+    for key, mob in MOBS.items():
+        name_index[key.lower()] = mob
+        name_index.setdefault(mob.get("name", key).lower(), mob)
+        keys_by_name[mob.get("name", key).lower()] = key
+        buckets.setdefault(mob.get("tier"), []).append(mob)
+
+    return (
+        MappingProxyType(name_index),
+        MappingProxyType(keys_by_name),
+        MappingProxyType({tier: tuple(ms) for tier, ms in buckets.items()}),
+        tuple(MOBS.values()),
+    )
+
+
+_NAME_INDEX, _KEY_BY_NAME, _TIER_BUCKETS, _ALL_MOBS = _build_catalog()
+
+
 # -------------------------
 # Helper functions
 # -------------------------
@@ -537,25 +562,24 @@ def get_mob(name: str) -> Dict[str, Any]:
     # exact key
     if name_norm in MOBS:
         return MOBS[name_norm]
-    # try case-insensitive search
-    for k, v in MOBS.items():
-        if k.lower() == name_norm.lower() or v.get("name", "").lower() == name_norm.lower():
-            return v
-    return None
+    return _NAME_INDEX.get(name_norm.lower())
+
+def get_mob_key(name: str) -> Optional[str]:
+    """Canonical MOBS key for a mob name (case-insensitive)."""
+    if not name:
+        return None
+    return _KEY_BY_NAME.get(name.strip().lower())
 
 def get_random_mob(tier: int = None) -> Dict[str, Any]:
     """Return a random mob. If tier is specified, pick from that tier."""
-    choices = []
-    for k, m in MOBS.items():
-        if tier is None or m.get("tier") == tier:
-            choices.append(m)
+    choices = _ALL_MOBS if tier is None else _TIER_BUCKETS.get(tier)
     if not choices:
         return None
     return random.choice(choices)
 
 def list_mobs_by_tier(tier: int) -> List[Dict[str, Any]]:
     """List mob dicts for a given tier number."""
-    return [m for m in MOBS.values() if m.get("tier") == tier]
+    return list(_TIER_BUCKETS.get(tier, ()))
 
 def list_all_mobs() -> List[Dict[str, Any]]:
-    return list(MOBS.values())
+    return list(_ALL_MOBS)
@@ -3,15 +3,19 @@
 
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import os
-import time
 import random
 
+from bot.render_assets import get_font_from, get_image, get_layer
+from bot.render_cache import render_image
+from bot.svg_assets import get_sprite
+
 CANVAS_W = 1080
 CANVAS_H = 1350
 
 ASSET_DIR = "assets/groks"
-OUT_DIR = "/tmp"
-os.makedirs(OUT_DIR, exist_ok=True)
+
+# bump when the layout changes so cached renders are invalidated
+CARD_RENDER_VERSION = "3"
 
 # ---------------------------------
 # STYLE SYSTEM (future-proof)
@@ -41,11 +45,8 @@ PAPER = (238, 248, 252)
 # ---------------------------------
 
 def _font(size, bold=False):
-    try:
-        name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
-        return ImageFont.truetype(name, size)
-    except:
-        return ImageFont.load_default()
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    return get_font_from((name,), size)
 
 
 def _center(draw, text, y, font, fill):
@@ -61,11 +62,29 @@ def _rounded(draw, box, r, fill, outline=None, w=4):
 # Main Renderer
 # ---------------------------------
 
-def generate_profile_card(data: dict) -> str:
-    uid = data["user_id"]
-    evo = data.get("evolution", "Tadpole").lower()
-    level = data.get("level", 1)
+def generate_profile_card(data: dict, as_buffer: bool = False):
+    """
+    Render-cache path for this card (or a BytesIO with as_buffer=True);
+    identical data is not re-rendered.
+    """
+    return render_image(
+        "profile_card", data, CARD_RENDER_VERSION,
+        lambda: render_profile_card(data), as_buffer,
+    )
 
+
+# fixed layout rows shared by the static base and the per-user pass
+PANEL_Y = 860
+BAR_Y = PANEL_Y + 180
+STATS_Y = BAR_Y + 110
+
+
+def _card_base(evo: str):
+    """
+    Everything on the card that depends only on the evolution style:
+    paper noise, banner, creature window + grok, panels and fixed labels.
+    Built once per evo and cached (render_assets.get_layer).
+    """
     style = EVOLUTION_STYLE.get(evo, EVOLUTION_STYLE["tadpole"])
     accent = style["accent"]
 
@@ -73,7 +92,6 @@ def generate_profile_card(data: dict) -> str:
     # Base canvas
     # -------------------------------
     img = Image.new("RGB", (CANVAS_W, CANVAS_H), PAPER)
-    draw = ImageDraw.Draw(img)
 
     # subtle paper noise
     noise = Image.effect_noise((CANVAS_W, CANVAS_H), 8)
@@ -107,10 +125,9 @@ def generate_profile_card(data: dict) -> str:
     )
 
     # -------------------------------
-    # CORNER GLYPHS
+    # CORNER GLYPHS (level text is per-user)
     # -------------------------------
     _rounded(draw, (60, 200, 220, 270), 18, fill=(255, 255, 255), outline=INK, w=4)
-    draw.text((85, 215), f"⚡ Lv {level}", font=_font(26, True), fill=INK)
 
     # -------------------------------
     # CREATURE WINDOW
@@ -138,62 +155,45 @@ def generate_profile_card(data: dict) -> str:
     glow = glow.filter(ImageFilter.GaussianBlur(80))
     img.paste(glow, (280, 280), glow)
 
-    # grok
-    grok_path = os.path.join(ASSET_DIR, f"{evo}.png")
-    if os.path.exists(grok_path):
-        grok = Image.open(grok_path).convert("RGBA")
-        grok.thumbnail((420, 420))
+    # grok: rasterized SVG sprite (cached by source hash), else the PNG
+    grok = get_sprite(evo)
+    if grok is None:
+        grok = get_image(os.path.join(ASSET_DIR, f"{evo}.png"), "RGBA", (420, 420))
+    if grok is not None:
         gx = (CANVAS_W - grok.width) // 2
         gy = 300
         img.paste(grok, (gx, gy), grok)
 
     # -------------------------------
-    # IDENTITY PANEL
+    # IDENTITY PANEL (name is per-user)
     # -------------------------------
-    panel_y = 860
-    _rounded(draw, (160, panel_y, 920, panel_y + 140), 28, fill=(255, 255, 255), outline=INK, w=4)
-
-    name = data.get("display_name", "Unknown")
-    _center(draw, f"👤 {name}", panel_y + 22, _font(34, True), INK)
-    _center(draw, f"🧬 Evolution: {evo.title()}", panel_y + 70, _font(24), (60, 80, 100))
-    _center(draw, "🏆 XP Rank —", panel_y + 104, _font(20), (120, 120, 120))
+    _rounded(draw, (160, PANEL_Y, 920, PANEL_Y + 140), 28, fill=(255, 255, 255), outline=INK, w=4)
+    _center(draw, f"🧬 Evolution: {evo.title()}", PANEL_Y + 70, _font(24), (60, 80, 100))
+    _center(draw, "🏆 XP Rank —", PANEL_Y + 104, _font(20), (120, 120, 120))
 
     # -------------------------------
-    # XP TRACK
+    # XP TRACK (bar fill + numbers are per-user)
     # -------------------------------
-    cur = data.get("xp_current", 0)
-    nxt = max(1, data.get("xp_to_next_level", 1))
-    pct = cur / nxt
-
-    bar_y = panel_y + 180
-    draw.rectangle((220, bar_y, 860, bar_y + 18), fill=(210, 210, 210))
-    draw.rectangle((220, bar_y, 220 + int(640 * pct), bar_y + 18), fill=accent)
-
-    _center(draw, f"{cur} / {nxt} XP", bar_y + 28, _font(22), INK)
-    _center(draw, "🧬 Next Evolution → Level 6", bar_y + 58, _font(20), (80, 110, 130))
+    _center(draw, "🧬 Next Evolution → Level 6", BAR_Y + 58, _font(20), (80, 110, 130))
 
     # -------------------------------
-    # STAT GLYPHS (ICON-FIRST)
+    # STAT GLYPHS (battle count is per-user)
     # -------------------------------
-    battles = data.get("wins", 0) + max(0, data.get("mobs_defeated", 0))
+    draw.text((260, STATS_Y), "⚔️", font=_font(36), fill=INK)
+    draw.text((260, STATS_Y + 40), "Battles", font=_font(18), fill=(80, 100, 120))
 
-    stats_y = bar_y + 110
-    draw.text((260, stats_y), "⚔️", font=_font(36), fill=INK)
-    draw.text((300, stats_y + 2), f"{battles}", font=_font(30, True), fill=INK)
-    draw.text((260, stats_y + 40), "Battles", font=_font(18), fill=(80, 100, 120))
+    draw.text((500, STATS_Y), "🔥", font=_font(36), fill=INK)
+    draw.text((540, STATS_Y + 2), "Dormant", font=_font(24, True), fill=INK)
+    draw.text((500, STATS_Y + 40), "Power", font=_font(18), fill=(80, 100, 120))
 
-    draw.text((500, stats_y), "🔥", font=_font(36), fill=INK)
-    draw.text((540, stats_y + 2), "Dormant", font=_font(24, True), fill=INK)
-    draw.text((500, stats_y + 40), "Power", font=_font(18), fill=(80, 100, 120))
-
-    draw.text((720, stats_y), "🌱", font=_font(36), fill=INK)
-    draw.text((760, stats_y + 2), "Stable", font=_font(24, True), fill=INK)
-    draw.text((720, stats_y + 40), "Growth", font=_font(18), fill=(80, 100, 120))
+    draw.text((720, STATS_Y), "🌱", font=_font(36), fill=INK)
+    draw.text((760, STATS_Y + 2), "Stable", font=_font(24, True), fill=INK)
+    draw.text((720, STATS_Y + 40), "Growth", font=_font(18), fill=(80, 100, 120))
 
     # -------------------------------
     # MILESTONES
     # -------------------------------
-    ms_y = stats_y + 90
+    ms_y = STATS_Y + 90
     _center(draw, "🧬 Milestones", ms_y, _font(26, True), INK)
     _center(
         draw,
@@ -219,6 +219,34 @@ def generate_profile_card(data: dict) -> str:
     # -------------------------------
     _center(draw, "MEGAGROK METAVERSE", CANVAS_H - 54, _font(18), (140, 160, 170))
 
-    out = os.path.join(OUT_DIR, f"profile_{uid}_{int(time.time())}.png")
-    img.save(out)
-    return out
+    return img
+
+
+def render_profile_card(data: dict):
+    evo = data.get("evolution", "Tadpole").lower()
+    level = data.get("level", 1)
+
+    style = EVOLUTION_STYLE.get(evo, EVOLUTION_STYLE["tadpole"])
+    accent = style["accent"]
+
+    # pre-composited static layers, then only the per-user text / bars
+    img = get_layer(("profile_card", evo), lambda: _card_base(evo)).copy()
+    draw = ImageDraw.Draw(img)
+
+    draw.text((85, 215), f"⚡ Lv {level}", font=_font(26, True), fill=INK)
+
+    name = data.get("display_name", "Unknown")
+    _center(draw, f"👤 {name}", PANEL_Y + 22, _font(34, True), INK)
+
+    cur = data.get("xp_current", 0)
+    nxt = max(1, data.get("xp_to_next_level", 1))
+    pct = cur / nxt
+
+    draw.rectangle((220, BAR_Y, 860, BAR_Y + 18), fill=(210, 210, 210))
+    draw.rectangle((220, BAR_Y, 220 + int(640 * pct), BAR_Y + 18), fill=accent)
+    _center(draw, f"{cur} / {nxt} XP", BAR_Y + 28, _font(22), INK)
+
+    battles = data.get("wins", 0) + max(0, data.get("mobs_defeated", 0))
+    draw.text((300, STATS_Y + 2), f"{battles}", font=_font(30, True), fill=INK)
+
+    return img
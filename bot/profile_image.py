@@ -7,6 +7,12 @@ import math
 import random
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
+from bot.render_assets import get_font_from, get_layer
+from bot.render_cache import render_image
+
+# bump when the layout changes so cached renders are invalidated
+PROFILE_RENDER_VERSION = "2"
+
 # Prefer your custom font in assets, but fall back if unavailable
 FONT_CANDIDATES = [
     "assets/fonts/megagrok.ttf",
@@ -18,32 +24,34 @@ FONT_CANDIDATES = [
 def load_font_safe(size):
     """
     Try several font files. Return a PIL ImageFont instance.
+    Resolved once per size and cached process-wide; if no candidate loads,
+    the default PIL font (very small) is returned.
     """
-    for p in FONT_CANDIDATES:
-        try:
-            if os.path.exists(p):
-                return ImageFont.truetype(p, size)
-        except Exception:
-            continue
-    # As a last resort, use the default PIL font (very small), then scale via transform
-    return ImageFont.load_default()
+    return get_font_from(FONT_CANDIDATES, size)
 
 # small helper to measure text using modern Pillow API
 def text_size(draw, text, font):
     bbox = draw.textbbox((0, 0), text, font=font)
     return (bbox[2] - bbox[0], bbox[3] - bbox[1])
 
-# outline-style text (draw black outlines then fill)
+# outline-style text via Pillow's native stroke (single rasterization)
 def draw_outline(draw, xy, text, font, fill, outline=(0,0,0), w=3):
-    x, y = xy
-    # outline ring
-    for dx in range(-w, w+1):
-        for dy in range(-w, w+1):
-            draw.text((x+dx, y+dy), text, font=font, fill=outline)
-    draw.text((x, y), text, font=font, fill=fill)
+    try:
+        draw.text(xy, text, font=font, fill=fill, stroke_width=w, stroke_fill=outline)
+    except Exception:
+        # bitmap fallback font: no stroke support, fake it with offsets
+        x, y = xy
+        for dx in range(-w, w+1):
+            for dy in range(-w, w+1):
+                draw.text((x+dx, y+dy), text, font=font, fill=outline)
+        draw.text((x, y), text, font=font, fill=fill)
 
 # generate a halftone-like explosion background for the portrait
+# (cached per stage/size; the returned image is shared — paste, don't mutate)
 def generate_halftone(stage, size=(220,220)):
+    return get_layer(("halftone", stage, tuple(size)), lambda: _build_halftone(stage, size))
+
+def _build_halftone(stage, size):
     w, h = size
     base = Image.new("RGB", size, (40,40,40))
     dr = ImageDraw.Draw(base)
@@ -97,8 +105,16 @@ def draw_rank_badge(draw, rank, x, y):
     tw, th = text_size(draw, txt, fnt)
     draw.text((cx-tw/2, cy-th/2), txt, font=fnt, fill="black")
 
-# main profile generator (returns /tmp path)
-def generate_profile_image(payload):
+# main profile generator (render-cache path unique per payload,
+# or an in-memory BytesIO with as_buffer=True)
+def generate_profile_image(payload, as_buffer=False):
+    return render_image(
+        "profile_image", payload, PROFILE_RENDER_VERSION,
+        lambda: render_profile_image(payload), as_buffer,
+    )
+
+# draw the profile image and return the PIL image (no caching, no I/O)
+def render_profile_image(payload):
     user_id = payload["user_id"]
 
     # ⭐ Use display_name first, then username, then fallback
@@ -120,7 +136,47 @@ def generate_profile_image(payload):
     rank = payload.get("rank", None)
     xp_to_next = payload.get("xp_to_next", max(100, level*100))
 
-    # canvas
+    # pre-composited static layers for this stage, then per-user parts only
+    base, L = get_layer(("profile_image", stage), lambda: _profile_base(stage))
+    img = base.copy()
+    dr = ImageDraw.Draw(img)
+
+    # rank badge (top-right)
+    draw_rank_badge(dr, rank, L["W"] - 240, L["title_y"])
+
+    # ---------- Display name + level + xp ----------
+    name_font = load_font_safe(64)
+    lv_font = load_font_safe(42)
+
+    nx, ny = L["nx"], L["ny"]
+
+    draw_outline(dr, (nx, ny), name_to_show, name_font, fill="#7EF2FF", outline=(0,0,0), w=3)
+
+    lv_text = f"LV {level} • {xp_total} XP"
+    draw_outline(dr, (nx, ny + 80), lv_text, lv_font, fill="#FFB545", outline=(0,0,0), w=2)
+
+    # XP bar fill (track is in the base layer)
+    bar_x, bar_y, bar_w, bar_h = L["bar"]
+    pct = min(1.0, xp_total / max(1, xp_to_next))
+    fill_w = int(bar_w * pct)
+    if fill_w > 0:
+        dr.rounded_rectangle((bar_x, bar_y, bar_x+fill_w, bar_y+bar_h), fill="#7EF2FF", radius=20)
+
+    # ---------- Stat tile values (WINS, FIGHTS, RITUALS, POWER) ----------
+    values = [wins, fights, rituals, max(1, level * 5 + wins * 2)]
+    tile_font_num = load_font_safe(56)
+    tile_w, tile_y = L["tile_w"], L["tile_y"]
+
+    for tx, val in zip(L["tile_xs"], values):
+        val_s = str(val)
+        vw, vh = text_size(dr, val_s, tile_font_num)
+        draw_outline(dr, (tx + (tile_w - vw)//2, tile_y + 58), val_s, tile_font_num, fill="#FFB545", outline=(0,0,0), w=3)
+
+    return img
+
+# static layers for one stage: background, title, portrait frame + halftone,
+# XP track, stat tiles with labels, footer. Returns (image, layout).
+def _profile_base(stage):
     W, H = 1080, 1920
     img = Image.new("RGB", (W, H), (20,20,20))
     dr = ImageDraw.Draw(img)
@@ -134,7 +190,7 @@ def generate_profile_image(payload):
     # use textbbox to ensure accurate metrics
     ttw, tth = text_size(dr, TITLE_TEXT, title_font)
     # give some extra padding above
-    TOP_MARGIN = max(48, int(title_font.size * 0.6))
+    TOP_MARGIN = max(48, int(getattr(title_font, "size", TITLE_SIZE) * 0.6))
 
     # center title horizontally at TOP_MARGIN
     title_x = (W - ttw) // 2
@@ -142,14 +198,11 @@ def generate_profile_image(payload):
 
     draw_outline(dr, (title_x, title_y), TITLE_TEXT, title_font, fill="#FFB545", outline=(8,6,4), w=3)
 
-    # rank badge (top-right)
-    draw_rank_badge(dr, rank, W - 240, title_y)
-
     # ---------- Portrait frame and halftone -->
     px, py = 120, title_y + tth + 40   # place portrait under the title with spacing
     pw, ph = 220, 220
     # outer white frame
-    draw_round_rect = getattr(ImageDraw.Draw(img), "rounded_rectangle", None)
+    draw_round_rect = getattr(dr, "rounded_rectangle", None)
     if draw_round_rect:
         dr.rounded_rectangle((px-10, py-10, px+pw+10, py+ph+10), fill=(255,255,255), radius=14)
     else:
@@ -158,59 +211,37 @@ def generate_profile_image(payload):
     halo = generate_halftone(stage, size=(pw, ph))
     img.paste(halo, (px, py))
 
-    # ---------- Display name + level + xp ----------
-    name_font = load_font_safe(64)
-    lv_font = load_font_safe(42)
-
     nx = px + pw + 80
     ny = py + 10
 
-    draw_outline(dr, (nx, ny), name_to_show, name_font, fill="#7EF2FF", outline=(0,0,0), w=3)
-
-    lv_text = f"LV {level} • {xp_total} XP"
-    draw_outline(dr, (nx, ny + 80), lv_text, lv_font, fill="#FFB545", outline=(0,0,0), w=2)
-
-    # XP bar
+    # XP bar track
     bar_x = nx
     bar_y = ny + 140
     bar_w = 520
     bar_h = 34
     dr.rounded_rectangle((bar_x, bar_y, bar_x+bar_w, bar_y+bar_h), fill="#333333", radius=20)
-    pct = min(1.0, xp_total / max(1, xp_to_next))
-    fill_w = int(bar_w * pct)
-    if fill_w > 0:
-        dr.rounded_rectangle((bar_x, bar_y, bar_x+fill_w, bar_y+bar_h), fill="#7EF2FF", radius=20)
 
-    # ---------- Stat tiles (WINS, FIGHTS, RITUALS, POWER) ----------
+    # ---------- Stat tiles (labels only; values are per-user) ----------
     tile_y = py + ph + 150
     tile_w = 240
     tile_h = 140
     gap = 28
 
-    stats = [
-        ("WINS", wins),
-        ("FIGHTS", fights),
-        ("RITUALS", rituals),
-        ("POWER", max(1, level * 5 + wins * 2)),
-    ]
-
+    labels = ["WINS", "FIGHTS", "RITUALS", "POWER"]
     tile_font_label = load_font_safe(36)
-    tile_font_num = load_font_safe(56)
 
     total_width = 4*tile_w + 3*gap
     x0 = (W - total_width) // 2
 
-    for i, (label, val) in enumerate(stats):
+    tile_xs = []
+    for i, label in enumerate(labels):
         tx = x0 + i*(tile_w + gap)
+        tile_xs.append(tx)
         # tile background with border
         dr.rounded_rectangle((tx, tile_y, tx+tile_w, tile_y+tile_h), fill="#1E1E1E", radius=20, outline="#FFB545", width=3)
         # label (top)
         lw, lh = text_size(dr, label, tile_font_label)
         draw_outline(dr, (tx + (tile_w - lw)//2, tile_y + 12), label, tile_font_label, fill="white", outline=(0,0,0), w=2)
-        # value (center)
-        val_s = str(val)
-        vw, vh = text_size(dr, val_s, tile_font_num)
-        draw_outline(dr, (tx + (tile_w - vw)//2, tile_y + 58), val_s, tile_font_num, fill="#FFB545", outline=(0,0,0), w=3)
 
     # ---------- Footer ----------
     foot_font = load_font_safe(44)
@@ -218,13 +249,9 @@ def generate_profile_image(payload):
     fw, fh = text_size(dr, footer, foot_font)
     draw_outline(dr, ((W - fw)//2, H - 140), footer, foot_font, fill="#777777", outline=(0,0,0), w=2)
 
-    # ---------- Save file ----------
-    out_path = f"/tmp/profile_{user_id}.jpg"
-    try:
-        img.save(out_path, quality=95)
-    except Exception:
-        # fallback to PNG if JPG fails
-        out_path = f"/tmp/profile_{user_id}.png"
-        img.save(out_path, "PNG")
-
-    return out_path
+    layout = {
+        "W": W, "title_y": title_y, "nx": nx, "ny": ny,
+        "bar": (bar_x, bar_y, bar_w, bar_h),
+        "tile_w": tile_w, "tile_y": tile_y, "tile_xs": tuple(tile_xs),
+    }
+    return img, layout
@@ -0,0 +1,168 @@
+# bot/render_assets.py
+# Process-wide font + image cache shared by all Pillow renderers.
+#
+# - Fonts are keyed by (path, size) and loaded from disk once.
+# - Fallback chains (candidate lists) resolve once per size; failed paths
+#   are remembered so we never re-stat / re-open them.
+# - Images are keyed by (path, mode, size) and returned SHARED — callers
+#   may paste/composite them but must .copy() before mutating.
+# - Layers are pre-composited static backgrounds keyed by the caller
+#   (e.g. ("profile_card", evo)); built once, LRU-bounded, shared.
+# - Rendering runs in services/render_service workers; each worker warms
+#   its own copy of these caches when it starts (_warm_worker there).
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple, Any
+
+from PIL import Image, ImageFont
+
+ASSET_ROOT = "assets"
+LAYER_CACHE_MAX = int(os.getenv("RENDER_LAYER_CACHE_MAX", "32"))
+
+_LOCK = threading.Lock()
+
+_FONTS: Dict[Tuple[str, int], Any] = {}
+_FONT_CHAINS: Dict[Tuple[Tuple[str, ...], int], Any] = {}
+_BAD_FONTS = set()
+
+_IMAGES: Dict[Tuple[str, str, Optional[Tuple[int, int]]], Any] = {}
+_MISSING_IMAGES = set()
+
+_LAYERS: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+
+# -------------------------------------------------
+# FONTS
+# -------------------------------------------------
+def get_font(path: str, size: int):
+    """
+    Cached ImageFont.truetype(path, size).
+    Raises OSError (like truetype) if the font cannot be loaded.
+    """
+    key = (path, int(size))
+    font = _FONTS.get(key)
+    if font is not None:
+        return font
+    if path in _BAD_FONTS:
+        raise OSError(f"cannot open font {path}")
+
+    try:
+        font = ImageFont.truetype(path, int(size))
+    except Exception:
+        with _LOCK:
+            _BAD_FONTS.add(path)
+        raise OSError(f"cannot open font {path}")
+
+    with _LOCK:
+        font = _FONTS.setdefault(key, font)
+    return font
+
+
+def get_font_from(candidates: Iterable[str], size: int):
+    """
+    First loadable font from `candidates` at `size`.
+    Falls back to PIL's default bitmap font if none load.
+    """
+    chain = tuple(candidates)
+    key = (chain, int(size))
+    font = _FONT_CHAINS.get(key)
+    if font is not None:
+        return font
+
+    font = None
+    for path in chain:
+        if path in _BAD_FONTS:
+            continue
+        try:
+            font = get_font(path, size)
+            break
+        except OSError:
+            continue
+
+    if font is None:
+        font = ImageFont.load_default()
+
+    with _LOCK:
+        font = _FONT_CHAINS.setdefault(key, font)
+    return font
+
+
+# -------------------------------------------------
+# IMAGES
+# -------------------------------------------------
+def get_image(path: str, mode: str = "RGBA", size: Optional[Tuple[int, int]] = None):
+    """
+    Cached decoded image (converted to `mode`, optionally thumbnailed to fit
+    `size`). Returns None if the file is missing or unreadable.
+    The returned image is shared — do not mutate it in place.
+    """
+    key = (path, mode, tuple(size) if size else None)
+    img = _IMAGES.get(key)
+    if img is not None:
+        return img
+    if path in _MISSING_IMAGES:
+        return None
+
+    try:
+        with Image.open(path) as src:
+            img = src.convert(mode)
+        if size:
+            img.thumbnail(tuple(size))
+    except Exception:
+        with _LOCK:
+            _MISSING_IMAGES.add(path)
+        return None
+
+    with _LOCK:
+        img = _IMAGES.setdefault(key, img)
+    return img
+
+
+# -------------------------------------------------
+# PRE-COMPOSITED LAYERS
+# -------------------------------------------------
+def get_layer(key: Hashable, build_fn: Callable[[], Any]):
+    """
+    Cached static layer produced by build_fn() (called once per key).
+    Shared — .copy() it before drawing the per-user parts on top.
+    """
+    with _LOCK:
+        img = _LAYERS.get(key)
+        if img is not None:
+            _LAYERS.move_to_end(key)
+            return img
+
+    img = build_fn()
+
+    with _LOCK:
+        img = _LAYERS.setdefault(key, img)
+        _LAYERS.move_to_end(key)
+        while len(_LAYERS) > max(1, LAYER_CACHE_MAX):
+            _LAYERS.popitem(last=False)
+    return img
+
+
+# -------------------------------------------------
+# MAINTENANCE
+# -------------------------------------------------
+def clear_caches():
+    with _LOCK:
+        _FONTS.clear()
+        _FONT_CHAINS.clear()
+        _BAD_FONTS.clear()
+        _IMAGES.clear()
+        _MISSING_IMAGES.clear()
+        _LAYERS.clear()
+
+
+def cache_info() -> Dict[str, int]:
+    return {
+        "fonts": len(_FONTS),
+        "font_chains": len(_FONT_CHAINS),
+        "bad_fonts": len(_BAD_FONTS),
+        "images": len(_IMAGES),
+        "missing_images": len(_MISSING_IMAGES),
+        "layers": len(_LAYERS),
+    }
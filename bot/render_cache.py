@@ -0,0 +1,357 @@
+# bot/render_cache.py
+# Content-addressed render cache for profile / leaderboard images.
+#
+# - Key = sha1(kind + version + canonical JSON of the input payload)
+# - Memory side: LRU of the encoded bytes of recent renders (items + bytes cap)
+# - In-memory by default: render_image(..., as_buffer=True) returns a BytesIO
+#   for bot.send_photo, no temp files involved
+# - Disk side (path callers, or RENDER_DEBUG_FILES=1 for buffers too):
+#   unique <RENDER_CACHE_DIR>/<kind>_<key>.<ext>, written tmp + os.replace,
+#   LRU bounded by file count and total bytes; a path handed to a caller is
+#   kept for RENDER_CACHE_PIN_SECONDS even if it falls off the LRU, so it
+#   can't be unlinked before the caller has sent it. Temp files orphaned by
+#   a crashed writer are swept when the cache starts.
+# - Concurrent requests for the same key render once (per-key lock)
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from bot import image_encoder
+
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "/tmp/megagrok_render")
+RENDER_CACHE_MAX_FILES = int(os.getenv("RENDER_CACHE_MAX_FILES", "256"))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+RENDER_CACHE_MEM_ITEMS = int(os.getenv("RENDER_CACHE_MEM_ITEMS", "32"))
+RENDER_CACHE_MEM_BYTES = int(os.getenv("RENDER_CACHE_MEM_BYTES", str(32 * 1024 * 1024)))
+RENDER_DEBUG_FILES = os.getenv("RENDER_DEBUG_FILES", "0") == "1"
+RENDER_CACHE_PIN_SECONDS = float(os.getenv("RENDER_CACHE_PIN_SECONDS", "60"))
+
+# a temp file older than this has no live writer (a render takes well under a second)
+_STALE_TMP_SECONDS = 60
+
+
+def render_key(kind: str, payload: Any, version: str = "1") -> str:
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    h = hashlib.sha1()
+    h.update(f"{kind}|{version}|".encode("utf-8"))
+    h.update(blob.encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory: str = RENDER_CACHE_DIR,
+                 max_files: int = RENDER_CACHE_MAX_FILES,
+                 max_bytes: int = RENDER_CACHE_MAX_BYTES,
+                 mem_items: int = RENDER_CACHE_MEM_ITEMS,
+                 mem_bytes: int = RENDER_CACHE_MEM_BYTES,
+                 debug_files: bool = RENDER_DEBUG_FILES):
+        self.directory = directory
+        self.max_files = max(1, max_files)
+        self.max_bytes = max(1, max_bytes)
+        self.mem_items = max(0, mem_items)
+        self.mem_bytes = max(0, mem_bytes)
+        self.debug_files = debug_files
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._disk: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (path, size)
+        self._disk_bytes = 0
+        self._pinned: Dict[str, float] = {}    # key -> monotonic time it may be evicted again
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_total = 0
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.isdir(self.directory):
+            self._scan()
+
+    # ---------------------------------------------
+    # Index
+    # ---------------------------------------------
+    def _scan(self):
+        """
+        Rebuild the disk index from files left by a previous process (oldest
+        first) and delete stale temp files. Render workers share the
+        directory, so a fresh temp file may belong to a live writer.
+        """
+        entries = []
+        now = time.time()
+        try:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if ".tmp." in name:
+                    if now - st.st_mtime > _STALE_TMP_SECONDS:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    continue
+                stem = name.rsplit(".", 1)[0]
+                key = stem.rsplit("_", 1)[-1]
+                entries.append((st.st_mtime, key, path, st.st_size))
+        except Exception:
+            return
+
+        for _, key, path, size in sorted(entries):
+            self._disk[key] = (path, size)
+            self._disk_bytes += size
+        self._evict()
+
+    def _pin(self, key: str):
+        """Keep key's file on disk for a while: its path was just handed out. Caller holds self._lock."""
+        self._pinned[key] = time.monotonic() + RENDER_CACHE_PIN_SECONDS
+
+    def _evict(self):
+        """Drop least recently used files until under the caps, skipping pinned ones."""
+        now = time.monotonic()
+        for key in [k for k, until in self._pinned.items() if until <= now]:
+            del self._pinned[key]
+
+        for key in list(self._disk):
+            if len(self._disk) <= self.max_files and self._disk_bytes <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            path, size = self._disk.pop(key)
+            self._disk_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _mem_put(self, key: str, data: bytes):
+        """Insert into the memory LRU. Caller holds self._lock."""
+        if not self.mem_items or len(data) > self.mem_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_total -= len(old)
+        self._mem[key] = data
+        self._mem_total += len(data)
+        while self._mem and (len(self._mem) > self.mem_items or self._mem_total > self.mem_bytes):
+            _, dropped = self._mem.popitem(last=False)
+            self._mem_total -= len(dropped)
+
+    def _remember(self, key: str, path: str, data: Optional[bytes] = None):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            old = self._disk.pop(key, None)
+            if old:
+                self._disk_bytes -= old[1]
+            self._disk[key] = (path, size)
+            self._disk_bytes += size
+            self._pin(key)
+            if data is not None:
+                self._mem_put(key, data)
+            self._evict()
+
+    def put_bytes(self, key: str, data: bytes):
+        with self._lock:
+            self._mem_put(key, data)
+
+    # ---------------------------------------------
+    # Lookups
+    # ---------------------------------------------
+    def get_path(self, key: str, pin: bool = True) -> Optional[str]:
+        """Cached file for key, or None. pin=False for callers that read it right away."""
+        with self._lock:
+            entry = self._disk.get(key)
+            if not entry:
+                return None
+            if not os.path.exists(entry[0]):
+                self._disk.pop(key, None)
+                self._disk_bytes -= entry[1]
+                return None
+            self._disk.move_to_end(key)
+            if pin:
+                self._pin(key)
+            return entry[0]
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                return data
+        path = self.get_path(key, pin=False)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.put_bytes(key, data)
+        return data
+
+    # ---------------------------------------------
+    # Render-through
+    # ---------------------------------------------
+    def render(self, kind: str, payload: Any, ext: str,
+               render_fn: Callable[[str], None], version: str = "1") -> str:
+        """
+        Return the cached output path for (kind, payload, version), calling
+        render_fn(path) to produce it on a miss. render_fn must write the
+        image file at exactly `path`.
+        """
+        key = render_key(kind, payload, version)
+        path = self.get_path(key)
+        if path:
+            self.hits += 1
+            return path
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # another thread may have rendered it while we waited
+            path = self.get_path(key)
+            if path:
+                self.hits += 1
+                return path
+
+            self.misses += 1
+            final = self._write_file(kind, key, ext, render_fn)
+
+        with self._lock:
+            self._inflight.pop(key, None)
+        return final
+
+    def _write_file(self, kind: str, key: str, ext: str,
+                    write_fn: Callable[[str], None], data: Optional[bytes] = None) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        final = os.path.join(self.directory, f"{kind}_{key}.{ext}")
+        tmp = os.path.join(self.directory, f"{kind}_{key}.{threading.get_ident()}.tmp.{ext}")
+        try:
+            write_fn(tmp)
+            os.replace(tmp, final)
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+        if data is None and self.mem_items:
+            try:
+                with open(final, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = None
+        self._remember(key, final, data)
+        return final
+
+    def render_bytes(self, kind: str, payload: Any, ext: str,
+                     encode_fn: Callable[[], bytes], version: str = "1") -> bytes:
+        """
+        In-memory variant of render(): returns the encoded bytes, calling
+        encode_fn() on a miss. Only touches disk when debug_files is on.
+        """
+        key = render_key(kind, payload, version)
+        data = self.get_bytes(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            data = self.get_bytes(key)
+            if data is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                data = encode_fn()
+                self.put_bytes(key, data)
+                if self.debug_files:
+                    def _dump(path, blob=data):
+                        with open(path, "wb") as f:
+                            f.write(blob)
+                    self._write_file(kind, key, ext, _dump, data)
+
+        with self._lock:
+            self._inflight.pop(key, None)
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "files": len(self._disk),
+                "bytes": self._disk_bytes,
+                "mem_items": len(self._mem),
+                "mem_bytes": self._mem_total,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            for path, _ in self._disk.values():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk.clear()
+            self._disk_bytes = 0
+            self._pinned.clear()
+            self._mem.clear()
+            self._mem_total = 0
+
+
+# -------------------------------------------------
+# Module-level singleton
+# -------------------------------------------------
+_instance: Optional[RenderCache] = None
+_instance_lock = threading.Lock()
+
+
+def get_cache() -> RenderCache:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = RenderCache()
+    return _instance
+
+
+def cached_render(kind: str, payload: Any, ext: str,
+                  render_fn: Callable[[str], None], version: str = "1") -> str:
+    return get_cache().render(kind, payload, ext, render_fn, version)
+
+
+def render_image(kind: str, payload: Any, version: str, draw_fn: Callable[[], Any],
+                 as_buffer: bool = False):
+    """
+    Shared entry point for the Pillow renderers. draw_fn() returns the PIL
+    image; it is only called on a cache miss and encoded via image_encoder.
+
+    as_buffer=True  → named BytesIO for bot.send_photo (no temp files)
+    as_buffer=False → path of the cached file on disk
+    """
+    ext = image_encoder.extension()
+    version = f"{version}-{image_encoder.config_tag()}"
+    if as_buffer:
+        data = get_cache().render_bytes(
+            kind, payload, ext,
+            lambda: image_encoder.encode(draw_fn(), kind=kind)[0],
+            version,
+        )
+        return image_encoder.buffer(data, kind)
+    return get_cache().render(
+        kind, payload, ext,
+        lambda path: image_encoder.save(draw_fn(), path, kind=kind),
+        version,
+    )
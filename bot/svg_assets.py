@@ -0,0 +1,163 @@
+# bot/svg_assets.py
+# SVG → PNG rasterization pipeline for Pillow renderers (cairosvg).
+#
+# - Output is cached on disk, keyed by the SVG source hash + target size:
+#     <SVG_RASTER_DIR>/<stem>_<w>x<h>_<sha1[:16]>.png
+#   Editing an SVG changes its hash → a fresh raster; old ones are ignored.
+# - Lazy path: get_raster(svg, size) rasterizes on first use and hands back
+#   a cached PIL image (via bot.render_assets), so request-time renders
+#   never pay SVG cost twice.
+# - Consumers: the profile card draws its grok from the sprite raster
+#   (get_sprite, SPRITE_SIZE = the card's 420×420 grok box) and keeps the
+#   assets/groks PNG as fallback.
+# - Build step (deploy), so the first card doesn't pay the SVG cost:
+#     python -m bot.svg_assets                 # every sprite at SPRITE_SIZE
+#     python -m bot.svg_assets --force         # re-rasterize even if cached
+#     python -m bot.svg_assets <file.svg> [WxH] [--force]    # 0 = keep aspect
+#   assets/templates/*.svg are not built: they are layout mockups ({{...}}
+#   placeholders, images linked from file:///mnt/data) that no renderer
+#   draws from.
+# - Rasters are a disposable cache outside the source tree (SVG_RASTER_DIR,
+#   default /tmp/megagrok_svg, like RENDER_CACHE_DIR).
+#
+# cairosvg needs the system libcairo; when it is unavailable every lookup
+# returns None and callers keep using their PNG fallbacks.
+
+import os
+import sys
+import glob
+import hashlib
+import threading
+from typing import Optional, Tuple
+
+from bot.render_assets import get_image
+
+try:
+    import cairosvg
+except Exception as e:  # ImportError or OSError (missing libcairo)
+    cairosvg = None
+    _CAIRO_ERROR = e
+else:
+    _CAIRO_ERROR = None
+
+SVG_RASTER_DIR = os.getenv("SVG_RASTER_DIR", "/tmp/megagrok_svg")
+
+SPRITE_DIR = "assets/sprites"
+SPRITE_SIZE = (420, 420)   # profile card grok box
+
+_lock = threading.Lock()
+_hash_cache = {}   # path -> (mtime_ns, size, sha1)
+_warned = False
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def available() -> bool:
+    return cairosvg is not None
+
+
+def source_hash(svg_path: str) -> str:
+    st = os.stat(svg_path)
+    sig = (st.st_mtime_ns, st.st_size)
+    cached = _hash_cache.get(svg_path)
+    if cached and cached[:2] == sig:
+        return cached[2]
+    with open(svg_path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    _hash_cache[svg_path] = (sig[0], sig[1], digest)
+    return digest
+
+
+def raster_path(svg_path: str, size: Optional[Tuple[Optional[int], Optional[int]]] = None) -> str:
+    w, h = size or (None, None)
+    stem = os.path.splitext(os.path.basename(svg_path))[0]
+    dims = f"{w or 0}x{h or 0}"
+    return os.path.join(SVG_RASTER_DIR, f"{stem}_{dims}_{source_hash(svg_path)[:16]}.png")
+
+
+# -------------------------------------------------
+# Rasterize
+# -------------------------------------------------
+def rasterize(svg_path: str, size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+              force: bool = False) -> Optional[str]:
+    """Return the PNG path for svg_path at size, rasterizing if needed."""
+    global _warned
+    if not os.path.exists(svg_path):
+        return None
+
+    out = raster_path(svg_path, size)
+    if not force and os.path.exists(out):
+        return out
+
+    if cairosvg is None:
+        if not _warned:
+            print("⚠ [SVG] cairosvg unavailable, skipping rasterization:",
+                  str(_CAIRO_ERROR).splitlines()[0])
+            _warned = True
+        return None
+
+    w, h = size or (None, None)
+    with _lock:
+        if not force and os.path.exists(out):
+            return out
+        os.makedirs(SVG_RASTER_DIR, exist_ok=True)
+        tmp = f"{out}.{os.getpid()}.tmp"
+        try:
+            cairosvg.svg2png(url=svg_path, write_to=tmp, output_width=w, output_height=h)
+            os.replace(tmp, out)
+        except Exception as e:
+            print(f"⚠ [SVG] rasterize failed for {svg_path}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return None
+    return out
+
+
+def get_raster(svg_path: str, size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+               mode: str = "RGBA"):
+    """
+    Lazy first-use path for renderers: cached PIL image of the rasterized
+    SVG (shared — don't mutate), or None if it can't be produced.
+    """
+    path = rasterize(svg_path, size)
+    if not path:
+        return None
+    return get_image(path, mode)
+
+
+def get_sprite(name: str, mode: str = "RGBA"):
+    """Raster of assets/sprites/<name>.svg at SPRITE_SIZE, or None (no SVG / no cairo)."""
+    return get_raster(os.path.join(SPRITE_DIR, f"{name}.svg"), SPRITE_SIZE, mode)
+
+
+# -------------------------------------------------
+# Build step
+# -------------------------------------------------
+def build_all(force: bool = False) -> int:
+    """Rasterize every sprite at the size the renderers request. Returns rasters ready."""
+    ready = 0
+    for svg in sorted(glob.glob(os.path.join(SPRITE_DIR, "*.svg"))):
+        if rasterize(svg, SPRITE_SIZE, force=force):
+            ready += 1
+    return ready
+
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != "--force"]
+    if not available():
+        print("❌ cairosvg unavailable:", str(_CAIRO_ERROR).splitlines()[0])
+        sys.exit(1)
+    if not args:
+        n = build_all(force=force)
+        print(f"✔ {n} sprite rasters ready in {SVG_RASTER_DIR}")
+        sys.exit(0)
+    size = None
+    if len(args) > 1:
+        w, h = (int(v) or None for v in args[1].lower().split("x"))
+        size = (w, h)
+    out = rasterize(args[0], size, force=force)
+    if not out:
+        sys.exit(1)
+    print(f"✔ {out}")
@@ -1,5 +1,7 @@
 import os
 
+from bot import media_registry
+
 def safe_send_gif(bot, chat_id, gif_path):
     """
     Sends a GIF using an absolute path (correct behavior for all commands).
@@ -11,8 +13,8 @@ def safe_send_gif(bot, chat_id, gif_path):
         return
 
     try:
-        with open(gif_path, "rb") as f:
-            bot.send_animation(chat_id, f)
+        # uploads once, then reuses the Telegram file_id
+        media_registry.send_animation(bot, chat_id, gif_path)
     except Exception as e:
         bot.send_message(
             chat_id,
@@ -10,6 +10,10 @@
 # - stable polling loop for worker mode
 # - automatic cleanup of battle_sessions.json
 # - GROKPEDIA 3-hour auto-poster (NEW)
+# - optional webhook mode (BOT_MODE=webhook) with polling fallback
+# - per-user ordered update dispatcher (UPDATE_DISPATCHER=1, default)
+# - startup profile (per-step / per-handler timings) + parallel init steps
+# - /metrics endpoint (handler / DB / Bot API latency)
 
 import os
 import sys
@@ -20,219 +24,340 @@ import importlib
 import importlib.util
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+_BOOT_T0 = time.perf_counter()
+
 from telebot import TeleBot, apihelper
 
 
 # ==============================================
-# Load API Token (supports multiple env names)
+# Startup profile
 # ==============================================
-TOKEN = (
-    os.getenv("Telegram_token") or
-    os.getenv("TELEGRAM_TOKEN") or
-    os.getenv("BOT_TOKEN") or
-    os.getenv("TOKEN")
-)
+_startup_profile = []          # (label, seconds)
+_profile_lock = threading.Lock()
 
-if not TOKEN:
-    raise RuntimeError("Missing environment variable: Telegram_token / BOT_TOKEN / TELEGRAM_TOKEN")
+def _record(label, seconds):
+    with _profile_lock:
+        _startup_profile.append((label, seconds))
 
-print(f"BOOT: PID={os.getpid()} TOKEN_PREFIX={TOKEN[:8]}…")
+def _timed(label, fn, *args):
+    t0 = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        _record(label, time.perf_counter() - t0)
+
+def print_startup_profile(top=15):
+    total = time.perf_counter() - _BOOT_T0
+    with _profile_lock:
+        rows = sorted(_startup_profile, key=lambda r: r[1], reverse=True)[:top]
+    print(f"⏱ STARTUP PROFILE — ready in {total * 1000:.0f} ms")
+    for label, seconds in rows:
+        print(f"   {seconds * 1000:8.1f} ms  {label}")
+
+_record("import telebot", time.perf_counter() - _BOOT_T0)
+
+# Independent I/O-bound init steps (webhook cleanup, session file cleanup)
+# run here while handlers import; joined before polling starts.
+_boot_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="boot")
+_boot_jobs = []
+
+def _in_background(label, fn, *args):
+    _boot_jobs.append(_boot_pool.submit(_timed, label, fn, *args))
+
+def _await_boot_jobs():
+    for job in _boot_jobs:
+        try:
+            job.result()
+        except Exception as e:
+            print("⚠ Boot step failed:", e)
+    _boot_pool.shutdown(wait=False)
 
-bot = TeleBot(TOKEN)
 
+# Render workers (services/render_service) are spawned, and spawn re-runs
+# this script in every worker as __mp_main__. Everything that boots the bot
+# stays under this guard, so a worker only gets the imports above.
+if __name__ != "__mp_main__":
+    # ==============================================
+    # Load API Token (supports multiple env names)
+    # ==============================================
+    TOKEN = (
+        os.getenv("Telegram_token") or
+        os.getenv("TELEGRAM_TOKEN") or
+        os.getenv("BOT_TOKEN") or
+        os.getenv("TOKEN")
+    )
 
-# ==============================================
-# Heartbeat (helps Render logs)
-# ==============================================
-def heartbeat():
-    while True:
-        print(f"💓 HEARTBEAT PID={os.getpid()} TIME={time.time()}")
-        time.sleep(60)
+    if not TOKEN:
+        raise RuntimeError("Missing environment variable: Telegram_token / BOT_TOKEN / TELEGRAM_TOKEN")
 
-threading.Thread(target=heartbeat, daemon=True).start()
+    # polling (default) | webhook
+    BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
 
+    # Point at a stand-in Telegram server for local testing
+    TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+    if TELEGRAM_API_BASE != "https://api.telegram.org":
+        apihelper.API_URL = TELEGRAM_API_BASE + "/bot{0}/{1}"
 
-ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
+    print(f"BOOT: PID={os.getpid()} TOKEN_PREFIX={TOKEN[:8]}… MODE={BOT_MODE}")
 
+    # Per-user ordering: updates are sharded by user onto our own workers, so
+    # TeleBot must run handlers inline (threaded=False) on those workers.
+    UPDATE_DISPATCHER = os.getenv("UPDATE_DISPATCHER", "1") == "1"
 
-# ======================================================
-# Automatic Cleanup of Corrupted Battle Sessions
-# ======================================================
-SESS_FILE = os.path.join(ROOT_DIR, "data", "battle_sessions.json")
+    bot = TeleBot(TOKEN, threaded=not UPDATE_DISPATCHER)
 
-def cleanup_battle_sessions():
-    try:
-        sess_path = Path(SESS_FILE)
-        if not sess_path.exists():
-            print("[INIT] No battle_sessions.json found — OK.")
-            return
+    if UPDATE_DISPATCHER:
+        from services import dispatcher
+        dispatcher.install(bot)
+        print(f"✔ Update dispatcher: {dispatcher.UPDATE_WORKERS} ordered shards")
 
-        with open(sess_path, "r") as f:
-            data = json.load(f)
 
-        cleaned = {}
-        removed = 0
+    # ==============================================
+    # Heartbeat (helps Render logs)
+    # ==============================================
+    def heartbeat():
+        while True:
+            print(f"💓 HEARTBEAT PID={os.getpid()} TIME={time.time()}")
+            time.sleep(60)
 
-        for uid, sess in data.items():
-            if not isinstance(sess, dict):
-                removed += 1
-                continue
+    threading.Thread(target=heartbeat, daemon=True).start()
 
-            # Required keys for a valid session
-            if (
-                "player" not in sess or
-                "mob" not in sess or
-                "player_hp" not in sess or
-                "mob_hp" not in sess
-            ):
-                removed += 1
-                continue
 
-            cleaned[uid] = sess
+    ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
 
-        with open(sess_path, "w") as f:
-            json.dump(cleaned, f, indent=2)
 
-        print(f"[INIT] battle_sessions.json cleaned → {len(cleaned)} kept, {removed} removed.")
+    # ======================================================
+    # Automatic Cleanup of Corrupted Battle Sessions
+    # ======================================================
+    SESS_FILE = os.path.join(ROOT_DIR, "data", "battle_sessions.json")
 
-    except Exception as e:
-        print(f"[INIT] Error cleaning battle_sessions.json: {e}")
+    def cleanup_battle_sessions():
+        try:
+            sess_path = Path(SESS_FILE)
+            if not sess_path.exists():
+                print("[INIT] No battle_sessions.json found — OK.")
+                return
 
-cleanup_battle_sessions()
+            with open(sess_path, "r") as f:
+                data = json.load(f)
 
+            cleaned = {}
+            removed = 0
 
-# ==============================================
-# Webhook cleanup
-# ==============================================
-def safe_delete_webhook():
-    try:
-        r = requests.get(f"https://api.telegram.org/bot{TOKEN}/deleteWebhook", timeout=10)
-        print("deleteWebhook ->", r.status_code, r.text)
-    except Exception as e:
-        print("⚠ Could not delete webhook:", e)
+            for uid, sess in data.items():
+                if not isinstance(sess, dict):
+                    removed += 1
+                    continue
 
-safe_delete_webhook()
+                # Required keys for a valid session
+                if (
+                    "player" not in sess or
+                    "mob" not in sess or
+                    "player_hp" not in sess or
+                    "mob_hp" not in sess
+                ):
+                    removed += 1
+                    continue
 
+                cleaned[uid] = sess
 
-# ==============================================
-# Graceful Shutdown
-# ==============================================
-_shutdown = False
+            with open(sess_path, "w") as f:
+                json.dump(cleaned, f, indent=2)
 
-def shutdown_handler(signum, frame):
-    global _shutdown
-    print(f"🔻 Received shutdown signal ({signum}), stopping bot…")
-    _shutdown = True
+            print(f"[INIT] battle_sessions.json cleaned → {len(cleaned)} kept, {removed} removed.")
 
-    try:
-        bot.stop_polling()
-        print("stop_polling() called")
-    except Exception as e:
-        print("⚠ stop_polling error:", e)
-
-    safe_delete_webhook()
-    print("Shutdown complete.")
-    sys.exit(0)
-
-signal.signal(signal.SIGTERM, shutdown_handler)
-signal.signal(signal.SIGINT, shutdown_handler)
+        except Exception as e:
+            print(f"[INIT] Error cleaning battle_sessions.json: {e}")
 
+    _in_background("cleanup battle_sessions.json", cleanup_battle_sessions)
 
-# ==============================================
-# Load Legacy Commands
-# ==============================================
-def load_legacy_commands():
-    loaded = False
 
-    try:
-        import bot.commands as legacy
-        if hasattr(legacy, "register_handlers"):
-            legacy.register_handlers(bot)
-            loaded = True
-            print("✔ Loaded bot/commands.py")
+    # ==============================================
+    # Webhook cleanup
+    # ==============================================
+    def safe_delete_webhook():
+        try:
+            r = requests.get(f"{TELEGRAM_API_BASE}/bot{TOKEN}/deleteWebhook", timeout=10)
+            print("deleteWebhook ->", r.status_code, r.text)
+        except Exception as e:
+            print("⚠ Could not delete webhook:", e)
+
+    # webhook mode registers its own webhook on start; another replica's
+    # webhook must not be torn down by this one booting
+    if BOT_MODE != "webhook":
+        _in_background("deleteWebhook", safe_delete_webhook)
+
+
+    # ==============================================
+    # Graceful Shutdown
+    # ==============================================
+    _shutdown = False
+    _webhook_active = False
+
+    def shutdown_handler(signum, frame):
+        global _shutdown
+        print(f"🔻 Received shutdown signal ({signum}), stopping bot…")
+        _shutdown = True
+
+        if _webhook_active:
+            # leave the webhook registered: other replicas keep receiving
+            from services import webhook_server
+            webhook_server.stop()
+            print("Webhook server stopped")
         else:
-            print("⚠ bot/commands.py exists but has no register_handlers(bot)")
-    except Exception as e:
-        print("⚠ Import bot.commands failed:", e)
-
-    if not loaded:
-        legacy_path = os.path.join(ROOT_DIR, "bot", "commands.py")
-        if os.path.exists(legacy_path):
             try:
-                spec = importlib.util.spec_from_file_location("legacy_commands", legacy_path)
-                legacy = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(legacy)
-
-                if hasattr(legacy, "register_handlers"):
-                    legacy.register_handlers(bot)
-                    print("✔ Loaded legacy commands via file load")
-                else:
-                    print("⚠ No register_handlers(bot) in commands.py")
+                bot.stop_polling()
+                print("stop_polling() called")
             except Exception as e:
-                print("❌ Failed executing commands.py:", e)
-        else:
-            print("⚠ No commands.py found")
+                print("⚠ stop_polling error:", e)
 
-load_legacy_commands()
+            safe_delete_webhook()
 
+        try:
+            from services import render_service
+            render_service.shutdown()
+        except Exception as e:
+            print("⚠ render service shutdown error:", e)
+        print("Shutdown complete.")
+        sys.exit(0)
 
-# ==============================================
-# Load Modular Handlers
-# ==============================================
-def load_modular_handlers():
-    handlers_dir = os.path.join(ROOT_DIR, "bot", "handlers")
-
-    if not os.path.isdir(handlers_dir):
-        print(f"⚠ No handlers directory found at {handlers_dir}")
-        return
+    signal.signal(signal.SIGTERM, shutdown_handler)
+    signal.signal(signal.SIGINT, shutdown_handler)
 
-    for filename in os.listdir(handlers_dir):
-        if not filename.endswith(".py") or filename.startswith("_"):
-            continue
 
-        module_name = f"bot.handlers.{filename[:-3]}"
-        file_path = os.path.join(handlers_dir, filename)
+    # ==============================================
+    # Load Legacy Commands
+    # ==============================================
+    def load_legacy_commands():
+        loaded = False
 
         try:
-            module = importlib.import_module(module_name)
-            if hasattr(module, "setup"):
-                module.setup(bot)
-                print(f"✔ Loaded handler: {module_name}")
+            import bot.commands as legacy
+            if hasattr(legacy, "register_handlers"):
+                from services.handler_registry import setup_once
+                setup_once(bot, legacy.register_handlers, "bot.commands")
+                loaded = True
+                print("✔ Loaded bot/commands.py")
             else:
-                print(f"⚠ No setup(bot) in {module_name}")
+                print("⚠ bot/commands.py exists but has no register_handlers(bot)")
         except Exception as e:
-            print(f"⚠ Import failed for {module_name}: {e}")
-            print("Trying file-based load…")
+            print("⚠ Import bot.commands failed:", e)
+
+        if not loaded:
+            legacy_path = os.path.join(ROOT_DIR, "bot", "commands.py")
+            if os.path.exists(legacy_path):
+                try:
+                    spec = importlib.util.spec_from_file_location("legacy_commands", legacy_path)
+                    legacy = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(legacy)
+
+                    if hasattr(legacy, "register_handlers"):
+                        from services.handler_registry import setup_once
+                        setup_once(bot, legacy.register_handlers, "bot.commands")
+                        print("✔ Loaded legacy commands via file load")
+                    else:
+                        print("⚠ No register_handlers(bot) in commands.py")
+                except Exception as e:
+                    print("❌ Failed executing commands.py:", e)
+            else:
+                print("⚠ No commands.py found")
 
-            try:
-                spec = importlib.util.spec_from_file_location(module_name, file_path)
-                mod = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(mod)
+    _timed("legacy commands", load_legacy_commands)
+
+
+    # ==============================================
+    # Load Modular Handlers
+    # ==============================================
+    def load_modular_handlers():
+        handlers_dir = os.path.join(ROOT_DIR, "bot", "handlers")
+
+        if not os.path.isdir(handlers_dir):
+            print(f"⚠ No handlers directory found at {handlers_dir}")
+            return
+
+        from services.handler_registry import setup_once
+
+        for filename in sorted(os.listdir(handlers_dir)):
+            if not filename.endswith(".py") or filename.startswith("_"):
+                continue
+
+            module_name = f"bot.handlers.{filename[:-3]}"
+            file_path = os.path.join(handlers_dir, filename)
 
-                if hasattr(mod, "setup"):
-                    mod.setup(bot)
-                    print(f"✔ Loaded handler file: {file_path}")
+            try:
+                module = _timed(f"import {module_name}", importlib.import_module, module_name)
+                if hasattr(module, "setup"):
+                    if _timed(f"setup  {module_name}", setup_once, bot, module.setup, module_name):
+                        print(f"✔ Loaded handler: {module_name}")
                 else:
-                    print(f"⚠ No setup(bot) in handler file {filename}")
-            except Exception as e2:
-                print(f"❌ Failed loading handler: {file_path}: {e2}")
+                    print(f"⚠ No setup(bot) in {module_name}")
+            except Exception as e:
+                print(f"⚠ Import failed for {module_name}: {e}")
+                print("Trying file-based load…")
 
-load_modular_handlers()
+                try:
+                    spec = importlib.util.spec_from_file_location(module_name, file_path)
+                    mod = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(mod)
 
+                    if hasattr(mod, "setup"):
+                        if setup_once(bot, mod.setup, module_name):
+                            print(f"✔ Loaded handler file: {file_path}")
+                    else:
+                        print(f"⚠ No setup(bot) in handler file {filename}")
+                except Exception as e2:
+                    print(f"❌ Failed loading handler: {file_path}: {e2}")
+
+    _timed("modular handlers (total)", load_modular_handlers)
+
+    try:
+        from services import handler_registry
+        handler_registry.report(bot)
+    except Exception as e:
+        print("⚠ Handler table report failed:", e)
+
+    # ==============================================
+    # Metrics: wrap handlers, DB + API timing, /metrics endpoint
+    # ==============================================
+    try:
+        from services import metrics
+        wrapped = _timed("metrics", metrics.install, bot)
+        print(f"✔ Metrics instrumentation on {wrapped} handlers")
+    except Exception as e:
+        print("⚠ Metrics setup failed:", e)
+
+    # Opt-in SQL profiler + slow-query log (SQL_PROFILE=1)
+    try:
+        from services import sql_profiler
+        if sql_profiler.SQL_PROFILE:
+            sql_profiler.enable()
+    except Exception as e:
+        print("⚠ SQL profiler setup failed:", e)
 
-# ==============================================
-# ⏰ GROKPEDIA: Start 3-hour Auto-Poster (NEW)
-# ==============================================
-try:
-    from services import scheduler
-    scheduler.start_grokpedia_autopost(bot)
-    print("✔ Grokpedia scheduler initialized.")
-except Exception as e:
-    print("⚠ Failed to start Grokpedia scheduler:", e)
+
+    # ==============================================
+    # ⏰ GROKPEDIA: Start 3-hour Auto-Poster (NEW)
+    # ==============================================
+    try:
+        from services import scheduler
+        _timed("grokpedia scheduler", scheduler.start_grokpedia_autopost, bot)
+        print("✔ Grokpedia scheduler initialized.")
+    except Exception as e:
+        print("⚠ Failed to start Grokpedia scheduler:", e)
+
+
+    # render worker processes: started now rather than on the first /profile
+    try:
+        from services import render_service
+        _timed("render workers", render_service.start)
+        print(f"✔ Render service: {render_service.RENDER_WORKERS} workers")
+    except Exception as e:
+        print("⚠ Render service start failed:", e)
 
 
 # ==============================================
@@ -266,5 +391,28 @@ def run_polling():
         backoff = min(max_backoff, backoff * 2)
 
 
+# ==============================================
+# Webhook mode (falls back to polling)
+# ==============================================
+def run_webhook():
+    global _webhook_active
+    from services import webhook_server
+
+    if not webhook_server.start(bot, TOKEN):
+        print("⚠ Webhook mode unavailable → falling back to polling")
+        safe_delete_webhook()
+        run_polling()
+        return
+
+    _webhook_active = True
+    while not _shutdown:
+        time.sleep(1)
+
+
 if __name__ == "__main__":
-    run_polling()
+    _await_boot_jobs()
+    print_startup_profile()
+    if BOT_MODE == "webhook":
+        run_webhook()
+    else:
+        run_polling()
@@ -0,0 +1,324 @@
+# services/broadcast.py
+"""
+Resumable DM broadcast engine (used by /notifyusers).
+
+- A job walks the users table in user_id order, BROADCAST_BATCH ids at a
+  time. The cursor (last user_id of the last fully finished batch) is
+  persisted to BROADCAST_STATE_PATH after every batch, so a restart resumes
+  where it left off (at most one batch is re-sent).
+- Sends go through services.outbound on the BROADCAST lane: concurrent
+  workers, shared + per-chat token buckets, 429 retry_after handled there.
+- Transient errors (network, 5xx) are retried here with exponential
+  backoff, up to BROADCAST_MAX_ATTEMPTS.
+- Users that blocked the bot / deleted their account are added to a
+  persisted blacklist and skipped by every later broadcast.
+- The admin's status message is edited every BROADCAST_PROGRESS_SECONDS
+  with a live progress line.
+
+Usage:
+    from services import broadcast
+    job = broadcast.start(bot, actor_id, html, status_chat_id, status_msg_id)
+    broadcast.resume_pending(bot)       # once at startup
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from typing import Any, Dict, List, Optional
+
+import bot.db as db
+from services import outbound
+from services.audit_log import log_admin_action
+
+BROADCAST_STATE_PATH = os.getenv("BROADCAST_STATE_PATH", "/var/data/broadcasts.json")
+BROADCAST_BATCH = int(os.getenv("BROADCAST_BATCH", "100"))
+BROADCAST_MAX_ATTEMPTS = int(os.getenv("BROADCAST_MAX_ATTEMPTS", "4"))
+BROADCAST_PROGRESS_SECONDS = float(os.getenv("BROADCAST_PROGRESS_SECONDS", "5"))
+
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_CANCELLED = "cancelled"
+
+# Telegram errors that mean "this user will never receive a DM from us"
+_BLOCKED_MARKERS = (
+    "bot was blocked by the user",
+    "user is deactivated",
+    "chat not found",
+    "bot can't initiate conversation",
+    "bot was kicked",
+)
+
+_lock = threading.RLock()
+_state: Optional[Dict[str, Any]] = None   # {"jobs": {id: job}, "blocked": [uid, ...]}
+_blocked: set = set()
+_cancel: Dict[str, threading.Event] = {}
+
+
+# -------------------------------------------------
+# Persistence
+# -------------------------------------------------
+def _load() -> Dict[str, Any]:
+    global _state, _blocked
+    if _state is not None:
+        return _state
+    data = {}
+    try:
+        if os.path.exists(BROADCAST_STATE_PATH):
+            with open(BROADCAST_STATE_PATH, "r") as f:
+                data = json.load(f) or {}
+    except Exception as e:
+        print("⚠ [BROADCAST] could not read state:", e)
+    data.setdefault("jobs", {})
+    data.setdefault("blocked", [])
+    _state = data
+    _blocked = set(int(u) for u in data["blocked"])
+    return _state
+
+
+def _save():
+    """Atomic write of the job table + blacklist. Caller holds _lock."""
+    state = _load()
+    state["blocked"] = sorted(_blocked)
+    try:
+        os.makedirs(os.path.dirname(BROADCAST_STATE_PATH) or ".", exist_ok=True)
+        tmp = f"{BROADCAST_STATE_PATH}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, BROADCAST_STATE_PATH)
+    except Exception as e:
+        print("⚠ [BROADCAST] could not save state:", e)
+
+
+def _is_blocked_error(exc: Exception) -> bool:
+    if getattr(exc, "error_code", None) == 403:
+        return True
+    msg = str(exc).lower()
+    return any(m in msg for m in _BLOCKED_MARKERS)
+
+
+def _is_permanent_error(exc: Exception) -> bool:
+    """4xx other than 429 won't get better by retrying (bad HTML, etc.)."""
+    code = getattr(exc, "error_code", None)
+    return isinstance(code, int) and 400 <= code < 500 and code != 429
+
+
+# -------------------------------------------------
+# Public API
+# -------------------------------------------------
+def blocked_count() -> int:
+    with _lock:
+        _load()
+        return len(_blocked)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        job = _load()["jobs"].get(job_id)
+        return dict(job) if job else None
+
+
+def list_jobs(state: Optional[str] = None) -> List[Dict[str, Any]]:
+    with _lock:
+        jobs = _load()["jobs"].values()
+        return [dict(j) for j in jobs if state is None or j["state"] == state]
+
+
+def start(bot, actor_id: int, html: str, status_chat_id: int,
+          status_message_id: int, parse_mode: str = "HTML") -> Dict[str, Any]:
+    """Create and start a broadcast job. Returns a copy of the job record."""
+    with _lock:
+        _load()
+        total = db.count_users()
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "actor_id": actor_id,
+            "html": html,
+            "parse_mode": parse_mode,
+            "status_chat_id": status_chat_id,
+            "status_message_id": status_message_id,
+            "cursor": 0,
+            "total": total,
+            "sent": 0,
+            "failed": 0,
+            "blocked": 0,
+            "skipped": 0,
+            "state": STATE_RUNNING,
+            "created_at": int(time.time()),
+            "updated_at": int(time.time()),
+        }
+        _state["jobs"][job["id"]] = job
+        _save()
+    _spawn(bot, job["id"])
+    return dict(job)
+
+
+def cancel(job_id: str) -> bool:
+    with _lock:
+        job = _load()["jobs"].get(job_id)
+        if not job or job["state"] != STATE_RUNNING:
+            return False
+        job["state"] = STATE_CANCELLED
+        _save()
+        ev = _cancel.get(job_id)
+    if ev:
+        ev.set()
+    return True
+
+
+def resume_pending(bot) -> int:
+    """Restart every job left RUNNING by a previous process."""
+    with _lock:
+        ids = [j["id"] for j in _load()["jobs"].values() if j["state"] == STATE_RUNNING]
+    for job_id in ids:
+        print(f"[BROADCAST] resuming job {job_id}")
+        _spawn(bot, job_id)
+    return len(ids)
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+def _spawn(bot, job_id: str):
+    with _lock:
+        if job_id in _cancel:
+            return  # already running in this process
+        _cancel[job_id] = threading.Event()
+    threading.Thread(target=_run, args=(bot, job_id), name=f"broadcast-{job_id}",
+                     daemon=True).start()
+
+
+def _progress_text(job: Dict[str, Any]) -> str:
+    done = job["sent"] + job["failed"] + job["blocked"] + job["skipped"]
+    total = max(job["total"], done)
+    pct = int(done * 100 / total) if total else 100
+
+    if job["state"] == STATE_DONE:
+        head = "✅ <b>User notification sent</b>"
+    elif job["state"] == STATE_CANCELLED:
+        head = "❌ <b>User notification cancelled</b>"
+    else:
+        head = f"📨 <b>Sending user notification…</b> {pct}%"
+
+    return (
+        f"{head}\n\n"
+        f"Delivered: <b>{job['sent']}</b>\n"
+        f"Failed: <b>{job['failed']}</b>\n"
+        f"Blocked / gone: <b>{job['blocked'] + job['skipped']}</b>\n"
+        f"Progress: <b>{done}</b> / <b>{total}</b>"
+    )
+
+
+def _update_status(bot, job: Dict[str, Any], final: bool = False):
+    kwargs = {"parse_mode": "HTML"}
+    if not final and job["state"] == STATE_RUNNING:
+        from telebot import types
+        kb = types.InlineKeyboardMarkup()
+        kb.add(types.InlineKeyboardButton("⏹ Stop", callback_data=f"notifyusers_stop:{job['id']}"))
+        kwargs["reply_markup"] = kb
+    outbound.edit_message_text(
+        bot, _progress_text(job), job["status_chat_id"], job["status_message_id"],
+        **kwargs
+    )
+
+
+def _send_batch(bot, job: Dict[str, Any], user_ids: List[int], stop: threading.Event):
+    """Send one batch and block until every message settled (or stop)."""
+    pending = {"n": len(user_ids)}
+    settled = threading.Event()
+    counts_lock = threading.Lock()
+
+    def _settle(field: str, uid: Optional[int] = None):
+        with counts_lock:
+            with _lock:
+                job[field] += 1
+                if uid is not None:
+                    _blocked.add(uid)
+            pending["n"] -= 1
+            if pending["n"] <= 0:
+                settled.set()
+
+    def _submit(uid: int, attempt: int):
+        def _ok(_result):
+            _settle("sent")
+
+        def _err(exc):
+            if _is_blocked_error(exc):
+                _settle("blocked", uid)
+            elif attempt < BROADCAST_MAX_ATTEMPTS and not _is_permanent_error(exc) and not stop.is_set():
+                delay = min(30.0, 2 ** attempt)
+                threading.Timer(delay, _submit, args=(uid, attempt + 1)).start()
+            else:
+                _settle("failed")
+
+        outbound.send_message(
+            bot, uid, job["html"], parse_mode=job["parse_mode"],
+            priority=outbound.BROADCAST, on_done=_ok, on_error=_err
+        )
+
+    if not user_ids:
+        return
+    for uid in user_ids:
+        _submit(uid, 1)
+
+    last_progress = time.time()
+    while not settled.wait(timeout=1.0):
+        if stop.is_set():
+            return
+        if time.time() - last_progress >= BROADCAST_PROGRESS_SECONDS:
+            _update_status(bot, job)
+            last_progress = time.time()
+
+
+def _run(bot, job_id: str):
+    stop = _cancel[job_id]
+    try:
+        with _lock:
+            job = _load()["jobs"].get(job_id)
+        if not job:
+            return
+
+        _update_status(bot, job)
+        last_progress = time.time()
+
+        while not stop.is_set():
+            ids = db.get_user_ids_after(job["cursor"], BROADCAST_BATCH)
+            if not ids:
+                break
+
+            with _lock:
+                targets = [u for u in ids if u not in _blocked]
+                job["skipped"] += len(ids) - len(targets)
+
+            _send_batch(bot, job, targets, stop)
+            if stop.is_set():
+                break
+
+            with _lock:
+                job["cursor"] = ids[-1]
+                job["updated_at"] = int(time.time())
+                _save()
+
+            if time.time() - last_progress >= BROADCAST_PROGRESS_SECONDS:
+                _update_status(bot, job)
+                last_progress = time.time()
+
+        with _lock:
+            if job["state"] == STATE_RUNNING:
+                job["state"] = STATE_DONE
+            job["updated_at"] = int(time.time())
+            _save()
+
+        log_admin_action(
+            job["actor_id"],
+            "notify_users_html",
+            {"job": job_id, "state": job["state"], "sent": job["sent"],
+             "failed": job["failed"], "blocked": job["blocked"] + job["skipped"]}
+        )
+        _update_status(bot, job, final=True)
+    except Exception as e:
+        print(f"⚠ [BROADCAST] job {job_id} crashed: {e!r}")
+    finally:
+        with _lock:
+            _cancel.pop(job_id, None)
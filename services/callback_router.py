@@ -0,0 +1,168 @@
+# services/callback_router.py
+"""
+Central callback_query router.
+
+Instead of ~25 `func=lambda c: c.data.startswith(...)` predicates that
+telebot evaluates one by one for every button tap, handlers register a
+prefix here and a single telebot handler dispatches by table lookup:
+
+- exact routes: one dict lookup on the full callback data
+- prefix routes: dict lookups on data[:n] for each distinct prefix length,
+  longest first (so "pvp:act" beats a hypothetical "pvp:")
+- cost depends on the number of distinct prefix lengths (a handful),
+  not on the number of handlers
+
+Usage (inside a handler module's setup(bot)):
+    from services import callback_router
+
+    @callback_router.route(bot, "pvp:act")
+    def cb_action(call): ...
+
+    @callback_router.route(bot, "pinggroup_send", exact=True)
+    def send_ping(call): ...
+
+stats() reports count / avg / max ms per route and unrouted taps.
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services import metrics
+
+Handler = Callable[[Any], Any]
+
+
+class CallbackRouter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._exact: Dict[str, Handler] = {}
+        self._prefix: Dict[str, Handler] = {}
+        self._lengths: List[int] = []           # distinct prefix lengths, desc
+        self._stats: Dict[str, List[float]] = {}  # route -> [count, total_ms, max_ms, errors]
+        self._bots = set()
+        self.unrouted = 0
+
+    # ---------------------------------------------
+    # Registration
+    # ---------------------------------------------
+    def add(self, pattern: str, fn: Handler, exact: bool = False):
+        with self._lock:
+            table = self._exact if exact else self._prefix
+            if pattern in table and table[pattern] is not fn:
+                print(f"⚠ [ROUTER] callback route {pattern!r} re-registered")
+            table[pattern] = fn
+            if not exact:
+                self._lengths = sorted({len(p) for p in self._prefix}, reverse=True)
+
+    def attach(self, bot):
+        """Register the single telebot callback handler (once per bot)."""
+        with self._lock:
+            if id(bot) in self._bots:
+                return
+            self._bots.add(id(bot))
+
+        def dispatch(call):
+            return self._dispatch(call)
+        dispatch._metrics_self_timed = True   # per-route timing below
+        bot.callback_query_handler(func=self._matches)(dispatch)
+
+    def route(self, bot, pattern: str, exact: bool = False):
+        def deco(fn: Handler) -> Handler:
+            self.add(pattern, fn, exact)
+            self.attach(bot)
+            return fn
+        return deco
+
+    # ---------------------------------------------
+    # Lookup / dispatch
+    # ---------------------------------------------
+    def match(self, data: Optional[str]) -> Optional[Tuple[str, Handler]]:
+        if not data:
+            return None
+        fn = self._exact.get(data)
+        if fn is not None:
+            return data, fn
+        for n in self._lengths:
+            if n > len(data):
+                continue
+            key = data[:n]
+            fn = self._prefix.get(key)
+            if fn is not None:
+                return key, fn
+        return None
+
+    def _matches(self, call) -> bool:
+        hit = self.match(getattr(call, "data", None))
+        if hit is None:
+            with self._lock:
+                self.unrouted += 1
+            return False
+        try:
+            call._route = hit  # parsed once; _dispatch reuses it
+        except Exception:
+            pass
+        return True
+
+    def _dispatch(self, call):
+        hit = getattr(call, "_route", None) or self.match(call.data)
+        if hit is None:
+            return None
+        route, fn = hit
+        t0 = time.perf_counter()
+        failed = False
+        try:
+            with metrics.track(f"cb:{route}"):
+                return fn(call)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                s = self._stats.setdefault(route, [0, 0.0, 0.0, 0])
+                s[0] += 1
+                s[1] += ms
+                s[2] = max(s[2], ms)
+                if failed:
+                    s[3] += 1
+
+    def routes(self) -> List[str]:
+        with self._lock:
+            return list(self._exact) + list(self._prefix)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                r: {"count": int(c), "avg_ms": round(t / c, 2) if c else 0.0,
+                    "max_ms": round(m, 2), "errors": int(e)}
+                for r, (c, t, m, e) in self._stats.items()
+            }
+            return {
+                "routes": len(self._exact) + len(self._prefix),
+                "prefix_lengths": len(self._lengths),
+                "unrouted": self.unrouted,
+                "by_route": routes,
+            }
+
+
+# -------------------------------------------------
+# Module-level singleton
+# -------------------------------------------------
+_router = CallbackRouter()
+
+
+def route(bot, pattern: str, exact: bool = False):
+    return _router.route(bot, pattern, exact)
+
+
+def routes() -> List[str]:
+    return _router.routes()
+
+
+def match(data: Optional[str]):
+    return _router.match(data)
+
+
+def stats() -> Dict[str, Any]:
+    return _router.stats()
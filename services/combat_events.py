@@ -0,0 +1,260 @@
+# services/combat_events.py
+# Shared combat event record + pluggable sinks for every fight engine.
+#
+# - CombatEvent: compact __slots__ record used by fightsystem, FightSession,
+#   PvPFightSession and BattleSession (one shape for all of them)
+# - Read access stays dict-like (ev["actor"], ev.get("note")) so existing
+#   handlers keep working unchanged
+# - Sinks:
+#     RingSink            in-memory ring buffer (recent events, debugging)
+#     SessionSink         newest-first bounded list on a session (persisted)
+#     AnalyticsFileSink   JSON-lines appender for offline analytics
+#
+# Global sinks receive every published event. The analytics file sink is
+# enabled automatically when COMBAT_ANALYTICS_FILE is set.
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+ANALYTICS_ENV = "COMBAT_ANALYTICS_FILE"
+
+
+# -------------------------------------------------
+# Event record
+# -------------------------------------------------
+class CombatEvent:
+    """
+    One combat action. Core fields are always persisted; the optional
+    fields (target, target_hp, dodged, crit) only when set.
+    `kind` and `sid` describe the source fight and are never written
+    to session JSON.
+    """
+    __slots__ = (
+        "turn", "actor", "action", "damage", "note",
+        "target", "target_hp", "dodged", "crit", "ts",
+        "kind", "sid",
+    )
+
+    def __init__(self, actor: str, action: str, damage: Optional[int] = None, note: str = "",
+                 turn: int = 0, target: Optional[str] = None, target_hp: Optional[int] = None,
+                 dodged: bool = False, crit: bool = False, ts: int = 0,
+                 kind: str = "", sid: Optional[str] = None):
+        self.turn = turn
+        self.actor = actor
+        self.action = action
+        self.damage = damage
+        self.note = note
+        self.target = target
+        self.target_hp = target_hp
+        self.dodged = dodged
+        self.crit = crit
+        self.ts = ts
+        self.kind = kind
+        self.sid = sid
+
+    # ---------------------
+    # dict-style read access (legacy event shape)
+    # ---------------------
+    def __getitem__(self, key: str):
+        if key in _PUBLIC_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _PUBLIC_FIELDS
+
+    def get(self, key: str, default=None):
+        if key in _PUBLIC_FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __repr__(self) -> str:
+        return (f"CombatEvent(turn={self.turn}, actor={self.actor!r}, action={self.action!r}, "
+                f"damage={self.damage!r}, note={self.note!r})")
+
+    # ---------------------
+    # serialization
+    # ---------------------
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "actor": self.actor,
+            "action": self.action,
+            "damage": self.damage,
+            "note": self.note,
+            "turn": self.turn,
+            "ts": self.ts,
+        }
+        if self.target is not None:
+            data["target"] = self.target
+        if self.target_hp is not None:
+            data["target_hp"] = self.target_hp
+        if self.dodged:
+            data["dodged"] = True
+        if self.crit:
+            data["crit"] = True
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CombatEvent":
+        if isinstance(data, cls):
+            return data
+        return cls(
+            data.get("actor", ""),
+            data.get("action", ""),
+            data.get("damage"),
+            data.get("note", "") or "",
+            turn=data.get("turn", 0),
+            target=data.get("target"),
+            target_hp=data.get("target_hp"),
+            dodged=bool(data.get("dodged", False)),
+            crit=bool(data.get("crit", False)),
+            ts=data.get("ts", 0) or 0,
+        )
+
+
+_PUBLIC_FIELDS = frozenset(CombatEvent.__slots__) - {"kind", "sid"}
+
+
+def events_to_list(events) -> List[Dict[str, Any]]:
+    """Serialize a session event list (events or legacy dicts) for JSON."""
+    return [e.to_dict() if isinstance(e, CombatEvent) else e for e in events or []]
+
+
+def events_from_list(raw) -> List[CombatEvent]:
+    """Rebuild a session event list from JSON (legacy dicts accepted)."""
+    return [CombatEvent.from_dict(e) for e in raw or [] if isinstance(e, (dict, CombatEvent))]
+
+
+# -------------------------------------------------
+# Sinks
+# -------------------------------------------------
+class EventSink:
+    """Base sink. Subclasses implement emit(); close() is optional."""
+
+    def emit(self, event: CombatEvent) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class RingSink(EventSink):
+    """Keeps the last `size` events in memory."""
+
+    def __init__(self, size: int = 500):
+        self._buf = deque(maxlen=size)
+
+    def emit(self, event: CombatEvent) -> None:
+        self._buf.append(event)
+
+    def recent(self, n: Optional[int] = None) -> List[CombatEvent]:
+        items = list(self._buf)
+        return items if n is None else items[-n:]
+
+    def clear(self) -> None:
+        self._buf.clear()
+
+
+class SessionSink(EventSink):
+    """
+    Writes into `session.events` newest-first and keeps it bounded.
+    Holds the session (not the list) because from_dict replaces the list.
+    """
+
+    def __init__(self, session, limit: int = 40):
+        self.session = session
+        self.limit = limit
+
+    def emit(self, event: CombatEvent) -> None:
+        events = self.session.events
+        events.insert(0, event)
+        if len(events) > self.limit:
+            del events[self.limit:]
+
+
+class AnalyticsFileSink(EventSink):
+    """
+    Appends events as JSON lines. Lines are buffered and flushed every
+    `flush_every` events (and at interpreter exit).
+    """
+
+    def __init__(self, path: str, flush_every: int = 64):
+        self.path = path
+        self.flush_every = max(1, int(flush_every))
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        atexit.register(self.close)
+
+    def emit(self, event: CombatEvent) -> None:
+        rec = event.to_dict()
+        rec["kind"] = event.kind
+        if event.sid is not None:
+            rec["sid"] = event.sid
+        if not rec["ts"]:
+            rec["ts"] = int(time.time())
+        line = json.dumps(rec, separators=(",", ":"))
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(self._pending) + "\n")
+        except Exception as e:
+            print("⚠ [COMBAT] analytics write failed:", e)
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+# -------------------------------------------------
+# Global stream
+# -------------------------------------------------
+_GLOBAL_SINKS: List[EventSink] = []
+
+
+def add_sink(sink: EventSink) -> EventSink:
+    if sink not in _GLOBAL_SINKS:
+        _GLOBAL_SINKS.append(sink)
+    return sink
+
+
+def remove_sink(sink: EventSink) -> None:
+    try:
+        _GLOBAL_SINKS.remove(sink)
+    except ValueError:
+        pass
+
+
+def publish(event: CombatEvent, *local_sinks: EventSink) -> CombatEvent:
+    """Send an event to the given local sinks, then to every global sink."""
+    for sink in local_sinks:
+        sink.emit(event)
+    for sink in _GLOBAL_SINKS:
+        try:
+            sink.emit(event)
+        except Exception as e:
+            print("⚠ [COMBAT] sink error:", e)
+    return event
+
+
+_analytics_path = os.getenv(ANALYTICS_ENV)
+if _analytics_path:
+    add_sink(AnalyticsFileSink(_analytics_path))
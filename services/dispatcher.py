@@ -0,0 +1,161 @@
+# services/dispatcher.py
+"""
+Per-user ordered update dispatcher.
+
+TeleBot's threaded mode hands every update to a shared pool, so two fast
+taps from the same user can run concurrently and race on
+load_session_by_sid / save_session. Here every update is sharded by
+user_id onto a fixed set of worker threads (one FIFO queue each):
+
+- same user → same shard → handled strictly in arrival order
+- different users → spread across UPDATE_WORKERS shards, fully parallel
+- each shard queue holds UPDATE_QUEUE_MAX updates; producers (polling
+  thread / webhook workers) block when it is full → natural backpressure
+
+install(bot) wraps bot.process_new_updates, so both polling and the
+webhook server go through it. The bot must be created with
+threaded=False, otherwise TeleBot re-dispatches onto its own pool.
+
+stats() exposes per-shard queue depth plus lag (enqueue → handler start)
+and handler time.
+"""
+
+import os
+import time
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+UPDATE_QUEUE_MAX = int(os.getenv("UPDATE_QUEUE_MAX", "500"))
+
+_UPDATE_FIELDS = (
+    "callback_query", "message", "edited_message", "inline_query",
+    "chosen_inline_result", "pre_checkout_query", "shipping_query",
+    "poll_answer", "my_chat_member", "chat_member", "chat_join_request",
+    "channel_post", "edited_channel_post",
+)
+
+
+def update_key(update) -> Any:
+    """Shard key: the acting user's id, else the chat id, else update_id."""
+    for field in _UPDATE_FIELDS:
+        obj = getattr(update, field, None)
+        if obj is None:
+            continue
+        user = getattr(obj, "from_user", None) or getattr(obj, "user", None)
+        if user is not None and getattr(user, "id", None) is not None:
+            return user.id
+        chat = getattr(obj, "chat", None)
+        if chat is None:
+            msg = getattr(obj, "message", None)
+            chat = getattr(msg, "chat", None)
+        if chat is not None:
+            return chat.id
+    return getattr(update, "update_id", 0)
+
+
+class UpdateDispatcher:
+    def __init__(self, handle: Callable[[List[Any]], None],
+                 workers: int = UPDATE_WORKERS,
+                 queue_max: int = UPDATE_QUEUE_MAX,
+                 key_fn: Callable[[Any], Any] = update_key):
+        self.handle = handle
+        self.key_fn = key_fn
+        self.workers = max(1, workers)
+        self._queues = [queue.Queue(maxsize=max(1, queue_max)) for _ in range(self.workers)]
+        self._lock = threading.Lock()
+        self._processed = [0] * self.workers
+        self._errors = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._busy_sum = 0.0
+        self._threads = []
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, args=(i,), name=f"update-{i}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def shard_of(self, key: Any) -> int:
+        return hash(key) % self.workers
+
+    def submit(self, updates: List[Any]):
+        for update in updates:
+            try:
+                key = self.key_fn(update)
+            except Exception:
+                key = getattr(update, "update_id", 0)
+            self._queues[self.shard_of(key)].put((time.monotonic(), update))
+
+    def _run(self, idx: int):
+        q = self._queues[idx]
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            enq, update = item
+            start = time.monotonic()
+            try:
+                self.handle([update])
+            except Exception:
+                traceback.print_exc()
+                with self._lock:
+                    self._errors += 1
+            end = time.monotonic()
+            with self._lock:
+                lag = start - enq
+                self._processed[idx] += 1
+                self._lag_sum += lag
+                self._lag_max = max(self._lag_max, lag)
+                self._busy_sum += end - start
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            processed = sum(self._processed)
+            return {
+                "workers": self.workers,
+                "depth": [q.qsize() for q in self._queues],
+                "queued": sum(q.qsize() for q in self._queues),
+                "processed": processed,
+                "errors": self._errors,
+                "lag_avg_ms": round(self._lag_sum * 1000 / processed, 2) if processed else 0.0,
+                "lag_max_ms": round(self._lag_max * 1000, 2),
+                "handler_avg_ms": round(self._busy_sum * 1000 / processed, 2) if processed else 0.0,
+            }
+
+    def stop(self):
+        for q in self._queues:
+            q.put(None)
+
+
+# -------------------------------------------------
+# Module-level wiring
+# -------------------------------------------------
+_instance: Optional[UpdateDispatcher] = None
+
+
+def install(bot, workers: int = UPDATE_WORKERS, queue_max: int = UPDATE_QUEUE_MAX) -> UpdateDispatcher:
+    """Route bot.process_new_updates through a sharded dispatcher."""
+    global _instance
+    if _instance is not None:
+        return _instance
+    original = bot.process_new_updates
+    _instance = UpdateDispatcher(original, workers, queue_max)
+
+    def submit(updates):
+        # TeleBot advances last_update_id (the next getUpdates offset) inside
+        # process_new_updates; do it at enqueue time, otherwise polling
+        # re-fetches — and re-handles — everything still queued.
+        for update in updates:
+            uid = getattr(update, "update_id", None)
+            if uid is not None and uid > getattr(bot, "last_update_id", 0):
+                bot.last_update_id = uid
+        _instance.submit(updates)
+
+    bot.process_new_updates = submit
+    return _instance
+
+
+def stats() -> Dict[str, Any]:
+    return _instance.stats() if _instance else {}
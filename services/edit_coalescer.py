@@ -0,0 +1,250 @@
+# services/edit_coalescer.py
+"""
+Coalescing / dedup layer for live-updating messages (battle + PvP UIs).
+
+Every tap on a battle button used to fire an edit_message_text, and
+identical payloads cost a round trip just to get "message is not
+modified" back. Edits now go through one slot per (chat_id, message_id):
+
+- dedup: a payload whose hash (text + parse_mode + keyboard) equals the
+  last one sent is dropped without an API call
+- coalesce: at most one edit per EDIT_COALESCE_SECONDS per message; edits
+  arriving inside the window replace the pending one (latest wins) and a
+  trailing flush sends it when the window ends, so the UI never stays stale
+- discard(chat_id, message_id) before the final result edit / delete, so a
+  trailing flush can't overwrite it; an edit racing with discard is dropped
+- the Bot API call is made outside the slot lock; one edit per message is
+  in flight at a time and anything arriving meanwhile waits as pending
+
+Usage:
+    from services import edit_coalescer
+    edit_coalescer.edit(bot, chat_id, msg_id, text,
+                        reply_markup=kb, parse_mode="Markdown",
+                        on_error=lambda e: bot.send_message(...))
+"""
+
+import os
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+EDIT_COALESCE_SECONDS = float(os.getenv("EDIT_COALESCE_SECONDS", "1.0"))
+EDIT_SLOT_TTL = 600  # forget idle slots after 10 minutes
+
+Key = Tuple[Any, Any]
+
+
+def payload_hash(text: str, reply_markup=None, parse_mode: Optional[str] = None) -> str:
+    markup = ""
+    if reply_markup is not None:
+        try:
+            markup = reply_markup.to_json()
+        except Exception:
+            markup = repr(reply_markup)
+    h = hashlib.sha1()
+    h.update(f"{parse_mode}|".encode("utf-8"))
+    h.update((text or "").encode("utf-8"))
+    h.update(b"|")
+    h.update(markup.encode("utf-8"))
+    return h.hexdigest()
+
+
+class _Slot:
+    __slots__ = ("lock", "idle", "sent_hash", "last_flush", "pending", "timer", "dead",
+                 "sending", "touched")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)  # notified when an in-flight edit ends
+        self.sent_hash: Optional[str] = None
+        self.last_flush = 0.0
+        self.pending: Optional[Dict[str, Any]] = None
+        self.timer: Optional[threading.Timer] = None
+        self.dead = False
+        self.sending = False
+        self.touched = time.time()
+
+
+class EditCoalescer:
+    def __init__(self, interval: float = EDIT_COALESCE_SECONDS):
+        self.interval = max(0.0, interval)
+        self._lock = threading.Lock()
+        self._slots: Dict[Key, _Slot] = {}
+        self.sent = 0
+        self.deduped = 0
+        self.coalesced = 0
+
+    def _slot(self, key: Key) -> _Slot:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None or slot.dead:
+                slot = _Slot()
+                self._slots[key] = slot
+                if len(self._slots) > 256:
+                    self._prune()
+            return slot
+
+    def _prune(self):
+        """Drop idle slots. Caller holds self._lock."""
+        cutoff = time.time() - EDIT_SLOT_TTL
+        for key in [k for k, s in self._slots.items() if s.touched < cutoff and s.pending is None]:
+            del self._slots[key]
+
+    # ---------------------------------------------
+    # Public
+    # ---------------------------------------------
+    def edit(self, bot, chat_id, message_id, text: str, reply_markup=None,
+             parse_mode: Optional[str] = None,
+             on_error: Optional[Callable[[Exception], None]] = None) -> str:
+        """
+        Request an edit. Returns "sent", "deduped", "queued" (trailing
+        flush scheduled) or "discarded" (the message was discarded while
+        this call was starting). Immediate sends run on the caller's thread.
+        """
+        key = (chat_id, message_id)
+        slot = self._slot(key)
+        h = payload_hash(text, reply_markup, parse_mode)
+        job = {"bot": bot, "chat_id": chat_id, "message_id": message_id, "text": text,
+               "reply_markup": reply_markup, "parse_mode": parse_mode,
+               "on_error": on_error, "hash": h}
+
+        with slot.lock:
+            if slot.dead:
+                return "discarded"
+            slot.touched = time.time()
+            if h == slot.sent_hash:
+                # back to what's on screen: nothing pending is needed either
+                if slot.pending is not None:
+                    self.coalesced += 1
+                slot.pending = None
+                self.deduped += 1
+                return "deduped"
+
+            wait = slot.last_flush + self.interval - time.time()
+            if wait > 0 or slot.sending:
+                if slot.pending is not None:
+                    self.coalesced += 1
+                slot.pending = job
+                if not slot.sending:
+                    self._schedule(key, slot, wait)
+                # else: the in-flight send schedules the flush when it ends
+                return "queued"
+
+            slot.pending = None
+            slot.sending = True
+            slot.last_flush = time.time()
+
+        self._send(key, slot, job)
+        return "sent"
+
+    def discard(self, chat_id, message_id):
+        """Drop any pending edit for this message and forget it."""
+        with self._lock:
+            slot = self._slots.pop((chat_id, message_id), None)
+        if slot is None:
+            return
+        with slot.lock:
+            slot.dead = True
+            slot.pending = None
+            if slot.timer is not None:
+                slot.timer.cancel()
+                slot.timer = None
+            # wait out an edit that is mid-flight, so the caller's own final
+            # edit is guaranteed to land after it
+            while slot.sending:
+                slot.idle.wait()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"slots": len(self._slots), "sent": self.sent,
+                    "deduped": self.deduped, "coalesced": self.coalesced}
+
+    # ---------------------------------------------
+    # Flushing
+    # ---------------------------------------------
+    def _schedule(self, key: Key, slot: _Slot, wait: float):
+        """Arm the trailing flush. Caller holds slot.lock."""
+        if slot.timer is None:
+            slot.timer = threading.Timer(max(0.0, wait), self._flush_later, args=(key, slot))
+            slot.timer.daemon = True
+            slot.timer.start()
+
+    def _flush_later(self, key: Key, slot: _Slot):
+        with slot.lock:
+            slot.timer = None
+            if slot.dead or slot.sending or slot.pending is None:
+                return
+            job, slot.pending = slot.pending, None
+            if job["hash"] == slot.sent_hash:
+                self.deduped += 1
+                return
+            slot.sending = True
+            slot.last_flush = time.time()
+        self._send(key, slot, job)
+
+    def _send(self, key: Key, slot: _Slot, job: Dict[str, Any]):
+        """
+        Issue the edit without holding slot.lock. The caller has set
+        slot.sending; this clears it and arms the flush for anything that
+        became pending meanwhile.
+        """
+        err = None
+        try:
+            job["bot"].edit_message_text(
+                job["text"], job["chat_id"], job["message_id"],
+                reply_markup=job["reply_markup"], parse_mode=job["parse_mode"],
+            )
+        except Exception as e:
+            err = e
+
+        with slot.lock:
+            slot.sending = False
+            slot.idle.notify_all()
+            if err is None:
+                slot.sent_hash = job["hash"]
+                self.sent += 1
+            elif "message is not modified" in str(err).lower():
+                slot.sent_hash = job["hash"]
+                err = None
+            else:
+                slot.sent_hash = None
+            if slot.pending is not None and not slot.dead:
+                self._schedule(key, slot, slot.last_flush + self.interval - time.time())
+
+        if err is not None and job["on_error"]:
+            try:
+                job["on_error"](err)
+            except Exception:
+                pass
+
+
+# -------------------------------------------------
+# Module-level singleton
+# -------------------------------------------------
+_instance: Optional[EditCoalescer] = None
+_instance_lock = threading.Lock()
+
+
+def _get_instance() -> EditCoalescer:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = EditCoalescer()
+    return _instance
+
+
+def edit(bot, chat_id, message_id, text: str, reply_markup=None,
+         parse_mode: Optional[str] = None,
+         on_error: Optional[Callable[[Exception], None]] = None) -> str:
+    return _get_instance().edit(bot, chat_id, message_id, text, reply_markup,
+                                parse_mode, on_error)
+
+
+def discard(chat_id, message_id):
+    _get_instance().discard(chat_id, message_id)
+
+
+def stats() -> Dict[str, int]:
+    return _get_instance().stats()
@@ -10,6 +10,7 @@ from typing import Optional, Dict, Any
 
 # import your project's db interface
 import bot.db as db
+from services.combat_events import CombatEvent, SessionSink, publish, events_to_list, events_from_list
 
 SESSIONS_FILE = "data/fight_sessions.json"
 
@@ -21,7 +22,7 @@ class FightSession:
     - pvp_attacker / pvp_defender: full user dicts (for display_name, username, xp, level, etc)
     - pvp_attacker_stats / pvp_defender_stats: pure numeric combat stats used by engine
     - attacker_hp / defender_hp: runtime HP
-    - events: list of recent actions (newest first). Each event: dict{actor, action, damage, note, turn}
+    - events: list of recent actions (newest first). Each event: CombatEvent{actor, action, damage, note, turn}
     - auto_mode: bool
     - _last_msg: dict {"chat": chat_id, "msg": message_id} - used to send final card to correct chat
     """
@@ -37,6 +38,7 @@ class FightSession:
         self.ended = False
         self.winner: Optional[str] = None  # "attacker" or "defender"
         self.events = []  # newest first
+        self._sink = SessionSink(self, limit=40)
         self.auto_mode = False
         self.pvp = pvp
 
@@ -65,7 +67,7 @@ class FightSession:
             "turn": self.turn,
             "ended": self.ended,
             "winner": self.winner,
-            "events": self.events,
+            "events": events_to_list(self.events),
             "auto_mode": self.auto_mode,
             "attacker_hp": self.attacker_hp,
             "defender_hp": self.defender_hp,
@@ -89,7 +91,7 @@ class FightSession:
         sess.turn = data.get("turn", 1)
         sess.ended = data.get("ended", False)
         sess.winner = data.get("winner")
-        sess.events = data.get("events", []) or []
+        sess.events = events_from_list(data.get("events"))
         sess.auto_mode = data.get("auto_mode", False)
         sess.attacker_hp = data.get("attacker_hp", sess.attacker_hp)
         sess.defender_hp = data.get("defender_hp", sess.defender_hp)
@@ -104,18 +106,10 @@ class FightSession:
     # event logging
     # ---------------------
     def log_event(self, actor: str, action: str, damage: Optional[int] = None, note: str = ""):
-        # Prepend newest events
-        ev = {
-            "actor": actor,
-            "action": action,
-            "damage": damage,
-            "note": note,
-            "turn": self.turn
-        }
-        self.events.insert(0, ev)
-        # keep event list bounded (avoid huge growth)
-        if len(self.events) > 40:
-            self.events = self.events[:40]
+        # Prepend newest events (session sink keeps the list bounded at 40)
+        ev = CombatEvent(actor, action, damage, note, turn=self.turn, ts=int(time.time()),
+                         kind="pvp", sid=str(self.attacker_id))
+        publish(ev, self._sink)
 
     # ---------------------
     # combat resolution
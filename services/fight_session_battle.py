@@ -13,6 +13,7 @@ from typing import Optional, Dict, Any
 
 import bot.db as db
 import bot.evolutions as evolutions
+from services.combat_events import CombatEvent, SessionSink, publish, events_to_list, events_from_list
 
 SESSIONS_FILE = "data/fight_sessions_battle.json"
 
@@ -40,7 +41,8 @@ class BattleSession:
         self.turn = 1
         self.ended = False
         self.winner: Optional[str] = None
-        self.events = []  # newest-first list of event dicts
+        self.events = []  # newest-first list of CombatEvent records
+        self._sink = SessionSink(self, limit=40)
         self.auto_mode = False
 
         # runtime HP values (player_hp is reset at session creation using derived stats)
@@ -70,7 +72,7 @@ class BattleSession:
             "turn": self.turn,
             "ended": self.ended,
             "winner": self.winner,
-            "events": self.events,
+            "events": events_to_list(self.events),
             "auto_mode": self.auto_mode,
             "player_hp": self.player_hp,
             "mob_hp": self.mob_hp,
@@ -96,7 +98,7 @@ class BattleSession:
         sess.turn = data.get("turn", 1)
         sess.ended = data.get("ended", False)
         sess.winner = data.get("winner")
-        sess.events = data.get("events", [])
+        sess.events = events_from_list(data.get("events"))
         sess.auto_mode = data.get("auto_mode", False)
         sess.player_hp = data.get("player_hp", sess.player_hp)
         sess.mob_hp = data.get("mob_hp", sess.mob_hp)
@@ -110,10 +112,10 @@ class BattleSession:
         return sess
 
     def log(self, who: str, action: str, dmg: Optional[int] = None, note: str = ""):
-        self.events.insert(0, {"actor": who, "action": action, "damage": dmg, "note": note, "turn": self.turn, "ts": int(time.time())})
-        # keep a bounded log
-        if len(self.events) > 40:
-            self.events = self.events[:40]
+        ev = CombatEvent(who, action, dmg, note, turn=self.turn, ts=int(time.time()),
+                         kind="battle", sid=self.session_id)
+        # session sink keeps a bounded log
+        publish(ev, self._sink)
 
     # Combat resolution (unchanged logic)
     def resolve_player_action(self, action: str):
@@ -10,6 +10,7 @@ from typing import Optional, Dict, Any
 
 import services.pvp_targets as pvp_targets  # ✅ NEW (safe import)
 import bot.db as db
+from services.combat_events import CombatEvent, SessionSink, publish, events_to_list, events_from_list
 
 SESSIONS_FILE = "data/fight_sessions_pvp.json"
 
@@ -61,6 +62,7 @@ class PvPFightSession:
         self.ended = False
         self.winner: Optional[str] = None
         self.events = []   # newest-first
+        self._sink = SessionSink(self, limit=120)
         self._last_msg = None
         self._last_ui_edit = 0.0
         self.session_id = session_id or secrets.token_hex(6)
@@ -74,14 +76,13 @@ class PvPFightSession:
             self.attacker["defense"] = float(self.attacker.get("defense", 5)) * 1.05
             self.attacker["crit_chance"] = float(self.attacker.get("crit_chance", 0.05)) + 0.02
 
-            self.events.insert(0, {
-                "actor": "attacker",
-                "action": "buff",
-                "damage": None,
-                "note": "🔥⚡️💥 Revenge Fury ignites your power! (+10% ATK, +5% DEF, +2% Crit)",
-                "turn": self.turn,
-                "ts": int(time.time())
-            })
+            # session sink only: from_dict re-runs __init__, so publishing here
+            # would re-emit the buff to global sinks on every load
+            self._sink.emit(CombatEvent(
+                "attacker", "buff", None,
+                "🔥⚡️💥 Revenge Fury ignites your power! (+10% ATK, +5% DEF, +2% Crit)",
+                turn=self.turn, ts=int(time.time()), kind="pvp", sid=self.session_id,
+            ))
 
     # ----------------------------------------
     # Serialization helpers
@@ -95,7 +96,7 @@ class PvPFightSession:
             "turn": self.turn,
             "ended": self.ended,
             "winner": self.winner,
-            "events": self.events,
+            "events": events_to_list(self.events),
             "_last_msg": self._last_msg,
             "_last_ui_edit": self._last_ui_edit,
             "session_id": self.session_id,
@@ -115,7 +116,7 @@ class PvPFightSession:
         sess.turn = data.get("turn", 1)
         sess.ended = data.get("ended", False)
         sess.winner = data.get("winner")
-        sess.events = data.get("events", []) or []
+        sess.events = events_from_list(data.get("events"))
         sess._last_msg = data.get("_last_msg")
         sess._last_ui_edit = data.get("_last_ui_edit", 0.0)
         return sess
@@ -124,16 +125,9 @@ class PvPFightSession:
     # Log Entry
     # ----------------------------------------
     def log(self, who: str, action: str, dmg: Optional[int] = None, note: str = ""):
-        self.events.insert(0, {
-            "actor": who,
-            "action": action,
-            "damage": dmg,
-            "note": note,
-            "turn": self.turn,
-            "ts": int(time.time())
-        })
-        if len(self.events) > 120:
-            self.events = self.events[:120]
+        ev = CombatEvent(who, action, dmg, note, turn=self.turn, ts=int(time.time()),
+                         kind="pvp", sid=self.session_id)
+        publish(ev, self._sink)
 
     # ----------------------------------------
     # Resolve attacker action
@@ -218,14 +212,8 @@ class PvPFightSession:
             if self.revenge_fury:
                 db.mark_revenge_complete(self.defender_id, self.attacker_id)
                 
-                self.events.insert(0, {
-                    "actor": "system",
-                    "action": "revenge_complete",
-                    "damage": None,
-                    "note": "🔥 REVENGE COMPLETE — that attack has been settled.",
-                    "turn": self.turn,
-                    "ts": int(time.time())
-                    })
+                self.log("system", "revenge_complete", None,
+                         "🔥 REVENGE COMPLETE — that attack has been settled.")
 
             return
 
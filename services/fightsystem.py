@@ -4,6 +4,7 @@ import random
 from typing import Dict, Any, List, Tuple, Union
 
 # Import your models / helpers
+from services.combat_events import CombatEvent, events_to_list, publish
 from utils.models import (
     Player,
     Mob,
@@ -25,20 +26,14 @@ Actor = Union[Player, Mob]
 # ---------------------------
 # Internal helpers
 # ---------------------------
-def _log_event(events: List[Dict[str, Any]], turn: int, actor_name: str, target_name: str,
-               action: str, damage: int, was_dodged: bool, was_crit: bool, target_hp_after: int) -> None:
-    """Append a structured event to the events list."""
-    ev = {
-        "turn": turn,
-        "actor": actor_name,
-        "target": target_name,
-        "action": action,
-        "damage": damage,
-        "dodged": was_dodged,
-        "crit": was_crit,
-        "target_hp": target_hp_after,
-    }
+def _log_event(events: List[CombatEvent], turn: int, actor_name: str, target_name: str,
+               action: str, damage: int, was_dodged: bool, was_crit: bool, target_hp_after: int,
+               kind: str = "fight") -> None:
+    """Append a CombatEvent to the events list and publish it to the global sinks."""
+    ev = CombatEvent(actor_name, action, damage, turn=turn, target=target_name,
+                     target_hp=target_hp_after, dodged=was_dodged, crit=was_crit, kind=kind)
     events.append(ev)
+    publish(ev)
 
 
 def _is_dead_hp(hp: int) -> bool:
@@ -62,7 +57,7 @@ def run_pve_fight(player: Player, mob: Mob, attacker_first: bool = True) -> Dict
     p_hp = int(player.current_hp)
     m_hp = int(mob.hp)  # mobs may use mob.hp as base HP
 
-    events: List[Dict[str, Any]] = []
+    events: List[CombatEvent] = []
     turn = 1
 
     # In PvE we default to player attacking first unless caller overrides
@@ -73,11 +68,11 @@ def run_pve_fight(player: Player, mob: Mob, attacker_first: bool = True) -> Dict
             # Player attacks Mob
             dmg, dodged, crit = calculate_damage(player, mob)
             if dodged:
-                _log_event(events, turn, player.username, mob.name, "attack", 0, True, False, m_hp)
+                _log_event(events, turn, player.username, mob.name, "attack", 0, True, False, m_hp, kind="pve")
             else:
                 m_hp -= dmg
                 m_hp = max(0, m_hp)
-                _log_event(events, turn, player.username, mob.name, "attack", dmg, False, crit, m_hp)
+                _log_event(events, turn, player.username, mob.name, "attack", dmg, False, crit, m_hp, kind="pve")
 
             if _is_dead_hp(m_hp):
                 break  # mob died, player wins
@@ -85,11 +80,11 @@ def run_pve_fight(player: Player, mob: Mob, attacker_first: bool = True) -> Dict
             # Mob retaliates
             dmg, dodged, crit = calculate_damage(mob, player)
             if dodged:
-                _log_event(events, turn, mob.name, player.username, "attack", 0, True, False, p_hp)
+                _log_event(events, turn, mob.name, player.username, "attack", 0, True, False, p_hp, kind="pve")
             else:
                 p_hp -= dmg
                 p_hp = max(0, p_hp)
-                _log_event(events, turn, mob.name, player.username, "attack", dmg, False, crit, p_hp)
+                _log_event(events, turn, mob.name, player.username, "attack", dmg, False, crit, p_hp, kind="pve")
 
             if _is_dead_hp(p_hp):
                 break
@@ -98,22 +93,22 @@ def run_pve_fight(player: Player, mob: Mob, attacker_first: bool = True) -> Dict
             # Mob attacks first (rare path)
             dmg, dodged, crit = calculate_damage(mob, player)
             if dodged:
-                _log_event(events, turn, mob.name, player.username, "attack", 0, True, False, p_hp)
+                _log_event(events, turn, mob.name, player.username, "attack", 0, True, False, p_hp, kind="pve")
             else:
                 p_hp -= dmg
                 p_hp = max(0, p_hp)
-                _log_event(events, turn, mob.name, player.username, "attack", dmg, False, crit, p_hp)
+                _log_event(events, turn, mob.name, player.username, "attack", dmg, False, crit, p_hp, kind="pve")
 
             if _is_dead_hp(p_hp):
                 break
 
             dmg, dodged, crit = calculate_damage(player, mob)
             if dodged:
-                _log_event(events, turn, player.username, mob.name, "attack", 0, True, False, m_hp)
+                _log_event(events, turn, player.username, mob.name, "attack", 0, True, False, m_hp, kind="pve")
             else:
                 m_hp -= dmg
                 m_hp = max(0, m_hp)
-                _log_event(events, turn, player.username, mob.name, "attack", dmg, False, crit, m_hp)
+                _log_event(events, turn, player.username, mob.name, "attack", dmg, False, crit, m_hp, kind="pve")
 
             if _is_dead_hp(m_hp):
                 break
@@ -137,7 +132,7 @@ def run_pve_fight(player: Player, mob: Mob, attacker_first: bool = True) -> Dict
             "levels_gained": levels_gained,
             "player_hp": player.current_hp,
             "mob_hp": mob_hp_remaining,
-            "events": events,
+            "events": events_to_list(events),
             "turns": turn,
         }
     elif p_hp <= 0 and m_hp > 0:
@@ -152,7 +147,7 @@ def run_pve_fight(player: Player, mob: Mob, attacker_first: bool = True) -> Dict
             "levels_gained": 0,
             "player_hp": player.current_hp,
             "mob_hp": mob_hp_remaining,
-            "events": events,
+            "events": events_to_list(events),
             "turns": turn,
         }
     else:
@@ -167,7 +162,7 @@ def run_pve_fight(player: Player, mob: Mob, attacker_first: bool = True) -> Dict
             "levels_gained": 0,
             "player_hp": player.current_hp,
             "mob_hp": mob_hp_remaining,
-            "events": events,
+            "events": events_to_list(events),
             "turns": turn,
             "note": "max_turns_or_draw",
         }
@@ -186,7 +181,7 @@ def run_pvp_fight(attacker: Player, defender: Player, attacker_first: bool = Tru
     a_hp = int(attacker.current_hp)
     d_hp = int(defender.current_hp)
 
-    events: List[Dict[str, Any]] = []
+    events: List[CombatEvent] = []
     turn = 1
     attacker_turn = bool(attacker_first)  # attacker hits first when True
 
@@ -195,11 +190,11 @@ def run_pvp_fight(attacker: Player, defender: Player, attacker_first: bool = Tru
             # Attacker attacks defender
             dmg, dodged, crit = calculate_damage(attacker, defender)
             if dodged:
-                _log_event(events, turn, attacker.username, defender.username, "attack", 0, True, False, d_hp)
+                _log_event(events, turn, attacker.username, defender.username, "attack", 0, True, False, d_hp, kind="pvp")
             else:
                 d_hp -= dmg
                 d_hp = max(0, d_hp)
-                _log_event(events, turn, attacker.username, defender.username, "attack", dmg, False, crit, d_hp)
+                _log_event(events, turn, attacker.username, defender.username, "attack", dmg, False, crit, d_hp, kind="pvp")
 
             if _is_dead_hp(d_hp):
                 break
@@ -208,11 +203,11 @@ def run_pvp_fight(attacker: Player, defender: Player, attacker_first: bool = Tru
             # Defender attacks back
             dmg, dodged, crit = calculate_damage(defender, attacker)
             if dodged:
-                _log_event(events, turn, defender.username, attacker.username, "attack", 0, True, False, a_hp)
+                _log_event(events, turn, defender.username, attacker.username, "attack", 0, True, False, a_hp, kind="pvp")
             else:
                 a_hp -= dmg
                 a_hp = max(0, a_hp)
-                _log_event(events, turn, defender.username, attacker.username, "attack", dmg, False, crit, a_hp)
+                _log_event(events, turn, defender.username, attacker.username, "attack", dmg, False, crit, a_hp, kind="pvp")
 
             if _is_dead_hp(a_hp):
                 break
@@ -278,7 +273,7 @@ def run_pvp_fight(attacker: Player, defender: Player, attacker_first: bool = Tru
         "attacker_levels_gained": levels_gained_attacker,
         "defender_leveled_up": leveled_up_defender,
         "defender_levels_gained": levels_gained_defender,
-        "events": events,
+        "events": events_to_list(events),
         "turns": turn,
     }
 
@@ -0,0 +1,138 @@
+# services/handler_registry.py
+"""
+Idempotent handler setup + boot-time routing table.
+
+bot/commands.register_handlers sets up growmygrok / battle / hop /
+announce itself, and main.load_modular_handlers then walks every file in
+bot/handlers/ — without a guard those modules register every handler
+twice (duplicate predicate checks per update, duplicate side effects).
+
+- setup_once(bot, setup_fn) runs a module's setup(bot) at most once per
+  bot, keyed by the setup function's module name; repeats are skipped
+- a module is recorded *before* its setup runs, so a setup that fails half
+  way isn't re-run on top of the handlers it already added
+- report(bot) prints what each module registered (commands, callback
+  routes, other handlers) and flags commands claimed by two modules;
+  handlers added by a nested setup_once are credited to the inner module
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+_lock = threading.Lock()
+_done: Dict[tuple, Dict[str, Any]] = {}     # (id(bot), module) -> record
+_order: List[tuple] = []
+_stack = threading.local()   # setups in progress (register_handlers nests)
+skipped = 0
+
+_HANDLER_LISTS = (
+    "message_handlers", "edited_message_handlers", "callback_query_handlers",
+    "inline_handlers", "channel_post_handlers", "my_chat_member_handlers",
+    "chat_member_handlers", "poll_answer_handlers",
+)
+
+
+def _handlers(bot, name: str) -> list:
+    handlers = getattr(bot, name, None)
+    return handlers if isinstance(handlers, list) else []
+
+
+def _snapshot(bot) -> Dict[str, int]:
+    return {name: len(_handlers(bot, name)) for name in _HANDLER_LISTS}
+
+
+def _commands_since(bot, start: int) -> List[str]:
+    out = []
+    for h in _handlers(bot, "message_handlers")[start:]:
+        try:
+            out.extend(h.get("filters", {}).get("commands") or [])
+        except Exception:
+            continue
+    return out
+
+
+def is_set_up(bot, module: str) -> bool:
+    with _lock:
+        return (id(bot), module) in _done
+
+
+def setup_once(bot, setup_fn: Callable[[Any], Any], module: Optional[str] = None) -> bool:
+    """
+    Call setup_fn(bot) unless this module was already set up for this bot.
+    Returns True if setup ran. Exceptions from setup_fn propagate.
+    """
+    global skipped
+    from services import callback_router
+
+    module = module or getattr(setup_fn, "__module__", None) or repr(setup_fn)
+    key = (id(bot), module)
+    with _lock:
+        if key in _done:
+            skipped += 1
+            print(f"↷ Handler {module} already set up — skipped")
+            return False
+        record = {"module": module, "ok": False, "ms": 0.0,
+                  "commands": [], "callbacks": [], "other": 0}
+        _done[key] = record
+        _order.append(key)
+
+    stack = getattr(_stack, "frames", None)
+    if stack is None:
+        stack = _stack.frames = []
+    # what nested setup_once calls add is collected here and subtracted
+    frame = {"commands": [], "callbacks": set(), "handlers": 0}
+    stack.append(frame)
+
+    before = _snapshot(bot)
+    routes_before = set(callback_router.routes())
+    t0 = time.perf_counter()
+    try:
+        setup_fn(bot)
+        record["ok"] = True
+    finally:
+        stack.pop()
+        after = _snapshot(bot)
+        added_cmds = _commands_since(bot, before["message_handlers"])
+        added_routes = set(callback_router.routes()) - routes_before
+        added_handlers = sum(after[n] - before[n] for n in _HANDLER_LISTS)
+
+        own_cmds = list(added_cmds)
+        for c in frame["commands"]:
+            if c in own_cmds:
+                own_cmds.remove(c)
+
+        record["ms"] = (time.perf_counter() - t0) * 1000.0
+        record["commands"] = own_cmds
+        record["callbacks"] = sorted(added_routes - frame["callbacks"])
+        record["other"] = added_handlers - frame["handlers"]
+
+        if stack:
+            parent = stack[-1]
+            parent["commands"].extend(added_cmds)
+            parent["callbacks"] |= added_routes
+            parent["handlers"] += added_handlers
+    return True
+
+
+def table(bot) -> List[Dict[str, Any]]:
+    with _lock:
+        return [dict(_done[k]) for k in _order if k[0] == id(bot)]
+
+
+def report(bot):
+    rows = table(bot)
+    owners: Dict[str, List[str]] = {}
+    print(f"📋 HANDLER TABLE — {len(rows)} modules, {skipped} duplicate setups skipped")
+    for r in rows:
+        short = r["module"].rsplit(".", 1)[-1]
+        cmds = " ".join("/" + c for c in r["commands"]) or "-"
+        cbs = ", ".join(r["callbacks"]) or "-"
+        flag = "" if r["ok"] else "  ❌ setup failed"
+        print(f"   {short:<20} cmds: {cmds} | callbacks: {cbs} | handlers: {r['other']}{flag}")
+        for c in r["commands"]:
+            owners.setdefault(c, []).append(short)
+
+    for cmd, mods in sorted(owners.items()):
+        if len(mods) > 1:
+            print(f"⚠ /{cmd} registered by {', '.join(mods)} — first one wins")
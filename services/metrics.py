@@ -0,0 +1,402 @@
+# services/metrics.py
+"""
+In-process metrics with a Prometheus text endpoint.
+
+What gets recorded:
+- handler latency histogram / error counter / in-flight gauge for every
+  message + callback handler (label: "/command", "cb:<route>" or the
+  function name) — instrument_bot(bot) wraps them after registration
+- DB statement latency (bot.db query observer, label: verb + table)
+- Telegram Bot API latency per method (wraps apihelper._make_request)
+- image encodes per render kind (count / bytes / seconds / over budget),
+  reported back by the render workers (services/render_service.py)
+- gauges pulled from the dispatcher / outbound queue / callback router /
+  render service (jobs, answers straight from its memo, memo size, failures,
+  queue-full rejections)
+
+Exposed on http://METRICS_HOST:METRICS_PORT/metrics (127.0.0.1:9464 by
+default, METRICS_PORT=0 disables) and summarised by the /metrics admin
+command (bot/handlers/metrics_admin.py).
+"""
+
+import os
+import re
+import time
+import bisect
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+# -------------------------------------------------
+# Primitives
+# -------------------------------------------------
+class Histogram:
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._series: Dict[str, List[float]] = {}   # value -> [count per bucket..., +Inf, sum]
+
+    def observe(self, label_value: str, seconds: float):
+        with _lock:
+            s = self._series.get(label_value)
+            if s is None:
+                s = self._series[label_value] = [0] * (len(BUCKETS) + 1) + [0.0]
+            s[bisect.bisect_left(BUCKETS, seconds)] += 1
+            s[-1] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with _lock:
+            out = {}
+            for k, s in self._series.items():
+                count = sum(s[:-1])
+                out[k] = {"count": count, "sum": s[-1], "buckets": list(s[:-1])}
+            return out
+
+    def quantile(self, label_value: str, q: float) -> float:
+        """Bucket upper bound at quantile q (coarse, like histogram_quantile)."""
+        snap = self.snapshot().get(label_value)
+        if not snap or not snap["count"]:
+            return 0.0
+        target = q * snap["count"]
+        seen = 0
+        for i, n in enumerate(snap["buckets"]):
+            seen += n
+            if seen >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for k, snap in sorted(self.snapshot().items()):
+            lbl = f'{self.label}="{_esc(k)}"'
+            acc = 0
+            for bound, n in zip(BUCKETS, snap["buckets"]):
+                acc += n
+                lines.append(f'{self.name}_bucket{{{lbl},le="{bound}"}} {acc}')
+            lines.append(f'{self.name}_bucket{{{lbl},le="+Inf"}} {snap["count"]}')
+            lines.append(f"{self.name}_sum{{{lbl}}} {snap['sum']:.6f}")
+            lines.append(f"{self.name}_count{{{lbl}}} {snap['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+
+    def inc(self, label_value: str, n: float = 1):
+        with _lock:
+            self._values[label_value] = self._values.get(label_value, 0) + n
+
+    def snapshot(self) -> Dict[str, float]:
+        with _lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for k, v in sorted(self.snapshot().items()):
+            lines.append(f'{self.name}{{{self.label}="{_esc(k)}"}} {v}')
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, label_value: str, n: float = 1):
+        self.inc(label_value, -n)
+
+    def set(self, label_value: str, v: float):
+        with _lock:
+            self._values[label_value] = v
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+def _esc(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+HANDLER_SECONDS = Histogram("megagrok_handler_seconds", "Handler latency", "handler")
+HANDLER_ERRORS = Counter("megagrok_handler_errors_total", "Handler exceptions", "handler")
+HANDLER_INFLIGHT = Gauge("megagrok_handler_in_flight", "Handlers currently running", "handler")
+DB_SECONDS = Histogram("megagrok_db_query_seconds", "SQLite statement latency", "query")
+DB_ERRORS = Counter("megagrok_db_errors_total", "SQLite statement errors", "query")
+API_SECONDS = Histogram("megagrok_telegram_api_seconds", "Bot API call latency", "method")
+API_ERRORS = Counter("megagrok_telegram_api_errors_total", "Bot API call errors", "method")
+ENCODES = Counter("megagrok_render_encodes_total", "Images encoded", "kind")
+ENCODE_BYTES = Counter("megagrok_render_encode_bytes_total", "Encoded image bytes", "kind")
+ENCODE_SECONDS = Counter("megagrok_render_encode_seconds_total", "Time spent encoding", "kind")
+ENCODE_OVER_BUDGET = Counter("megagrok_render_encode_over_budget_total",
+                             "Encodes that did not fit RENDER_BYTE_BUDGET", "kind")
+
+_METRICS = [HANDLER_SECONDS, HANDLER_ERRORS, HANDLER_INFLIGHT,
+            DB_SECONDS, DB_ERRORS, API_SECONDS, API_ERRORS,
+            ENCODES, ENCODE_BYTES, ENCODE_SECONDS, ENCODE_OVER_BUDGET]
+
+_collectors: List[Callable[[], Dict[str, float]]] = []
+
+
+def register_collector(fn: Callable[[], Dict[str, float]]):
+    """fn() -> {"metric_name": value}; rendered as untyped gauges on scrape."""
+    _collectors.append(fn)
+
+
+# -------------------------------------------------
+# Handler instrumentation
+# -------------------------------------------------
+class track:
+    """Context manager: with metrics.track("/pvp"): ..."""
+    __slots__ = ("label", "t0")
+
+    def __init__(self, label: str):
+        self.label = label
+
+    def __enter__(self):
+        HANDLER_INFLIGHT.inc(self.label)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        HANDLER_SECONDS.observe(self.label, time.perf_counter() - self.t0)
+        HANDLER_INFLIGHT.dec(self.label)
+        if exc_type is not None:
+            HANDLER_ERRORS.inc(self.label)
+        return False
+
+
+def _handler_label(kind: str, handler: Dict[str, Any]) -> str:
+    filters = handler.get("filters") or {}
+    cmds = filters.get("commands")
+    if cmds:
+        return "/" + cmds[0]
+    fn = handler.get("function")
+    return f"{kind}:{getattr(fn, '__name__', 'handler')}"
+
+
+def _wrap(fn: Callable, label: str) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with track(label):
+            return fn(*args, **kwargs)
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+
+def instrument_bot(bot) -> int:
+    """Wrap every registered handler function. Safe to call twice."""
+    n = 0
+    for attr, kind in (("message_handlers", "msg"), ("edited_message_handlers", "edit"),
+                       ("callback_query_handlers", "cb"), ("inline_handlers", "inline")):
+        handlers = getattr(bot, attr, None)
+        if not isinstance(handlers, list):
+            continue
+        for h in handlers:
+            fn = h.get("function")
+            if fn is None or getattr(fn, "_metrics_wrapped", False):
+                continue
+            if getattr(fn, "_metrics_self_timed", False):
+                continue  # e.g. callback router: times each route itself
+            h["function"] = _wrap(fn, _handler_label(kind, h))
+            n += 1
+    return n
+
+
+# -------------------------------------------------
+# DB + Telegram API instrumentation
+# -------------------------------------------------
+_SQL_LABEL = re.compile(r"^\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE|TABLE(?: IF NOT EXISTS)?)\s+(\w+))?",
+                        re.IGNORECASE | re.DOTALL)
+
+
+def sql_label(sql: str) -> str:
+    m = _SQL_LABEL.match(sql or "")
+    if not m:
+        return "other"
+    verb = m.group(1).upper()
+    if verb == "UPDATE":
+        table = sql.split()[1] if len(sql.split()) > 1 else ""
+    else:
+        table = m.group(2) or ""
+    return f"{verb} {table}".strip()
+
+
+def _on_query(sql: str, seconds: float, err: Optional[Exception]):
+    label = sql_label(sql)
+    DB_SECONDS.observe(label, seconds)
+    if err is not None:
+        DB_ERRORS.inc(label)
+
+
+def instrument_db():
+    import bot.db as db
+    db.add_query_observer(_on_query)
+
+
+def instrument_api() -> bool:
+    try:
+        from telebot import apihelper
+    except Exception:
+        return False
+    original = getattr(apihelper, "_make_request", None)
+    if original is None or getattr(original, "_metrics_wrapped", False):
+        return False
+
+    @functools.wraps(original)
+    def _make_request(token, method_name, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return original(token, method_name, *args, **kwargs)
+        except Exception:
+            API_ERRORS.inc(method_name)
+            raise
+        finally:
+            API_SECONDS.observe(method_name, time.perf_counter() - t0)
+
+    _make_request._metrics_wrapped = True
+    apihelper._make_request = _make_request
+    return True
+
+
+# -------------------------------------------------
+# Render encodes
+# -------------------------------------------------
+def record_encodes(stats: Dict[str, Dict[str, float]]):
+    """Add per-kind totals from bot.image_encoder.take_stats() (one render job's worth)."""
+    for kind, s in stats.items():
+        ENCODES.inc(kind, s.get("count", 0))
+        ENCODE_BYTES.inc(kind, s.get("bytes", 0))
+        ENCODE_SECONDS.inc(kind, s.get("ms", 0.0) / 1000.0)
+        if s.get("over_budget"):
+            ENCODE_OVER_BUDGET.inc(kind, s["over_budget"])
+
+
+# -------------------------------------------------
+# Exposition
+# -------------------------------------------------
+def render() -> str:
+    lines: List[str] = []
+    for m in _METRICS:
+        lines.extend(m.render())
+    for fn in _collectors:
+        try:
+            for name, value in fn().items():
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        except Exception:
+            continue
+    return "\n".join(lines) + "\n"
+
+
+def summary(top: int = 8) -> Dict[str, List[Tuple[str, int, float, float, int]]]:
+    """Rows of (label, count, avg_ms, p95_ms, errors), slowest avg first."""
+    out = {}
+    for key, hist, errs in (("handlers", HANDLER_SECONDS, HANDLER_ERRORS),
+                            ("db", DB_SECONDS, DB_ERRORS),
+                            ("api", API_SECONDS, API_ERRORS)):
+        errors = errs.snapshot()
+        rows = []
+        for label, snap in hist.snapshot().items():
+            if not snap["count"]:
+                continue
+            rows.append((label, snap["count"], snap["sum"] * 1000 / snap["count"],
+                         hist.quantile(label, 0.95) * 1000, int(errors.get(label, 0))))
+        rows.sort(key=lambda r: r[2], reverse=True)
+        out[key] = rows[:top]
+    return out
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> bool:
+    global _server
+    if not port or _server is not None:
+        return False
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except Exception as e:
+        print("⚠ [METRICS] could not bind endpoint:", e)
+        return False
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"✔ Metrics on http://{host}:{port}/metrics")
+    return True
+
+
+def _builtin_gauges() -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    try:
+        from services import dispatcher
+        d = dispatcher.stats()
+        if d:
+            out["megagrok_updates_queued"] = d["queued"]
+            out["megagrok_update_lag_avg_ms"] = d["lag_avg_ms"]
+            out["megagrok_update_lag_max_ms"] = d["lag_max_ms"]
+    except Exception:
+        pass
+    try:
+        from services import outbound
+        o = outbound.stats()
+        out["megagrok_outbound_pending"] = o["pending"]
+        out["megagrok_outbound_throttled_total"] = o["throttled"]
+    except Exception:
+        pass
+    try:
+        from services import callback_router
+        out["megagrok_callbacks_unrouted_total"] = callback_router.stats()["unrouted"]
+    except Exception:
+        pass
+    try:
+        from services import render_service
+        r = render_service.stats()
+        if r:
+            out["megagrok_render_pending"] = r["pending"]
+            out["megagrok_render_jobs_total"] = r["rendered"]
+            out["megagrok_render_cached_total"] = r["cached"]
+            out["megagrok_render_memo_items"] = r["memo_items"]
+            out["megagrok_render_memo_bytes"] = r["memo_bytes"]
+            out["megagrok_render_failed_total"] = r["failed"]
+            out["megagrok_render_rejected_total"] = r["rejected"]
+    except Exception:
+        pass
+    return out
+
+
+register_collector(_builtin_gauges)
+
+
+def install(bot) -> int:
+    """Wrap handlers, hook DB + API timing, start the endpoint."""
+    n = instrument_bot(bot)
+    instrument_db()
+    instrument_api()
+    start_server()
+    return n
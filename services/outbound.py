@@ -0,0 +1,330 @@
+# services/outbound.py
+"""
+Central outbound dispatcher for Telegram API calls.
+
+Handlers used to call bot.send_message / edit_message_text inline and
+broadcast loops paced themselves with time.sleep() inside the handler
+thread. Everything that doesn't need the API result right away goes
+through here instead:
+
+- token buckets: one shared by everything queued here (OUTBOUND_RATE
+  msg/s) plus one per chat (OUTBOUND_CHAT_RATE msg/s for DMs,
+  OUTBOUND_GROUP_PER_MIN msg/min for groups/channels), matching Telegram's
+  published per-chat limits
+- the shared bucket is not the bot's total: interactive replies are still
+  sent inline by the handlers and don't pass through it, so OUTBOUND_RATE
+  defaults below Telegram's ~30 msg/s to leave them headroom
+- priority lanes: INTERACTIVE (edits / replies to a tap) always go before
+  NORMAL, and NORMAL before BROADCAST
+- 429 handling: retry_after from the error pauses the whole dispatcher
+  (Telegram flood limits are per bot) and the call is requeued
+- worker pool: OUTBOUND_WORKERS threads issue the actual HTTP calls
+
+Usage:
+    from services import outbound
+    outbound.send_message(bot, chat_id, text, parse_mode="HTML",
+                          priority=outbound.BROADCAST)
+    outbound.call(bot, "edit_message_text", text, chat_id, msg_id,
+                  chat_id=chat_id, priority=outbound.INTERACTIVE)
+
+on_done(result) / on_error(exc) callbacks run on the worker thread.
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "4"))
+OUTBOUND_RATE = float(os.getenv("OUTBOUND_RATE", "20"))
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_GROUP_PER_MIN = float(os.getenv("OUTBOUND_GROUP_PER_MIN", "20"))
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "5"))
+
+# Priority lanes (lower = sooner)
+INTERACTIVE = 0
+NORMAL = 1
+BROADCAST = 2
+
+
+# -------------------------------------------------
+# Token bucket
+# -------------------------------------------------
+class TokenBucket:
+    """Classic token bucket. Not thread-safe on its own; callers hold a lock."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(0.001, rate)
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def take(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def is_full(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """retry_after seconds if exc is a Telegram 429, else None."""
+    if getattr(exc, "error_code", None) != 429:
+        return None
+    try:
+        return float(exc.result_json["parameters"]["retry_after"])
+    except Exception:
+        return 1.0
+
+
+# -------------------------------------------------
+# Dispatcher
+# -------------------------------------------------
+class _Job:
+    __slots__ = ("priority", "seq", "bot", "method", "args", "kwargs",
+                 "chat_id", "on_done", "on_error", "attempts")
+
+    def __init__(self, priority, seq, bot, method, args, kwargs, chat_id, on_done, on_error):
+        self.priority = priority
+        self.seq = seq
+        self.bot = bot
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.chat_id = chat_id
+        self.on_done = on_done
+        self.on_error = on_error
+        self.attempts = 0
+
+
+class OutboundQueue:
+    def __init__(self, workers: int = OUTBOUND_WORKERS,
+                 rate: float = OUTBOUND_RATE,
+                 chat_rate: float = OUTBOUND_CHAT_RATE,
+                 chat_burst: float = OUTBOUND_CHAT_BURST,
+                 group_per_min: float = OUTBOUND_GROUP_PER_MIN):
+        self.workers = max(1, workers)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_per_min / 60.0
+
+        self._cond = threading.Condition()
+        self._ready: List[tuple] = []     # (priority, seq, job)
+        self._delayed: List[tuple] = []   # (ready_at, priority, seq, job)
+        self._seq = itertools.count()
+        self._shared = TokenBucket(rate, rate)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._paused_until = 0.0
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+        self.sent = 0
+        self.failed = 0
+        self.throttled = 0
+
+    # ---------------------------------------------
+    # Public
+    # ---------------------------------------------
+    def submit(self, bot, method: str, *args,
+               chat_id: Any = None,
+               priority: int = NORMAL,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               **kwargs):
+        """Queue bot.<method>(*args, **kwargs). Returns immediately."""
+        self._ensure_started()
+        job = _Job(priority, next(self._seq), bot, method, args, kwargs,
+                   chat_id, on_done, on_error)
+        with self._cond:
+            heapq.heappush(self._ready, (job.priority, job.seq, job))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._ready) + len(self._delayed)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "pending": len(self._ready) + len(self._delayed),
+                "sent": self.sent,
+                "failed": self.failed,
+                "throttled": self.throttled,
+                "chats": len(self._chats),
+            }
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    # ---------------------------------------------
+    # Workers
+    # ---------------------------------------------
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"outbound-{i}", daemon=True)
+                self._threads.append(t)
+                t.start()
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        b = self._chats.get(chat_id)
+        if b is None:
+            # negative ids are groups / channels (20 msg/min), positive are DMs
+            if isinstance(chat_id, int) and chat_id < 0:
+                b = TokenBucket(self.group_rate, 1)
+            else:
+                b = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = b
+            if len(self._chats) > 4096:
+                self._prune()
+        return b
+
+    def _prune(self):
+        now = time.monotonic()
+        for cid in [c for c, b in self._chats.items() if b.is_full(now)]:
+            del self._chats[cid]
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pop the next job allowed to run now; blocks. Caller holds no lock."""
+        with self._cond:
+            while not self._stopping:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, prio, seq, job = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (prio, seq, job))
+
+                wait = None
+                if self._paused_until > now:
+                    wait = self._paused_until - now
+                elif self._ready:
+                    _, _, job = heapq.heappop(self._ready)
+                    if job.chat_id is not None:
+                        bucket = self._chat_bucket(job.chat_id)
+                        chat_wait = bucket.wait_time(now)
+                        if chat_wait > 0:
+                            heapq.heappush(self._delayed, (now + chat_wait, job.priority, job.seq, job))
+                            continue
+                        bucket.take(now)
+                    shared_wait = self._shared.wait_time(now)
+                    if shared_wait <= 0:
+                        self._shared.take(now)
+                        return job
+                    # shared bucket empty: put it back and sleep until a token
+                    if job.chat_id is not None:
+                        self._chats[job.chat_id].tokens += 1.0
+                    heapq.heappush(self._ready, (job.priority, job.seq, job))
+                    wait = shared_wait
+
+                if self._delayed:
+                    d = self._delayed[0][0] - now
+                    wait = d if wait is None else min(wait, d)
+                self._cond.wait(timeout=wait)
+        return None
+
+    def _requeue(self, job: _Job, delay: float):
+        with self._cond:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, job.priority, job.seq, job))
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            job.attempts += 1
+            try:
+                result = getattr(job.bot, job.method)(*job.args, **job.kwargs)
+            except Exception as e:
+                retry = _retry_after(e)
+                if retry is not None and job.attempts <= OUTBOUND_MAX_RETRIES:
+                    with self._cond:
+                        self.throttled += 1
+                        self._paused_until = max(self._paused_until, time.monotonic() + retry)
+                    print(f"⚠ [OUTBOUND] 429 on {job.method} → pausing {retry:.1f}s")
+                    self._requeue(job, retry)
+                    continue
+                with self._cond:
+                    self.failed += 1
+                self._callback(job.on_error, e)
+                continue
+
+            with self._cond:
+                self.sent += 1
+            self._callback(job.on_done, result)
+
+    @staticmethod
+    def _callback(fn, value):
+        if not fn:
+            return
+        try:
+            fn(value)
+        except Exception:
+            traceback.print_exc()
+
+
+# -------------------------------------------------
+# Module-level singleton
+# -------------------------------------------------
+_instance: Optional[OutboundQueue] = None
+_instance_lock = threading.Lock()
+
+
+def _get_instance() -> OutboundQueue:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = OutboundQueue()
+    return _instance
+
+
+def call(bot, method: str, *args, chat_id: Any = None, priority: int = NORMAL,
+         on_done: Optional[Callable[[Any], None]] = None,
+         on_error: Optional[Callable[[Exception], None]] = None, **kwargs):
+    _get_instance().submit(bot, method, *args, chat_id=chat_id, priority=priority,
+                           on_done=on_done, on_error=on_error, **kwargs)
+
+
+def send_message(bot, chat_id, text: str, priority: int = NORMAL,
+                 on_done: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None, **kwargs):
+    call(bot, "send_message", chat_id, text, chat_id=chat_id, priority=priority,
+         on_done=on_done, on_error=on_error, **kwargs)
+
+
+def edit_message_text(bot, text: str, chat_id, message_id, priority: int = INTERACTIVE,
+                      on_done: Optional[Callable[[Any], None]] = None,
+                      on_error: Optional[Callable[[Exception], None]] = None, **kwargs):
+    # edits don't count against the per-chat send limit the same way; keep
+    # them on the shared bucket only so a tap is never held behind a DM burst
+    call(bot, "edit_message_text", text, chat_id, message_id, priority=priority,
+         on_done=on_done, on_error=on_error, **kwargs)
+
+
+def stats() -> Dict[str, int]:
+    return _get_instance().stats()
@@ -0,0 +1,310 @@
+# services/render_service.py
+"""
+Off-thread render service for Pillow image generation.
+
+Profile cards / leaderboards are CPU-bound; rendering them inside a
+Telegram handler thread stalls every other command. Jobs are handed to a
+ProcessPoolExecutor instead, so a burst of /profile requests spreads
+across cores.
+
+- workers are spawned (RENDER_START_METHOD, default "spawn"), never
+  forked: the bot process is multithreaded, and a fork copies whatever
+  locks other threads happen to hold. start() brings the pool up at boot.
+
+- bounded: at most RENDER_QUEUE_MAX jobs pending; submit() returns False
+  when full so the handler can tell the user to retry
+- deduplicated: identical (kind, payload) jobs already in flight share one
+  render and every caller's callback fires with the same bytes
+- in-memory: workers return encoded bytes, on_done(buf) gets a fresh
+  named BytesIO per caller (straight into bot.send_photo, no temp files)
+- memo: recent results are kept in a small bytes LRU in this process
+  (RENDER_MEMO_ITEMS / RENDER_MEMO_BYTES), keyed by (kind, payload). It is
+  separate from the workers' versioned render cache (bot/render_cache.py);
+  renderer versions and encoder settings can't change while the process
+  runs, so the memo doesn't need them in its key
+- callbacks (on_done(buf) / on_error(exc)) run on a small thread pool,
+  never on the pool's result thread
+
+Usage:
+    from services import render_service
+    render_service.submit("profile_card", data, on_done, on_error)
+"""
+
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bot import image_encoder
+from bot.render_cache import render_key
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+RENDER_QUEUE_MAX = int(os.getenv("RENDER_QUEUE_MAX", "32"))
+RENDER_CALLBACK_THREADS = int(os.getenv("RENDER_CALLBACK_THREADS", "4"))
+RENDER_START_METHOD = os.getenv("RENDER_START_METHOD", "spawn")  # spawn | forkserver
+RENDER_MEMO_ITEMS = int(os.getenv("RENDER_MEMO_ITEMS", "32"))
+RENDER_MEMO_BYTES = int(os.getenv("RENDER_MEMO_BYTES", str(32 * 1024 * 1024)))
+
+
+# -------------------------------------------------
+# Worker side (runs in the child process)
+# -------------------------------------------------
+def _render(kind: str, payload: Any) -> bytes:
+    if kind == "profile_card":
+        from bot.profile_card import generate_profile_card
+        return generate_profile_card(payload, as_buffer=True).getvalue()
+    if kind == "profile_image":
+        from bot.profile_image import generate_profile_image
+        return generate_profile_image(payload, as_buffer=True).getvalue()
+    if kind == "leaderboard":
+        from bot.images import generate_leaderboard_premium
+        return generate_leaderboard_premium(payload, as_buffer=True).getvalue()
+    raise ValueError(f"unknown render kind: {kind}")
+
+
+def _render_job(kind: str, payload: Any) -> Tuple[bytes, Dict[str, Dict[str, float]]]:
+    """Encoded bytes plus the encoder stats this job produced (they live in the worker)."""
+    data = _render(kind, payload)
+    return data, image_encoder.take_stats()
+
+
+def _warm_worker():
+    """
+    Pool initializer: draw one of each render kind (no encode, no cache
+    write) so the fonts, images and static layers the renderers actually
+    request are loaded in this worker before its first real job.
+    """
+    try:
+        from bot.profile_card import render_profile_card, EVOLUTION_STYLE
+        from bot.profile_image import render_profile_image
+        from bot.images import render_leaderboard
+
+        for evo in EVOLUTION_STYLE:
+            render_profile_card({"evolution": evo, "display_name": "warmup"})
+        render_profile_image({"user_id": 0, "display_name": "warmup", "form": 1})
+        render_leaderboard([{"user_id": 0, "display_name": "warmup"}])
+    except Exception as e:
+        print("⚠ [RENDER] worker warm-up failed:", e)
+
+
+# -------------------------------------------------
+# Service
+# -------------------------------------------------
+Callback = Tuple[Optional[Callable[[Any], None]], Optional[Callable[[Exception], None]]]
+
+
+class RenderService:
+    def __init__(self, workers: int = RENDER_WORKERS, queue_max: int = RENDER_QUEUE_MAX,
+                 callback_threads: int = RENDER_CALLBACK_THREADS,
+                 memo_items: int = RENDER_MEMO_ITEMS, memo_bytes: int = RENDER_MEMO_BYTES):
+        self.workers = max(1, workers)
+        self.queue_max = max(1, queue_max)
+        self.memo_items = max(0, memo_items)
+        self.memo_bytes = max(0, memo_bytes)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, List[Callback]] = {}
+        self._memo: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memo_total = 0
+        self._pool = None
+        self.rendered = 0
+        self.cached = 0
+        self.failed = 0
+        self.rejected = 0
+        self._callbacks = ThreadPoolExecutor(max_workers=max(1, callback_threads),
+                                             thread_name_prefix="render-cb")
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._make_pool()
+            return self._pool
+
+    def _make_pool(self):
+        try:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            return ProcessPoolExecutor(max_workers=self.workers,
+                                       mp_context=multiprocessing.get_context(RENDER_START_METHOD),
+                                       initializer=_warm_worker)
+        except Exception as e:
+            # e.g. no /dev/shm in the container — degrade to threads
+            print("⚠ [RENDER] process pool unavailable, using threads:", e)
+            return ThreadPoolExecutor(max_workers=self.workers,
+                                      thread_name_prefix="render",
+                                      initializer=_warm_worker)
+
+    def start(self):
+        """
+        Create the pool and launch every worker now. Spawned workers are
+        started on demand (one per submit while none is idle), so one no-op
+        job per worker brings them all up; each warms itself on arrival.
+        """
+        pool = self._get_pool()
+        for _ in range(self.workers):
+            pool.submit(os.getpid)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    # ---------------------------------------------
+    # Memo (bytes LRU, this process only)
+    # ---------------------------------------------
+    def _memo_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memo.get(key)
+            if data is not None:
+                self._memo.move_to_end(key)
+                self.cached += 1
+            return data
+
+    def _memo_put(self, key: str, data: bytes):
+        if not self.memo_items or len(data) > self.memo_bytes:
+            return
+        with self._lock:
+            old = self._memo.pop(key, None)
+            if old is not None:
+                self._memo_total -= len(old)
+            self._memo[key] = data
+            self._memo_total += len(data)
+            while self._memo and (len(self._memo) > self.memo_items or self._memo_total > self.memo_bytes):
+                _, dropped = self._memo.popitem(last=False)
+                self._memo_total -= len(dropped)
+
+    def submit(self, kind: str, payload: Any,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None) -> bool:
+        """
+        Queue a render. Returns False (and queues nothing) if the job queue
+        is full; True if the job was queued, joined an identical one, or was
+        answered straight from the memo.
+        """
+        key = render_key(kind, payload)
+        cached = self._memo_get(key)
+        if cached is not None:
+            self._callbacks.submit(self._run_callback, kind, on_done, on_error, cached, None)
+            return True
+
+        with self._lock:
+            waiters = self._inflight.get(key)
+            if waiters is not None:
+                waiters.append((on_done, on_error))
+                return True
+            if len(self._inflight) >= self.queue_max:
+                self.rejected += 1
+                return False
+            self._inflight[key] = [(on_done, on_error)]
+
+        try:
+            fut = self._get_pool().submit(_render_job, kind, payload)
+        except Exception as e:
+            self._finish(kind, key, None, e)
+            return True
+
+        fut.add_done_callback(lambda f, k=key: self._on_future(kind, k, f))
+        return True
+
+    def _on_future(self, kind: str, key: str, fut):
+        try:
+            (data, encodes), err = fut.result(), None
+        except Exception as e:
+            data, encodes, err = None, None, e
+        if encodes:
+            try:
+                from services import metrics
+                metrics.record_encodes(encodes)
+            except Exception:
+                pass
+        if data is not None:
+            self._memo_put(key, data)
+        self._finish(kind, key, data, err)
+
+    def _finish(self, kind: str, key: str, data: Optional[bytes], err: Optional[Exception]):
+        with self._lock:
+            waiters = self._inflight.pop(key, [])
+            if err is None:
+                self.rendered += 1
+            else:
+                self.failed += 1
+        if err is not None:
+            print(f"⚠ [RENDER] job failed: {err!r}")
+        for on_done, on_error in waiters:
+            self._callbacks.submit(self._run_callback, kind, on_done, on_error, data, err)
+
+    @staticmethod
+    def _run_callback(kind, on_done, on_error, data, err):
+        try:
+            if err is None:
+                if on_done:
+                    # each caller gets its own stream (send_photo consumes it)
+                    on_done(image_encoder.buffer(data, kind))
+            elif on_error:
+                on_error(err)
+        except Exception:
+            traceback.print_exc()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"workers": self.workers, "pending": len(self._inflight),
+                    "memo_items": len(self._memo), "memo_bytes": self._memo_total,
+                    "rendered": self.rendered, "cached": self.cached, "failed": self.failed, "rejected": self.rejected}
+
+    def shutdown(self, wait: bool = False):
+        """Stop the workers (queued renders are dropped); callbacks still running are left to finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._callbacks.shutdown(wait=False)
+
+
+# -------------------------------------------------
+# Module-level singleton
+# -------------------------------------------------
+_instance: Optional[RenderService] = None
+_instance_lock = threading.Lock()
+
+
+def _get_instance() -> RenderService:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = RenderService()
+    return _instance
+
+
+def start():
+    _get_instance().start()
+
+
+def stats() -> Dict[str, int]:
+    return _instance.stats() if _instance else {}
+
+
+def shutdown(wait: bool = True):
+    if _instance is not None:
+        _instance.shutdown(wait)
+
+
+def submit(kind: str, payload: Any,
+           on_done: Optional[Callable[[Any], None]] = None,
+           on_error: Optional[Callable[[Exception], None]] = None) -> bool:
+    return _get_instance().submit(kind, payload, on_done, on_error)
+
+
+def send_photo_when_ready(bot, chat_id: int, kind: str, payload: Any,
+                          error_text: str = "❌ Failed to generate image.",
+                          busy_text: str = "⏳ Image renderer is busy — try again in a moment.",
+                          **send_kwargs) -> bool:
+    """Render off-thread, then send the result as a photo to chat_id."""
+    def _done(buf):
+        bot.send_photo(chat_id, buf, **send_kwargs)
+
+    def _fail(_err):
+        bot.send_message(chat_id, error_text)
+
+    if not submit(kind, payload, _done, _fail):
+        bot.send_message(chat_id, busy_text)
+        return False
+    return True
@@ -0,0 +1,191 @@
+# services/sql_profiler.py
+"""
+Opt-in SQL profiler + slow-query log for bot/db.py (SQL_PROFILE=1).
+
+Hooks the db module cursor (query + fetch observers) and aggregates per
+(db helper, normalized statement):
+  count, total / avg / p95 ms, rows returned, errors
+
+- normalized = whitespace collapsed, literals replaced by ?
+- helper = the bot/db.py function that issued it (get_user, get_all_users…)
+  or "<caller file>:<func>" for code that uses db.cursor directly
+- any statement slower than SQL_SLOW_MS is printed with the handler that
+  triggered it (first frame in bot/handlers/ or bot/commands.py)
+
+report() returns the ranked table (by total time); it is printed at exit,
+written to SQL_PROFILE_REPORT if set, and shown by the /sqlprofile admin
+command.
+"""
+
+import os
+import re
+import sys
+import time
+import atexit
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "0") == "1"
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "50"))
+SQL_PROFILE_REPORT = os.getenv("SQL_PROFILE_REPORT", "")
+SAMPLES_PER_STATEMENT = 512
+
+_lock = threading.Lock()
+_stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_last_key = threading.local()   # statement key of the last execute on this thread
+_enabled = False
+_started_at = 0.0
+
+_WS = re.compile(r"\s+")
+_STR = re.compile(r"'(?:[^']|'')*'")
+_NUM = re.compile(r"\b\d+(?:\.\d+)?\b")
+_DB_FILE = os.path.join("bot", "db.py")
+_CURSOR_FRAMES = {"_run", "execute", "executemany"}
+
+
+def normalize(sql: str) -> str:
+    s = _WS.sub(" ", sql or "").strip()
+    s = _STR.sub("?", s)
+    s = _NUM.sub("?", s)
+    return s[:160]
+
+
+def _attribute() -> Tuple[str, str]:
+    """(helper, handler) for the current statement, from the call stack."""
+    f = sys._getframe(2)
+    helper = None
+    handler = "-"
+    depth = 0
+    while f is not None and depth < 40:
+        fname = f.f_code.co_filename
+        if fname.endswith(_DB_FILE):
+            if f.f_code.co_name not in _CURSOR_FRAMES:
+                helper = f"db.{f.f_code.co_name}"
+        else:
+            if helper is None:
+                helper = f"{os.path.basename(fname)}:{f.f_code.co_name}"
+            if os.sep + "handlers" + os.sep in fname or fname.endswith(os.path.join("bot", "commands.py")):
+                handler = f"{os.path.basename(fname)}:{f.f_code.co_name}"
+                break
+        f = f.f_back
+        depth += 1
+    return helper or "db.<module>", handler
+
+
+# -------------------------------------------------
+# Observers
+# -------------------------------------------------
+def _on_query(sql: str, seconds: float, err: Optional[Exception]):
+    helper, handler = _attribute()
+    stmt = normalize(sql)
+    key = (helper, stmt)
+    _last_key.key = key
+    ms = seconds * 1000.0
+    with _lock:
+        s = _stats.get(key)
+        if s is None:
+            s = _stats[key] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                               "errors": 0, "samples": deque(maxlen=SAMPLES_PER_STATEMENT),
+                               "handlers": {}}
+        s["count"] += 1
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+        s["samples"].append(ms)
+        s["handlers"][handler] = s["handlers"].get(handler, 0) + 1
+        if err is not None:
+            s["errors"] += 1
+
+    if ms >= SQL_SLOW_MS:
+        print(f"🐢 [SQL] {ms:.1f}ms {stmt[:100]} ← {helper} ← {handler}")
+
+
+def _on_fetch(sql: str, rows: int):
+    key = getattr(_last_key, "key", None)
+    if key is None:
+        return
+    with _lock:
+        s = _stats.get(key)
+        if s is not None:
+            s["rows"] += rows
+
+
+# -------------------------------------------------
+# Public API
+# -------------------------------------------------
+def enable() -> bool:
+    global _enabled, _started_at
+    if _enabled:
+        return False
+    import bot.db as db
+    db.add_query_observer(_on_query)
+    db.add_fetch_observer(_on_fetch)
+    _enabled = True
+    _started_at = time.time()
+    atexit.register(dump)
+    print(f"✔ SQL profiler on (slow ≥ {SQL_SLOW_MS:.0f} ms)")
+    return True
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _p95(samples) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def rows(top: int = 20) -> List[Dict[str, Any]]:
+    with _lock:
+        items = [(k, dict(v, samples=list(v["samples"]), handlers=dict(v["handlers"])))
+                 for k, v in _stats.items()]
+    out = []
+    for (helper, stmt), s in items:
+        top_handler = max(s["handlers"].items(), key=lambda kv: kv[1])[0] if s["handlers"] else "-"
+        out.append({
+            "helper": helper,
+            "statement": stmt,
+            "count": s["count"],
+            "total_ms": s["total_ms"],
+            "avg_ms": s["total_ms"] / s["count"] if s["count"] else 0.0,
+            "p95_ms": _p95(s["samples"]),
+            "max_ms": s["max_ms"],
+            "rows": s["rows"],
+            "errors": s["errors"],
+            "top_handler": top_handler,
+        })
+    out.sort(key=lambda r: r["total_ms"], reverse=True)
+    return out[:top]
+
+
+def report(top: int = 20) -> str:
+    data = rows(top)
+    if not data:
+        return "SQL profile: no statements recorded" + ("" if _enabled else " (SQL_PROFILE=1 to enable)")
+    window = time.time() - _started_at if _started_at else 0.0
+    lines = [f"SQL profile — top {len(data)} by total time over {window:.0f}s",
+             f"{'total ms':>10} {'count':>7} {'avg':>7} {'p95':>7} {'rows':>8}  helper / statement"]
+    for r in data:
+        lines.append(f"{r['total_ms']:10.1f} {r['count']:7d} {r['avg_ms']:7.2f} {r['p95_ms']:7.2f} "
+                     f"{r['rows']:8d}  {r['helper']} (via {r['top_handler']})")
+        lines.append(f"{'':>44}{r['statement'][:90]}")
+    return "\n".join(lines)
+
+
+def dump():
+    text = report()
+    if SQL_PROFILE_REPORT:
+        try:
+            with open(SQL_PROFILE_REPORT, "w") as f:
+                f.write(text + "\n")
+        except Exception as e:
+            print("⚠ [SQL] could not write report:", e)
+    print(text)
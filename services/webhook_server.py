@@ -0,0 +1,187 @@
+# services/webhook_server.py
+"""
+Embedded webhook receiver (BOT_MODE=webhook).
+
+- ThreadingHTTPServer on WEBHOOK_HOST:WEBHOOK_PORT (PORT on Render)
+- POST WEBHOOK_PATH with the X-Telegram-Bot-Api-Secret-Token header equal
+  to WEBHOOK_SECRET → update is parsed and put on a bounded queue; the
+  request is answered immediately (200), or 503 when the queue is full so
+  Telegram redelivers later
+- WEBHOOK_WORKERS threads drain the queue into bot.process_new_updates()
+- GET / and GET /healthz → 200 (load balancer health check)
+
+Several replicas can sit behind one load balancer: Telegram delivers each
+update once to whichever replica answers.
+
+start(bot) returns False if the server or setWebhook fails, so main.py
+can fall back to long polling.
+"""
+
+import os
+import json
+import hmac
+import queue
+import hashlib
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")        # public base, e.g. https://bot.example.com
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", os.getenv("PORT", "8080")))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "")
+WEBHOOK_QUEUE_MAX = int(os.getenv("WEBHOOK_QUEUE_MAX", "1000"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_MAX_BODY = 1024 * 1024
+
+_updates: "queue.Queue" = queue.Queue(maxsize=WEBHOOK_QUEUE_MAX)
+_server: Optional[ThreadingHTTPServer] = None
+_stats = {"received": 0, "rejected": 0, "dropped": 0, "processed": 0}
+_stats_lock = threading.Lock()
+
+
+def _bump(field: str):
+    with _stats_lock:
+        _stats[field] += 1
+
+
+def stats():
+    with _stats_lock:
+        out = dict(_stats)
+    out["queued"] = _updates.qsize()
+    return out
+
+
+def webhook_path(token: str) -> str:
+    """Default path is derived from the token so it isn't guessable."""
+    if WEBHOOK_PATH:
+        return WEBHOOK_PATH if WEBHOOK_PATH.startswith("/") else "/" + WEBHOOK_PATH
+    return "/telegram/" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+# -------------------------------------------------
+# HTTP handler
+# -------------------------------------------------
+def _make_handler(path: str, secret: str):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: bytes = b""):
+            self.send_response(code)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path in ("/", "/healthz"):
+                return self._reply(200, b"ok")
+            return self._reply(404)
+
+        def do_POST(self):
+            if self.path != path:
+                return self._reply(404)
+
+            given = self.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if secret and not hmac.compare_digest(given, secret):
+                _bump("rejected")
+                return self._reply(403)
+
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = 0
+            if length <= 0 or length > WEBHOOK_MAX_BODY:
+                return self._reply(400)
+
+            try:
+                update = json.loads(self.rfile.read(length).decode("utf-8"))
+            except Exception:
+                return self._reply(400)
+
+            try:
+                _updates.put_nowait(update)
+            except queue.Full:
+                # Telegram retries non-2xx deliveries
+                _bump("dropped")
+                return self._reply(503)
+
+            _bump("received")
+            return self._reply(200)
+
+        def log_message(self, fmt, *args):
+            pass  # keep Render logs quiet; see stats()
+
+    return WebhookHandler
+
+
+# -------------------------------------------------
+# Update workers
+# -------------------------------------------------
+def _worker(bot):
+    from telebot import types
+    while True:
+        raw = _updates.get()
+        if raw is None:
+            return
+        try:
+            update = types.Update.de_json(raw)
+            bot.process_new_updates([update])
+            _bump("processed")
+        except Exception:
+            traceback.print_exc()
+
+
+# -------------------------------------------------
+# Lifecycle
+# -------------------------------------------------
+def start(bot, token: str) -> bool:
+    """Bind the server, start workers, register the webhook with Telegram."""
+    global _server
+    if not WEBHOOK_URL:
+        print("⚠ [WEBHOOK] WEBHOOK_URL not set")
+        return False
+    if not WEBHOOK_SECRET:
+        print("⚠ [WEBHOOK] WEBHOOK_SECRET not set — updates are not authenticated")
+
+    path = webhook_path(token)
+    try:
+        _server = ThreadingHTTPServer((WEBHOOK_HOST, WEBHOOK_PORT), _make_handler(path, WEBHOOK_SECRET))
+    except Exception as e:
+        print("⚠ [WEBHOOK] could not bind server:", e)
+        return False
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="webhook-http", daemon=True).start()
+
+    for i in range(max(1, WEBHOOK_WORKERS)):
+        threading.Thread(target=_worker, args=(bot,), name=f"webhook-{i}", daemon=True).start()
+
+    try:
+        kwargs = {"url": WEBHOOK_URL + path, "max_connections": 40}
+        if WEBHOOK_SECRET:
+            kwargs["secret_token"] = WEBHOOK_SECRET
+        bot.set_webhook(**kwargs)
+    except Exception as e:
+        print("⚠ [WEBHOOK] setWebhook failed:", e)
+        stop()
+        return False
+
+    print(f"✔ Webhook listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{path[:18]}…")
+    return True
+
+
+def stop():
+    global _server
+    if _server is not None:
+        try:
+            _server.shutdown()
+            _server.server_close()
+        except Exception:
+            pass
+        _server = None
+    for _ in range(max(1, WEBHOOK_WORKERS)):
+        try:
+            _updates.put_nowait(None)
+        except queue.Full:
+            break